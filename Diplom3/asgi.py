@@ -5,6 +5,9 @@ It exposes the ASGI callable as a module-level variable named ``application``.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
+
+Push-каналы (/stream/...) отдают Server-Sent Events и требуют ASGI-сервера,
+например: uvicorn Diplom3.asgi:application
 """
 
 import os
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -37,16 +38,20 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.forms',
     'accounts',
     'crm',
 ]
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    # Первым после security, чтобы учитывать и запросы сессии/пользователя
+    'crm.instrumentation.QueryInstrumentationMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'crm.db.ReplicaMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -68,6 +73,9 @@ TEMPLATES = [
     },
 ]
 
+# Шаблоны виджетов форм ищутся и в templates/ (widgets/custom_clearable_file_input.html)
+FORM_RENDERER = 'django.forms.renderers.TemplatesSetting'
+
 WSGI_APPLICATION = 'Diplom3.wsgi.application'
 
 
@@ -81,6 +89,31 @@ DATABASES = {
     }
 }
 
+# PRAGMA каждого соединения SQLite (WAL, synchronous, busy_timeout, mmap) — crm.db.configure_sqlite,
+# переопределяются словарём CRM_SQLITE_PRAGMAS.
+# Профиль production (CRM_DB_PROFILE=production): постоянные соединения, транзакции BEGIN IMMEDIATE
+# (писатель ждёт блокировку по busy_timeout, а не ловит «database is locked» при её повышении)
+# и алиас replica — тот же файл только на чтение, туда уходят чтения view с read_replica = True
+CRM_DB_PROFILE = os.environ.get('CRM_DB_PROFILE', 'dev')
+if CRM_DB_PROFILE == 'production':
+    DATABASES['default'].update({
+        'CONN_MAX_AGE': 600,
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {'timeout': 20, 'transaction_mode': 'IMMEDIATE'},
+    })
+    DATABASES['replica'] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': f"file:{BASE_DIR / 'db.sqlite3'}?mode=ro",
+        'CONN_MAX_AGE': 600,
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {'timeout': 20},
+        'TEST': {'MIRROR': 'default'},
+    }
+
+DATABASE_ROUTERS = ['crm.db.ReadReplicaRouter']
+CRM_REPLICA_DB = 'replica'  # алиас из DATABASES; нет такого — все чтения на default
+CRM_REPLICA_APPS = ('crm',)  # сессии и пользователи читаются с default: им важна свежесть
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -138,5 +171,68 @@ LOGOUT_REDIRECT_URL = '/'
 # Authentication backends
 AUTHENTICATION_BACKENDS = [
     'accounts.authentication.EmailAuthBackend',  # Авторизация по email
-    'django.contrib.auth.backends.ModelBackend',  # Стандартная авторизация по username
+    'accounts.authentication.CachedModelBackend',  # Стандартная авторизация по username
 ]
+
+# Кеш по умолчанию — память процесса; для нескольких воркеров — общий (Redis/Memcached)
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    # Фрагменты шаблонов (crm.fragments): карточки доски и строки таблицы задач.
+    # CRM_FRAGMENT_CACHE=0 — рендерить всё заново (отладка шаблонов)
+    'fragments': {
+        'BACKEND': (
+            'django.core.cache.backends.locmem.LocMemCache'
+            if os.environ.get('CRM_FRAGMENT_CACHE', '1') != '0'
+            else 'django.core.cache.backends.dummy.DummyCache'
+        ),
+        'LOCATION': 'crm-fragments',
+        'TIMEOUT': 24 * 60 * 60,
+        'OPTIONS': {'MAX_ENTRIES': 20000},
+    },
+}
+AUTH_USER_CACHE_TTL = 60  # секунды жизни пользователя сессии в кеше (accounts.authentication)
+
+# Push-события (SSE) для доски и переписки. Брокер в памяти процесса годится для
+# одного ASGI-воркера; для нескольких — класс с тем же интерфейсом (crm.realtime)
+CRM_PUSH_BROKER = 'crm.realtime.InProcessBroker'
+CRM_PUSH_KEEPALIVE = 15  # секунды между keepalive-комментариями в потоке
+
+# Следы удалённых задач для синхронизации доски (crm.kanban) чистит `manage.py prune_tombstones` (cron).
+# Доска с курсором старше этого срока перезагружается целиком
+CRM_TOMBSTONE_DAYS = 7
+
+# Публичная форма заявки (crm.intake). Очередь в файлах включена только в профиле production:
+# там рядом с веб-сервером должен работать воркер `manage.py drain_intake --loop`, иначе заявки
+# копятся в var/intake и не попадают в БД. None — писать заявку в БД сразу, без воркера
+CRM_INTAKE_SPOOL = BASE_DIR / 'var' / 'intake' if CRM_DB_PROFILE == 'production' else None
+CRM_INTAKE_THROTTLE = (5, 60)  # ведро на 5 заявок с одного IP, целиком пополняется за 60 с
+
+# Вложения задач (crm.attachments). Файлы больше FILE_UPLOAD_MAX_MEMORY_SIZE Django пишет
+# во временный файл, а не в память. SENDFILE: ('X-Accel-Redirect', '/protected-media/') —
+# отдачу берёт на себя nginx (internal location на MEDIA_ROOT)
+CRM_ATTACHMENT_MAX_SIZE = 512 * 1024 * 1024
+CRM_ATTACHMENT_SENDFILE = None
+
+# Превью фото и картинок-вложений (crm.thumbnails) строит `manage.py build_thumbnails --loop`.
+# None — строить сразу после сохранения, в процессе запроса
+CRM_THUMBNAIL_SPOOL = BASE_DIR / 'var' / 'thumbs'
+
+# Замеры запросов (crm.instrumentation): число SQL, время БД и рендера по url name
+CRM_PERF_SERVER_TIMING = DEBUG  # заголовок Server-Timing в ответах
+CRM_QUERY_BUDGET_STRICT = False  # True — превышение query_budget у view поднимает исключение (тесты)
+
+# Строка на каждый запрос — CRM_PERF_LOG_LEVEL=INFO; по умолчанию только превышения бюджета
+CRM_PERF_LOG_LEVEL = os.environ.get('CRM_PERF_LOG_LEVEL', 'WARNING')
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'crm.perf': {'handlers': ['console'], 'level': CRM_PERF_LOG_LEVEL, 'propagate': False},
+    },
+}
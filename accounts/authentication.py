@@ -1,24 +1,79 @@
+from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.contrib.auth.backends import BaseBackend
+from django.contrib.auth.backends import BaseBackend, ModelBackend
+from django.core.cache import cache
+from django.core.exceptions import PermissionDenied
+from django.db import transaction
 
+from .models import email_key_for
 
-class EmailAuthBackend(BaseBackend):
-    """Бэкенд для авторизации по email"""
-    
-    def authenticate(self, request, username=None, password=None, **kwargs):
+# Пользователь из сессии читается на каждом запросе: строка кешируется на
+# USER_CACHE_TTL секунд и сбрасывается при save()/delete() (accounts.signals).
+# Правки в обход save() (QuerySet.update) видны не позже чем через TTL.
+USER_CACHE_TTL = getattr(settings, 'AUTH_USER_CACHE_TTL', 60)
+
+
+def looks_like_email(value: str | None) -> bool:
+    return bool(value) and "@" in value
+
+
+def user_cache_key(user_id) -> str:
+    return f'accounts:user:{user_id}'
+
+
+def load_user(user_id):
+    """Пользователь по pk из кеша, при промахе — из БД; None — такого нет."""
+    key = user_cache_key(user_id)
+    user = cache.get(key)
+    if user is None:
         user_model = get_user_model()
         try:
-            user = user_model.objects.get(email=username)
-            if user.check_password(password):
-                return user
-            return None
-        except (user_model.DoesNotExist, user_model.MultipleObjectsReturned):
+            user = user_model.objects.get(pk=user_id)
+        except user_model.DoesNotExist:
             return None
+        cache.set(key, user, USER_CACHE_TTL)
+    return user
 
-    def get_user(self, user_id):
+
+def invalidate_user(user_id) -> None:
+    key = user_cache_key(user_id)
+    cache.delete(key)
+    # повторный сброс после коммита: параллельный запрос мог успеть положить старую строку
+    transaction.on_commit(lambda: cache.delete(key))
+
+
+class EmailAuthBackend(BaseBackend):
+    """
+    Бэкенд для авторизации по email: поиск по уникальному индексу email_key.
+    Логин без «@» сюда не попадает — сразу ModelBackend без лишнего запроса.
+    На неизвестный email пароль не проверяется: хешер отработает в
+    CachedModelBackend, так что время ответа не выдаёт, есть ли пользователь.
+    """
+
+    def authenticate(self, request, username=None, password=None, **kwargs):
+        if not looks_like_email(username) or password is None:
+            return None
         user_model = get_user_model()
         try:
-            return user_model.objects.get(pk=user_id)
+            user = user_model.objects.get(email_key=email_key_for(username))
         except user_model.DoesNotExist:
+            # может быть логином с «@» — решит ModelBackend
             return None
+        if user.check_password(password) and self.user_can_authenticate(user):
+            return user
+        # email найден, пароль неверный: дальше по цепочке бэкендов не идём
+        raise PermissionDenied
 
+    def user_can_authenticate(self, user):
+        return getattr(user, 'is_active', True)
+
+    def get_user(self, user_id):
+        return load_user(user_id)
+
+
+class CachedModelBackend(ModelBackend):
+    """Стандартная авторизация по username, пользователь сессии — через кеш"""
+
+    def get_user(self, user_id):
+        user = load_user(user_id)
+        return user if user is not None and self.user_can_authenticate(user) else None
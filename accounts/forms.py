@@ -2,6 +2,7 @@ from django.contrib.auth import get_user_model
 from django.contrib.auth.forms import AuthenticationForm, UserCreationForm, PasswordChangeForm
 from django import forms
 from .CustomWidgets import CustomClearableFileInput
+from .models import email_key_for
 
 
 class LoginUserForm(AuthenticationForm):
@@ -30,7 +31,7 @@ class RegisterUserForm(UserCreationForm):
 
     def clean_email(self):
         email = self.cleaned_data['email']
-        if get_user_model().objects.filter(email=email).exists():
+        if get_user_model().objects.filter(email_key=email_key_for(email)).exists():
             raise forms.ValidationError('Такая почта уже существует')
         return email
 
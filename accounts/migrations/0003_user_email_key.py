@@ -0,0 +1,40 @@
+# Generated by Django 5.2.7 on 2026-10-18 11:11
+
+from django.db import migrations, models
+
+
+def fill_email_key(apps, schema_editor):
+    # при совпадающих email ключ получает самый ранний пользователь, остальные входят по логину
+    User = apps.get_model("accounts", "User")
+    seen = set()
+    users = []
+    for user in User.objects.order_by("id").only("id", "email"):
+        key = (user.email or "").strip().lower() or None
+        if key in seen:
+            key = None
+        if key:
+            seen.add(key)
+        user.email_key = key
+        users.append(user)
+    User.objects.bulk_update(users, ["email_key"], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0002_user_created_at_user_phone_user_photo'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='email_key',
+            field=models.CharField(blank=True, editable=False, max_length=254, null=True),
+        ),
+        migrations.RunPython(fill_email_key, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='user',
+            name='email_key',
+            field=models.CharField(blank=True, editable=False, max_length=254, null=True, unique=True),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-18 11:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0003_user_email_key'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='photo_sha256',
+            field=models.CharField(blank=True, editable=False, max_length=64),
+        ),
+    ]
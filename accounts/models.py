@@ -1,9 +1,41 @@
+import hashlib
+
+from django.core.exceptions import ValidationError
 from django.db import models
-from django.contrib.auth.models import AbstractUser
+from django.contrib.auth.models import AbstractUser, UserManager as DjangoUserManager
 from django.utils.text import slugify
 from .validators import validate_email, validate_phone_number
 
 
+def email_key_for(email: str | None) -> str | None:
+    """Нормализованный email для поиска при входе: без пробелов по краям, в нижнем регистре."""
+    email = (email or "").strip().lower()
+    return email or None
+
+
+EMAIL_TAKEN_MESSAGE = "Такая почта уже существует"
+
+
+class UserManager(DjangoUserManager):
+    """
+    Занятый email — ValidationError до INSERT, а не IntegrityError уникального email_key:
+    createsuperuser показывает её как ошибку команды.
+    """
+
+    def check_email_free(self, email) -> None:
+        key = email_key_for(email)
+        if key and self.filter(email_key=key).exists():
+            raise ValidationError({"email": EMAIL_TAKEN_MESSAGE})
+
+    def create_user(self, username, email=None, password=None, **extra_fields):
+        self.check_email_free(email)
+        return super().create_user(username, email, password, **extra_fields)
+
+    def create_superuser(self, username, email=None, password=None, **extra_fields):
+        self.check_email_free(email)
+        return super().create_superuser(username, email, password, **extra_fields)
+
+
 class User(AbstractUser):
     class Role(models.TextChoices):
         CLIENT = "client", "Клиент"
@@ -53,11 +85,33 @@ class User(AbstractUser):
         null=True
     )
 
+    # sha256 содержимого фото: по нему ищутся превью (crm.thumbnails), заполняется в save()
+    photo_sha256 = models.CharField(max_length=64, blank=True, editable=False)
+
     created_at = models.DateTimeField(
         auto_now_add=True,
         verbose_name="Время создания"
     )
 
+    # Уникальный ключ входа по email (email_key_for), заполняется в save()
+    email_key = models.CharField(
+        max_length=254,
+        unique=True,
+        null=True,
+        blank=True,
+        editable=False,
+    )
+
+    objects = UserManager()
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # email на момент загрузки: ключ входа пересчитывается, только если email сменили
+        if "email" in field_names:
+            instance._loaded_email = values[field_names.index("email")]
+        return instance
+
     def is_manager(self) -> bool:
         return self.role == self.Role.MANAGER
 
@@ -67,11 +121,40 @@ class User(AbstractUser):
     def is_client(self) -> bool:
         return self.role == self.Role.CLIENT
 
+    def _email_changed(self) -> bool:
+        return self._state.adding or getattr(self, "_loaded_email", None) != self.email
+
+    def clean(self):
+        super().clean()
+        # формы (админка, регистрация) получают ошибку поля вместо IntegrityError на email_key;
+        # у дубликатов из миграции 0003 email не меняли — их не проверяем
+        key = email_key_for(self.email)
+        if key and self._email_changed():
+            if type(self)._default_manager.filter(email_key=key).exclude(pk=self.pk).exists():
+                raise ValidationError({"email": EMAIL_TAKEN_MESSAGE})
+
     def save(self, *args, **kwargs):
         # Если не разработчик, то обнуляем developer_type
         if self.role != self.Role.DEVELOPER:
             self.developer_type = self.DeveloperType.NONE
+        if "email" not in self.get_deferred_fields() and self._email_changed():
+            # у дубликатов email из миграции 0003 ключ NULL — обычное сохранение его не трогает
+            self.email_key = email_key_for(self.email)
+        if not self.photo:
+            self.photo_sha256 = ""
+        elif not self.photo._committed:
+            # новое фото ещё не записано в хранилище — хешируем загруженный файл по частям
+            digest = hashlib.sha256()
+            for chunk in self.photo.chunks():
+                digest.update(chunk)
+            self.photo_sha256 = digest.hexdigest()
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None:
+            derived = {"email": "email_key", "photo": "photo_sha256"}
+            kwargs["update_fields"] = {*update_fields, *(derived[f] for f in update_fields if f in derived)}
         super().save(*args, **kwargs)
+        if "email" not in self.get_deferred_fields():
+            self._loaded_email = self.email
 
 
 # Create your models here.
@@ -1,3 +1,131 @@
+from io import StringIO
+
+from django.contrib.auth import SESSION_KEY, authenticate
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.management import CommandError, call_command
 from django.test import TestCase
+from django.urls import reverse
+
+from .authentication import load_user, user_cache_key
+from .models import User
+
+
+class UserCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            "dev", "dev@example.com", "pw", role=User.Role.DEVELOPER, phone="+79990000001"
+        )
+
+    def test_user_is_read_once(self):
+        load_user(self.user.pk)
+        with self.assertNumQueries(0):
+            self.assertEqual(load_user(self.user.pk), self.user)
+
+    def test_save_invalidates_cache(self):
+        load_user(self.user.pk)
+        self.user.first_name = "Новое имя"
+        self.user.save()
+        self.assertIsNone(cache.get(user_cache_key(self.user.pk)))
+        self.assertEqual(load_user(self.user.pk).first_name, "Новое имя")
+
+    def test_delete_invalidates_cache(self):
+        load_user(self.user.pk)
+        pk = self.user.pk
+        self.user.delete()
+        self.assertIsNone(load_user(pk))
+
+    def test_role_change_applies_to_next_request(self):
+        self.client.force_login(self.user)
+        url = reverse("crm:manager_request_list")
+        self.assertEqual(self.client.get(url).status_code, 403)
+        self.user.role = User.Role.MANAGER
+        self.user.save()
+        self.assertEqual(self.client.get(url).status_code, 200)
+        self.assertEqual(int(self.client.session[SESSION_KEY]), self.user.pk)
+
+
+class DuplicateEmailTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("first", "Same@Example.com", "pw", phone="+79990000001")
+
+    def test_create_user_rejects_taken_email(self):
+        with self.assertRaises(ValidationError) as ctx:
+            User.objects.create_user("second", " same@example.COM", "pw", phone="+79990000002")
+        self.assertIn("email", ctx.exception.message_dict)
+
+    def test_createsuperuser_reports_error(self):
+        with self.assertRaises(CommandError):
+            call_command(
+                "createsuperuser",
+                username="admin",
+                email="same@example.com",
+                interactive=False,
+                stdout=StringIO(),
+            )
+        self.assertFalse(User.objects.filter(username="admin").exists())
+
+    def test_clean_checks_only_changed_email(self):
+        other = User.objects.create_user("second", "other@example.com", "pw", phone="+7-999-000-00-02")
+        other.full_clean()
+        other.email = "SAME@example.com"
+        with self.assertRaises(ValidationError):
+            other.full_clean()
+
+    def test_admin_form_shows_field_error(self):
+        admin = User.objects.create_superuser("admin", "admin@example.com", "pw", phone="+79990000009")
+        self.client.force_login(admin)
+        response = self.client.post(
+            reverse("admin:accounts_user_add"),
+            {
+                "username": "second",
+                "email": "same@example.com",
+                "password1": "Sloz-Parol-123",
+                "password2": "Sloz-Parol-123",
+                "usable_password": "true",
+                "role": User.Role.CLIENT,
+                "developer_type": User.DeveloperType.NONE,
+            },
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("email", response.context["adminform"].form.errors)
+        self.assertFalse(User.objects.filter(username="second").exists())
+
+
+class EmailKeyTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user("first", "Same@Example.com", "pw", phone="+79990000001")
+
+    def test_key_is_normalized_email(self):
+        self.assertEqual(self.user.email_key, "same@example.com")
+
+    def test_login_by_email_in_any_case(self):
+        self.assertEqual(authenticate(username=" SAME@example.com ", password="pw"), self.user)
+        self.assertIsNone(authenticate(username="nobody@example.com", password="pw"))
+
+    def test_login_by_email_is_one_indexed_lookup(self):
+        with self.assertNumQueries(1):
+            authenticate(username="same@example.com", password="pw")
+
+    def test_wrong_password_for_known_email(self):
+        self.assertIsNone(authenticate(username="same@example.com", password="wrong"))
+
+    def test_login_by_username(self):
+        self.assertEqual(authenticate(username="first", password="pw"), self.user)
+
+    def test_duplicate_without_key_can_be_saved(self):
+        # так миграция 0003 оставляет более поздний аккаунт с тем же email
+        dup = User.objects.create_user("second", "other@example.com", "pw", phone="+79990000002")
+        User.objects.filter(pk=dup.pk).update(email="same@example.com", email_key=None)
+        dup = User.objects.get(pk=dup.pk)
+        dup.first_name = "Второй"
+        dup.save()
+        self.assertIsNone(User.objects.get(pk=dup.pk).email_key)
 
-# Create your tests here.
+    def test_changed_email_updates_key(self):
+        user = User.objects.get(pk=self.user.pk)
+        user.email = "New@Example.com"
+        user.save(update_fields=["email"])
+        self.assertEqual(User.objects.get(pk=user.pk).email_key, "new@example.com")
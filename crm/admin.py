@@ -1,6 +1,6 @@
 from django.contrib import admin
 
-from .models import ClientRequest, Project, Sprint, Task, Comment, Attachment, Message
+from .models import ClientRequest, Project, Sprint, Task, Comment, Attachment, Message, DeveloperTaskType
 
 
 @admin.register(ClientRequest)
@@ -46,4 +46,10 @@ class MessageAdmin(admin.ModelAdmin):
     list_display = ("request", "author", "created_at")
     search_fields = ("text",)
 
+
+@admin.register(DeveloperTaskType)
+class DeveloperTaskTypeAdmin(admin.ModelAdmin):
+    list_display = ("developer_type", "task_type")
+    list_filter = ("developer_type",)
+
 # Register your models here.
@@ -0,0 +1,217 @@
+"""
+Вложения задач: загрузка с дедупликацией и отдача с Range / условными GET.
+
+Загрузка: Django сам пишет файлы больше FILE_UPLOAD_MAX_MEMORY_SIZE во
+временный файл на диске; store() читает его по чанкам, считая sha256, и
+кладёт содержимое по пути от хеша (attachments/sha256/ab/cd/<хеш>). Если
+такой файл уже есть — повторно не пишется, новое вложение ссылается на него.
+Файл удаляется вместе с последним вложением, которое на него ссылается.
+Загрузка и удаление одного содержимого сериализуются блокировкой строки
+AttachmentBlob этого хеша: иначе удаление могло бы проверить ссылки, загрузка —
+увидеть ещё существующий файл, и новое вложение осталось бы без файла.
+
+Отдача: ETag — хеш содержимого, Last-Modified — время загрузки, поэтому
+повторная загрузка даёт 304 без чтения файла. Range: один диапазон байтов
+(206), несколько или синтаксически неверный (bytes=5-2) — целиком (200,
+RFC 9110 велит такой Range игнорировать); 416 — только если диапазон
+начинается за концом файла. Если задан
+CRM_ATTACHMENT_SENDFILE = (заголовок, префикс), файл отдаёт веб-сервер
+(X-Accel-Redirect у nginx, X-Sendfile у Apache), Range он обрабатывает сам.
+Иначе — потоковый ответ блоками, файл целиком в память воркера не читается.
+"""
+
+import hashlib
+import os
+import re
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.http import FileResponse, HttpRequest, HttpResponse, StreamingHttpResponse
+from django.urls import reverse
+from django.utils.cache import get_conditional_response
+from django.utils.http import content_disposition_header, http_date, quote_etag
+
+from . import thumbnails
+from .models import Attachment, AttachmentBlob, Task
+
+BLOCK_SIZE = 64 * 1024
+RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+class AttachmentError(Exception):
+    """code: too_large — файл больше CRM_ATTACHMENT_MAX_SIZE; empty — пустой файл."""
+
+    def __init__(self, code: str):
+        super().__init__(code)
+        self.code = code
+
+
+def blob_name(digest: str) -> str:
+    return f"attachments/sha256/{digest[:2]}/{digest[2:4]}/{digest}"
+
+
+def store(task: Task, uploaded, user) -> Attachment:
+    """Сохраняет загруженный файл (UploadedFile) как вложение задачи."""
+    max_size = getattr(settings, "CRM_ATTACHMENT_MAX_SIZE", None)
+    if max_size and uploaded.size > max_size:
+        raise AttachmentError("too_large")
+    if not uploaded.size:
+        raise AttachmentError("empty")
+    digest = hashlib.sha256()
+    for chunk in uploaded.chunks(BLOCK_SIZE):
+        digest.update(chunk)
+    sha256 = digest.hexdigest()
+    name = blob_name(sha256)
+    with transaction.atomic():
+        # блокировка до коммита: release того же хеша ждёт, пока вложение не появится в БД
+        AttachmentBlob.objects.select_for_update().get_or_create(sha256=sha256)
+        if not default_storage.exists(name):
+            uploaded.seek(0)
+            saved = default_storage.save(name, uploaded)
+            if saved != name:
+                # тот же файл параллельно сохранил другой запрос — хранилище дало копии другое имя
+                default_storage.delete(saved)
+        return Attachment.objects.create(
+            task=task,
+            file=name,
+            name=os.path.basename(uploaded.name)[:255],
+            content_type=(uploaded.content_type or "")[:100],
+            size=uploaded.size,
+            sha256=sha256,
+            uploaded_by=user,
+        )
+
+
+def release(attachment: Attachment) -> None:
+    """После удаления вложения: удаляет файл, если на него больше никто не ссылается."""
+    name = attachment.file.name
+    sha256 = attachment.sha256
+
+    def cleanup():
+        with transaction.atomic():
+            blob = AttachmentBlob.objects.select_for_update().filter(pk=sha256).first() if sha256 else None
+            if Attachment.objects.filter(sha256=sha256, file=name).exists():
+                return
+            # файл удаляется под блокировкой: store того же хеша после неё запишет его заново
+            default_storage.delete(name)
+            if blob is not None and not Attachment.objects.filter(sha256=sha256).exists():
+                blob.delete()
+
+    if name:
+        transaction.on_commit(cleanup)
+
+
+def serialize(attachment: Attachment) -> dict:
+    return {
+        "id": attachment.pk,
+        "name": attachment.name,
+        "size": attachment.size,
+        "content_type": attachment.content_type,
+        "uploaded_by": attachment.uploaded_by.username,
+        "created_at": attachment.created_at.isoformat(),
+        "url": reverse("crm:attachment_download", args=[attachment.pk]),
+        "thumbnail": (
+            thumbnails.url(attachment.file, attachment.sha256, "card")
+            if attachment.content_type.startswith("image/")
+            else None
+        ),
+    }
+
+
+# ---- Отдача ----
+
+
+def _parse_range(header: str, size: int) -> tuple[int, int] | None:
+    """(начало, конец включительно) для одного диапазона; None — отдать целиком; ValueError — 416."""
+    match = RANGE_RE.match(header.strip())
+    if match is None:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        # bytes=-N — последние N байт
+        length = int(last)
+        if not length:
+            raise ValueError("unsatisfiable")
+        return max(size - length, 0), size - 1
+    start = int(first)
+    if last and int(last) < start:
+        # неверный range-spec: заголовок игнорируется (RFC 9110, 14.2)
+        return None
+    if start >= size:
+        raise ValueError("unsatisfiable")
+    end = min(int(last), size - 1) if last else size - 1
+    return start, end
+
+
+def _read_slice(fh, start: int, end: int):
+    try:
+        fh.seek(start)
+        remaining = end - start + 1
+        while remaining > 0:
+            chunk = fh.read(min(BLOCK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+    finally:
+        fh.close()
+
+
+def _sendfile(attachment: Attachment, config) -> HttpResponse:
+    header, prefix = config
+    response = HttpResponse(content_type=attachment.content_type or "application/octet-stream")
+    response[header] = prefix.rstrip("/") + "/" + attachment.file.name
+    return response
+
+
+def serve(request: HttpRequest, attachment: Attachment) -> HttpResponse:
+    etag = quote_etag(attachment.sha256) if attachment.sha256 else None
+    last_modified = int(attachment.created_at.timestamp())
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is None:
+        sendfile = getattr(settings, "CRM_ATTACHMENT_SENDFILE", None)
+        if sendfile:
+            response = _sendfile(attachment, sendfile)
+        else:
+            response = _stream(request, attachment, etag)
+    if etag:
+        response.headers["ETag"] = etag
+    response.headers["Last-Modified"] = http_date(last_modified)
+    response.headers["Cache-Control"] = "private, no-cache"
+    return response
+
+
+def _stream(request: HttpRequest, attachment: Attachment, etag: str | None) -> HttpResponse:
+    size = attachment.size or attachment.file.size
+    header = request.headers.get("Range", "")
+    if_range = request.headers.get("If-Range")
+    if header and if_range is not None and if_range != etag:
+        # версия у клиента устарела — только целиком
+        header = ""
+    try:
+        byte_range = _parse_range(header, size) if header else None
+    except ValueError:
+        response = HttpResponse(status=416)
+        response.headers["Content-Range"] = f"bytes */{size}"
+        return response
+
+    fh = attachment.file.storage.open(attachment.file.name, "rb")
+    if byte_range is None:
+        response = FileResponse(fh, as_attachment=True, filename=attachment.name or None)
+        if attachment.content_type:
+            response.headers["Content-Type"] = attachment.content_type
+    else:
+        start, end = byte_range
+        response = StreamingHttpResponse(
+            _read_slice(fh, start, end),
+            status=206,
+            content_type=attachment.content_type or "application/octet-stream",
+        )
+        response.headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+        response.headers["Content-Length"] = str(end - start + 1)
+        response.headers["Content-Disposition"] = content_disposition_header(True, attachment.name or "file")
+    response.headers["Accept-Ranges"] = "bytes"
+    return response
@@ -0,0 +1,302 @@
+"""
+Нагрузочный стенд для горячих путей CRM.
+
+Запускать на отдельной базе (не на рабочей!):
+
+    python manage.py migrate
+    python manage.py seed_benchmark --clients 200 --projects 50 --tasks 20000
+    python manage.py bench_hotpaths --iterations 200 --compare benchmarks/results/<прошлый>.json
+
+seed_benchmark генерирует синтетические данные (пользователи bench_*), а
+bench_hotpaths прогоняет сценарии через полный стек Django (middleware,
+view, шаблоны, реальная БД) тестовым клиентом и сохраняет пропускную
+способность, p50/p99 и число SQL-запросов в JSON, помеченный ревизией git.
+"""
+
+import json
+import random
+import subprocess
+import time
+from datetime import timedelta
+from itertools import cycle
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.db.models import Case, Count, When
+from django.test import Client
+from django.urls import reverse
+from django.utils import timezone
+
+from accounts.models import User
+from . import events, ordering
+from .models import ClientRequest, Comment, Project, Task, TaskCheckpoint
+from .reports import percentile
+
+BATCH = 2000
+PASSWORD = "bench-password"
+RESULTS_DIR = Path(settings.BASE_DIR) / "benchmarks" / "results"
+
+
+# ---- Генерация данных ----
+
+
+def seed(
+    *, clients: int, projects: int, tasks: int, checkpoints_per_task: int, comments_per_task: int, seed: int = 42
+) -> dict:
+    rnd = random.Random(seed)
+    password = make_password(PASSWORD)  # хеш один на всех: иначе генерация упрётся в PBKDF2
+    now = timezone.now()
+    developer_types = [t for t in User.DeveloperType.values if t != User.DeveloperType.NONE]
+
+    def users(role, count, **extra):
+        prefix = f"bench_{role}_"
+        existing = User.objects.filter(username__startswith=prefix).count()
+        User.objects.bulk_create(
+            [
+                User(
+                    username=f"{prefix}{existing + i}",
+                    email=f"{prefix}{existing + i}@bench.local",
+                    email_key=f"{prefix}{existing + i}@bench.local",  # bulk_create минует User.save()
+                    password=password,
+                    role=role,
+                    phone="+7-000-000-00-00",
+                    **{k: v(i) if callable(v) else v for k, v in extra.items()},
+                )
+                for i in range(count)
+            ],
+            batch_size=BATCH,
+        )
+        return list(User.objects.filter(username__startswith=prefix).order_by("-id")[:count])
+
+    with transaction.atomic():
+        client_users = users(User.Role.CLIENT, clients)
+        managers = users(User.Role.MANAGER, max(1, projects // 10))
+        developers = users(
+            User.Role.DEVELOPER,
+            max(len(developer_types), projects),
+            developer_type=lambda i: developer_types[i % len(developer_types)],
+        )
+
+        requests = ClientRequest.objects.bulk_create(
+            [
+                ClientRequest(
+                    project_type=rnd.choice(ClientRequest.ProjectType.values),
+                    title=f"Bench request {i}",
+                    description="Синтетическая заявка для нагрузочного теста " * 4,
+                    contact_email=f"client{i}@bench.local",
+                    status=ClientRequest.Status.IN_PROGRESS if i < projects else rnd.choice(ClientRequest.Status.values),
+                    client=client_users[i % len(client_users)],
+                    manager=rnd.choice(managers),
+                )
+                for i in range(max(clients, projects))
+            ],
+            batch_size=BATCH,
+        )
+        project_rows = Project.objects.bulk_create(
+            [Project(client_request=r, name=r.title, description=r.description) for r in requests[:projects]],
+            batch_size=BATCH,
+        )
+
+        statuses = Task.Status.values
+        task_rows = []
+        keys = {}
+        for i in range(tasks):
+            project = project_rows[i % len(project_rows)]
+            status = rnd.choice(statuses)
+            keys[(project.id, status)] = keys.get((project.id, status), 0) + ordering.GAP
+            unassigned = status == Task.Status.TODO and rnd.random() < 0.5
+            task_rows.append(
+                Task(
+                    project=project,
+                    title=f"Bench task {i}",
+                    description="Описание задачи " * 8,
+                    task_type=rnd.choice(Task.TaskType.values),
+                    status=status,
+                    assignee=None if unassigned else rnd.choice(developers),
+                    created_by=rnd.choice(managers),
+                    story_points=rnd.choice([0, 1, 2, 3, 5, 8, 13]),
+                    due_date=(now + timedelta(days=rnd.randint(-30, 60))).date(),
+                    order=keys[(project.id, status)],
+                )
+            )
+        task_rows = Task.objects.bulk_create(task_rows, batch_size=BATCH)
+        events.record_created(task_rows)
+
+        TaskCheckpoint.objects.bulk_create(
+            (
+                TaskCheckpoint(task=t, title=f"Этап {n}", is_done=rnd.random() < 0.4, order=(n + 1) * ordering.GAP)
+                for t in task_rows
+                for n in range(checkpoints_per_task)
+            ),
+            batch_size=BATCH,
+        )
+        authors = cycle(managers + developers[:10])
+        Comment.objects.bulk_create(
+            (
+                Comment(task=t, author=next(authors), text=f"Сообщение {n} по задаче")
+                for t in task_rows
+                for n in range(comments_per_task)
+            ),
+            batch_size=BATCH,
+        )
+
+    return {
+        "clients": len(client_users),
+        "managers": len(managers),
+        "developers": len(developers),
+        "requests": len(requests),
+        "projects": len(project_rows),
+        "tasks": len(task_rows),
+        "checkpoints": len(task_rows) * checkpoints_per_task,
+        "comments": len(task_rows) * comments_per_task,
+    }
+
+
+# ---- Сценарии и замеры ----
+
+
+def _json_post(client: Client, url: str, payload: dict):
+    return client.post(url, json.dumps(payload), content_type="application/json")
+
+
+def build_scenarios(host: str) -> list[tuple[str, Client, callable]]:
+    """Сценарии: (имя, клиент, функция(i) -> response). Берёт самые «тяжёлые» данные из базы."""
+    manager = User.objects.filter(role=User.Role.MANAGER, username__startswith="bench_").first()
+    if manager is None:
+        raise RuntimeError("Нет данных стенда: сначала manage.py seed_benchmark")
+    # фулстек видит самую широкую ленту свободных задач
+    developer = (
+        User.objects.filter(role=User.Role.DEVELOPER, username__startswith="bench_")
+        .order_by(Case(When(developer_type=User.DeveloperType.FULLSTACK, then=0), default=1), "id")
+        .first()
+    )
+    project = Project.objects.annotate(n=Count("tasks")).order_by("-n", "id").first()
+    busy_task = project.tasks.annotate(n=Count("comments")).order_by("-n", "id").first()
+    movable = list(project.tasks.order_by("id").values_list("id", flat=True)[:50])
+
+    manager_client = Client(HTTP_HOST=host)
+    manager_client.force_login(manager)
+    developer_client = Client(HTTP_HOST=host)
+    developer_client.force_login(developer)
+    anonymous = Client(HTTP_HOST=host)
+    statuses = Task.Status.values
+
+    board_url = reverse("crm:kanban_board", args=[project.pk])
+    move_url = reverse("crm:kanban_move")
+    panel_url = reverse("crm:task_panel_api", args=[busy_task.pk])
+    inbox_url = reverse("crm:manager_request_list")
+    open_tasks_url = reverse("crm:dev_open_tasks")
+    public_url = reverse("crm:public_request")
+
+    return [
+        ("kanban_board", manager_client, lambda i: manager_client.get(board_url)),
+        (
+            "kanban_move",
+            manager_client,
+            lambda i: _json_post(
+                manager_client, move_url, {"id": movable[i % len(movable)], "status": statuses[i % len(statuses)]}
+            ),
+        ),
+        ("task_panel_detail", manager_client, lambda i: _json_post(manager_client, panel_url, {"action": "detail"})),
+        ("manager_request_list", manager_client, lambda i: manager_client.get(inbox_url)),
+        ("developer_open_tasks", developer_client, lambda i: developer_client.get(open_tasks_url)),
+        (
+            "public_request_submit",
+            anonymous,
+            lambda i: anonymous.post(
+                public_url,
+                {
+                    "project_type": ClientRequest.ProjectType.WEBSITE,
+                    "title": f"Bench public {i}",
+                    "description": "Нагрузочный тест",
+                    "contact_email": f"public{i}@bench.local",
+                },
+                # у каждой отправки свой адрес, чтобы замерять путь записи, а не ограничитель частоты
+                REMOTE_ADDR=f"10.{i // 65536 % 256}.{i // 256 % 256}.{i % 256}",
+            ),
+        ),
+    ]
+
+
+def run(*, iterations: int, warmup: int, host: str = "localhost", only: list[str] | None = None) -> dict:
+    results = {}
+    for name, _client, call in build_scenarios(host):
+        if only and name not in only:
+            continue
+        for i in range(warmup):
+            call(i)
+        samples, queries = [], []
+        started = time.perf_counter()
+        for i in range(warmup, warmup + iterations):
+            t0 = time.perf_counter()
+            response = call(i)
+            samples.append((time.perf_counter() - t0) * 1000)
+            if response.status_code >= 400:
+                raise RuntimeError(f"{name}: HTTP {response.status_code}")
+            metrics = getattr(response, "perf_metrics", None)
+            if metrics is not None:
+                queries.append(metrics.queries)
+        elapsed = time.perf_counter() - started
+        results[name] = {
+            "iterations": iterations,
+            "throughput_rps": round(iterations / elapsed, 1),
+            "p50_ms": round(percentile(samples, 50), 2),
+            "p99_ms": round(percentile(samples, 99), 2),
+            "mean_ms": round(sum(samples) / len(samples), 2),
+            "max_queries": max(queries) if queries else None,
+        }
+    return results
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=settings.BASE_DIR,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def save(results: dict, dataset: dict) -> Path:
+    RESULTS_DIR.mkdir(parents=True, exist_ok=True)
+    revision = git_revision()
+    stamp = timezone.now().strftime("%Y%m%d-%H%M%S")
+    path = RESULTS_DIR / f"{stamp}-{revision}.json"
+    path.write_text(
+        json.dumps(
+            {"revision": revision, "created_at": timezone.now().isoformat(), "dataset": dataset, "results": results},
+            ensure_ascii=False,
+            indent=2,
+        )
+    )
+    return path
+
+
+def compare(current: dict, baseline: dict, threshold: float) -> list[str]:
+    """Регрессии: p99 вырос больше чем на threshold процентов или выросло число запросов."""
+    regressions = []
+    for name, now in current.items():
+        before = baseline.get(name)
+        if not before:
+            continue
+        if before["p99_ms"] and now["p99_ms"] > before["p99_ms"] * (1 + threshold / 100):
+            regressions.append(f"{name}: p99 {before['p99_ms']} -> {now['p99_ms']} ms")
+        if before.get("max_queries") is not None and (now.get("max_queries") or 0) > before["max_queries"]:
+            regressions.append(f"{name}: SQL {before['max_queries']} -> {now['max_queries']}")
+    return regressions
+
+
+def dataset_summary() -> dict:
+    return {
+        "requests": ClientRequest.objects.count(),
+        "projects": Project.objects.count(),
+        "tasks": Task.objects.count(),
+        "checkpoints": TaskCheckpoint.objects.count(),
+        "comments": Comment.objects.count(),
+    }
@@ -0,0 +1,139 @@
+"""
+Burndown спринтов и скорость команды по журналу TaskEvent.
+
+Каждое событие спринта переводит вклад задачи в «остаток» (points, если
+задача в спринте и не готова, иначе 0); разница вкладов складывается в
+дельту дня, а ряд остатка по дням — накопленная сумма дельт. Один проход
+по событиям спринта (индекс project_id, sprint_id, created_at), без чтения Task.
+
+Результат кешируется на спринт; кеш сбрасывается событием задачи этого
+спринта (crm.events) или правкой самого спринта. Сброс доходит только до
+кеша процесса, обработавшего запись, поэтому срок жизни конечный
+(CACHE_TTL): другой воркер с локальным кешем отстаёт не дольше него.
+Скорость проекта собирается из тех же закешированных итогов спринтов:
+холодные спринты досчитываются одним запросом на всех.
+"""
+
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+
+from django.core.cache import cache
+from django.utils import timezone
+
+from .events import DONE, burndown_cache_key
+from .models import Project, Sprint, TaskEvent
+
+VELOCITY_WINDOW = 3
+GONE = (TaskEvent.Kind.SPRINT_LEFT, TaskEvent.Kind.DELETED)
+CACHE_TTL = 60  # с общим кешем (Redis/Memcached) сброс виден сразу, срок — страховка
+
+
+def _days(sprint: Sprint) -> list:
+    return [sprint.start_date + timedelta(days=i) for i in range((sprint.end_date - sprint.start_date).days + 1)]
+
+
+def _compute(sprint: Sprint, events) -> dict:
+    """events — (task_id, kind, status, points, created_at) по возрастанию времени."""
+    start = sprint.start_date
+    days = _days(sprint)
+    remaining_delta = defaultdict(int)
+    left: dict[int, int] = {}  # task_id -> вклад в остаток
+    done: dict[int, int] = {}  # task_id -> вклад в сделанное
+    committed = 0
+    for task_id, kind, status, points, created_at in events:
+        in_sprint = kind not in GONE
+        new_left = points if in_sprint and status != DONE else 0
+        new_done = points if in_sprint and status == DONE else 0
+        delta = new_left - left.get(task_id, 0)
+        day = timezone.localtime(created_at).date()
+        if day < start:
+            committed += delta
+        remaining_delta[max(day, start)] += delta
+        left[task_id] = new_left
+        done[task_id] = new_done
+
+    remaining, running = [], 0
+    for day in days:
+        running += remaining_delta[day]
+        remaining.append(running)
+    steps = max(len(days) - 1, 1)
+    return {
+        "sprint": sprint.pk,
+        "name": sprint.name,
+        "start": start.isoformat(),
+        "end": sprint.end_date.isoformat(),
+        "days": [d.isoformat() for d in days],
+        "remaining": remaining,
+        "ideal": [round(committed * (1 - i / steps), 1) for i in range(len(days))],
+        "committed": committed,
+        "completed": sum(done.values()),
+    }
+
+
+def _events(sprints: list[Sprint]):
+    """События всех спринтов одним запросом, по спринту в порядке времени."""
+    by_sprint = defaultdict(list)
+    if not sprints:
+        return by_sprint
+    latest_end = max(s.end_date for s in sprints)
+    until = timezone.make_aware(datetime.combine(latest_end + timedelta(days=1), time.min))
+    rows = (
+        TaskEvent.objects.filter(
+            project_id__in={s.project_id for s in sprints},
+            sprint_id__in=[s.pk for s in sprints],
+            created_at__lt=until,
+        )
+        .order_by("created_at", "id")
+        .values_list("sprint_id", "task_id", "kind", "status", "points", "created_at")
+    )
+    for sprint_id, *event in rows:
+        by_sprint[sprint_id].append(event)
+    return by_sprint
+
+
+def burndowns(sprints: list[Sprint]) -> dict[int, dict]:
+    """Burndown нескольких спринтов: из кеша, недостающие — одним запросом к журналу."""
+    sprints = [s for s in sprints if s.start_date and s.end_date and s.start_date <= s.end_date]
+    keys = {burndown_cache_key(s.pk): s for s in sprints}
+    cached = cache.get_many(keys)
+    result = {keys[k].pk: v for k, v in cached.items()}
+    missing = [s for k, s in keys.items() if k not in cached]
+    if missing:
+        events = _events(missing)
+        fresh = {s.pk: _compute(s, events[s.pk]) for s in missing}
+        cache.set_many({burndown_cache_key(pk): data for pk, data in fresh.items()}, timeout=CACHE_TTL)
+        result.update(fresh)
+    return result
+
+
+def sprint_burndown(sprint: Sprint) -> dict | None:
+    """Ряд остатка по дням спринта; None — у спринта не заданы даты."""
+    return burndowns([sprint]).get(sprint.pk)
+
+
+def project_velocity(project: Project, window: int = VELOCITY_WINDOW) -> list[dict]:
+    """Сделанные SP по завершённым и текущему спринтам и скользящее среднее за window спринтов."""
+    sprints = list(
+        Sprint.objects.filter(project=project, start_date__isnull=False, end_date__isnull=False).order_by(
+            "end_date", "id"
+        )
+    )
+    data = burndowns(sprints)
+    rows, history = [], []
+    for sprint in sprints:
+        summary = data.get(sprint.pk)
+        if summary is None:
+            continue
+        history.append(summary["completed"])
+        recent = history[-window:]
+        rows.append(
+            {
+                "sprint": sprint.pk,
+                "name": sprint.name,
+                "end": summary["end"],
+                "committed": summary["committed"],
+                "completed": summary["completed"],
+                "rolling": round(sum(recent) / len(recent), 1),
+            }
+        )
+    return rows
@@ -0,0 +1,35 @@
+"""
+Условные GET-ответы для JSON-API (ETag / Last-Modified -> 304).
+
+Штамп (версия, время изменения, количество строк) считается дешёвым запросом
+до сборки ответа; если клиент прислал совпадающий If-None-Match или
+If-Modified-Since, тело не собирается вовсе.
+"""
+
+import hashlib
+from datetime import datetime
+from typing import Callable
+
+from django.http import HttpRequest, HttpResponse, JsonResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+
+
+def make_etag(*parts) -> str:
+    raw = ":".join(str(p) for p in parts)
+    return quote_etag(hashlib.blake2b(raw.encode(), digest_size=12).hexdigest())
+
+
+def conditional_json(
+    request: HttpRequest, etag: str, last_modified: datetime | None, build: Callable[[], dict]
+) -> HttpResponse:
+    timestamp = int(last_modified.timestamp()) if last_modified else None
+    response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+    if response is None:
+        response = JsonResponse({"ok": True, **build()})
+    response.headers["ETag"] = etag
+    if timestamp is not None:
+        response.headers["Last-Modified"] = http_date(timestamp)
+    # Браузер хранит ответ, но каждый раз перепроверяет его условным запросом
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
@@ -0,0 +1,96 @@
+"""
+Настройка соединений с БД и маршрутизация чтений на реплику.
+
+configure_sqlite — обработчик connection_created: каждому новому соединению
+SQLite выставляются PRAGMA из settings.CRM_SQLITE_PRAGMAS. WAL даёт читателям
+не ждать писателя (и наоборот), busy_timeout — ждать блокировку, а не сразу
+падать с «database is locked».
+
+ReadReplicaRouter — чтения моделей из CRM_REPLICA_APPS уходят на алиас
+CRM_REPLICA_DB, если view помечена ``read_replica = True`` и запрос
+безопасный (GET/HEAD). Пометку переносит ReplicaMiddleware в contextvar на
+время запроса. Внутри транзакции на default чтения остаются на default —
+иначе транзакция не увидит собственных записей. Для SQLite «реплика» — тот
+же файл, открытый только на чтение; для PostgreSQL — настоящая реплика.
+"""
+
+import sqlite3
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+# Порядок важен: journal_mode до остальных, он переключает режим файла
+DEFAULT_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",  # в WAL сохранность при сбое процесса та же, fsync только на checkpoint
+    "busy_timeout": 5000,  # мс
+    "mmap_size": 256 * 1024 * 1024,
+    "temp_store": "MEMORY",
+}
+
+use_replica: ContextVar[bool] = ContextVar("crm_use_replica", default=False)
+
+
+def configure_sqlite(sender, connection, **kwargs) -> None:
+    if connection.vendor != "sqlite":
+        return
+    pragmas = getattr(settings, "CRM_SQLITE_PRAGMAS", DEFAULT_PRAGMAS)
+    # напрямую через sqlite3: соединение может открыться посреди запроса, и PRAGMA
+    # не должны попадать в execute_wrapper'ы и query_budget этого запроса
+    raw = connection.connection
+    for name, value in pragmas.items():
+        try:
+            raw.execute(f"PRAGMA {name} = {value}").close()
+        except sqlite3.OperationalError:
+            # соединение только на чтение не может сменить journal_mode — файл уже в WAL
+            continue
+
+
+def replica_alias() -> str | None:
+    alias = getattr(settings, "CRM_REPLICA_DB", None)
+    return alias if alias and alias in settings.DATABASES else None
+
+
+class ReadReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if not use_replica.get():
+            return None
+        alias = replica_alias()
+        if alias is None or model._meta.app_label not in getattr(settings, "CRM_REPLICA_APPS", ("crm",)):
+            return None
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        return alias
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # реплика — копия default, связи между их объектами допустимы
+        return True
+
+    def allow_migrate(self, db, app_label, **hints):
+        return db != replica_alias()
+
+
+class ReplicaMiddleware:
+    """Включает чтение с реплики для безопасных запросов к view с ``read_replica = True``."""
+
+    SAFE_METHODS = ("GET", "HEAD")
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        try:
+            return self.get_response(request)
+        finally:
+            # не reset(token): под ASGI view и middleware могут выполняться в разных контекстах
+            use_replica.set(False)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        view = getattr(view_func, "view_class", view_func)
+        if request.method in self.SAFE_METHODS and getattr(view, "read_replica", False):
+            use_replica.set(True)
+        return None
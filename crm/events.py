@@ -0,0 +1,103 @@
+"""
+Журнал изменений задач (TaskEvent).
+
+События пишутся в той же транзакции, что и изменение задачи: из сигналов
+save()/delete() по снимку TrackedStateMixin и явно из массовых путей
+(apply_moves). Все строки одного изменения — один bulk_create.
+Запись события в спринт сбрасывает кеш burndown этого спринта (после коммита).
+
+Перенумерация соседей (crm.ordering.respace) в журнал не пишется: ORDER —
+только для задачи, которую переставил пользователь.
+"""
+
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Task, TaskEvent
+
+STATUS_CODES = {Task.Status.TODO: 1, Task.Status.IN_PROGRESS: 2, Task.Status.REVIEW: 3, Task.Status.DONE: 4}
+STATUS_BY_CODE = {code: status for status, code in STATUS_CODES.items()}
+DONE = STATUS_CODES[Task.Status.DONE]
+
+Kind = TaskEvent.Kind
+
+
+def burndown_cache_key(sprint_id: int) -> str:
+    return f"crm:burndown:{sprint_id}"
+
+
+def invalidate_sprints(sprint_ids) -> None:
+    keys = [burndown_cache_key(pk) for pk in sprint_ids if pk is not None]
+    if keys:
+        transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+def _event(task_id: int, state: dict, kind: int, old=None, new=None, sprint_id=None, at=None) -> TaskEvent:
+    return TaskEvent(
+        task_id=task_id,
+        project_id=state["project_id"],
+        sprint_id=state.get("sprint_id") if sprint_id is None else sprint_id,
+        kind=kind,
+        status=STATUS_CODES.get(state.get("status"), 1),
+        points=state.get("story_points") or 0,
+        old_value=old,
+        new_value=new,
+        created_at=at,
+    )
+
+
+def diff(task_id: int, old: dict | None, new: dict | None, at=None) -> list[TaskEvent]:
+    """
+    События перехода old -> new (снимки TrackedStateMixin; None — создание/удаление).
+    Поле, которого нет в одном из снимков (загрузка через only()), не сравнивается.
+    """
+    at = at or timezone.now()
+    if old is None and new is None:
+        return []
+    if old is None:
+        return [_event(task_id, new, Kind.CREATED, at=at)]
+    if new is None:
+        return [_event(task_id, old, Kind.DELETED, at=at)] if "project_id" in old else []
+    state = {**old, **new}
+    if "project_id" not in state:
+        return []
+
+    def changed(field):
+        return field in old and field in new and old[field] != new[field]
+
+    events = []
+    if changed("sprint_id"):
+        before, after = old["sprint_id"], new["sprint_id"]
+        if before is not None:
+            events.append(_event(task_id, state, Kind.SPRINT_LEFT, before, after, sprint_id=before, at=at))
+        events.append(_event(task_id, state, Kind.SPRINT, before, after, at=at))
+    if changed("status"):
+        before, after = STATUS_CODES[old["status"]], STATUS_CODES[new["status"]]
+        events.append(_event(task_id, state, Kind.STATUS, before, after, at=at))
+    if changed("story_points"):
+        events.append(_event(task_id, state, Kind.POINTS, old["story_points"], new["story_points"], at=at))
+    if changed("assignee_id"):
+        events.append(_event(task_id, state, Kind.ASSIGNEE, old["assignee_id"], new["assignee_id"], at=at))
+    if changed("order") and not changed("status"):
+        # перенос между колонками уже виден по STATUS, ORDER — только перестановка внутри колонки
+        events.append(_event(task_id, state, Kind.ORDER, old["order"], new["order"], at=at))
+    return events
+
+
+def record(changes: list[tuple[int, dict | None, dict | None]]) -> list[TaskEvent]:
+    """changes — (task_id, снимок до, снимок после). Пишет все события одним запросом."""
+    at = timezone.now()
+    events = [event for task_id, old, new in changes for event in diff(task_id, old, new, at)]
+    if events:
+        TaskEvent.objects.bulk_create(events)
+        invalidate_sprints({e.sprint_id for e in events})
+    return events
+
+
+def record_created(tasks) -> None:
+    """Стартовые события для задач, созданных bulk_create в обход сигналов."""
+    TaskEvent.objects.bulk_create(
+        [_event(t.pk, t.current_state(), Kind.CREATED, at=t.created_at) for t in tasks],
+        batch_size=2000,
+    )
@@ -0,0 +1,17 @@
+from django import forms
+
+from .models import ClientRequest
+
+
+class PublicRequestForm(forms.ModelForm):
+    """Заявка с публичной формы: только поля, которые заполняет посетитель"""
+
+    class Meta:
+        model = ClientRequest
+        fields = ["project_type", "title", "description", "contact_email", "contact_telegram"]
+
+    def clean_description(self):
+        description = self.cleaned_data["description"]
+        if len(description) > 10000:
+            raise forms.ValidationError("Описание слишком длинное (не больше 10 000 символов)")
+        return description
@@ -0,0 +1,64 @@
+"""
+Кеш фрагментов шаблонов: карточки канбан-доски и строки таблицы задач проекта.
+
+Фрагмент задачи кешируется тегом {% cache %} в алиасе CACHES["fragments"]
+по ключу (id задачи, updated_at, версия проекта). Все пути записи задач
+(save, bulk_update доски, захват из пула, перестановка) обновляют
+updated_at, поэтому изменённая карточка сама получает новый ключ, а
+неизменённые берутся из кеша.
+
+Версия проекта сбрасывается, когда меняется то, что показано во фрагменте,
+но не отражено в updated_at задачи, — имя исполнителя или постановщика.
+Хранится в том же кеше: если версию вытеснили, новая берётся от текущего
+времени и старые фрагменты просто перестают читаться.
+
+Отключение для отладки — CRM_FRAGMENT_CACHE=0 (алиас становится DummyCache).
+"""
+
+import time
+
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models import Q
+
+from .models import Task
+
+ALIAS = "fragments"
+
+
+def _version_key(project_id: int) -> str:
+    return f"crm:fragments:project:{project_id}"
+
+
+def project_version(project_id: int) -> int:
+    cache = caches[ALIAS]
+    key = _version_key(project_id)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, time.time_ns(), None)
+        version = cache.get(key) or time.time_ns()
+    return version
+
+
+def context(project_id: int) -> dict:
+    """Переменные для {% cache %} в шаблонах доски и таблицы задач."""
+    return {
+        "fragment_version": project_version(project_id),
+        "fragment_ttl": caches[ALIAS].default_timeout,
+    }
+
+
+def bump(project_ids) -> None:
+    """Сбрасывает фрагменты проектов после коммита."""
+    keys = [_version_key(pk) for pk in set(project_ids)]
+    if keys:
+        transaction.on_commit(lambda: caches[ALIAS].delete_many(keys))
+
+
+def bump_for_user(user_id: int) -> None:
+    """Проекты, где пользователь исполнитель или постановщик, — его имя есть в их фрагментах."""
+    bump(
+        Task.objects.filter(Q(assignee_id=user_id) | Q(created_by_id=user_id))
+        .values_list("project_id", flat=True)
+        .distinct()
+    )
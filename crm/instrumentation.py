@@ -0,0 +1,130 @@
+"""
+Замер SQL-запросов, времени БД и рендера шаблонов для каждого запроса.
+
+QueryInstrumentationMiddleware оборачивает все подключения к БД
+(connection.execute_wrapper) на время обработки запроса и пишет итог:
+- в лог ``crm.perf`` одной JSON-строкой (url_name, queries, db_ms, render_ms, total_ms);
+- в заголовок ``Server-Timing`` (если settings.CRM_PERF_SERVER_TIMING), его
+  показывает вкладка Network в браузере.
+
+View может объявить бюджет атрибутом класса ``query_budget = N`` или
+словарём по методу (``{"GET": 6, "POST": 13}``), если запись заметно дороже
+чтения; метод без записи в словаре не проверяется. Управление транзакцией
+(BEGIN, SAVEPOINT, RELEASE) в счёт не идёт: внутри TestCase каждый atomic()
+— это пара SAVEPOINT/RELEASE, а в проде — один BEGIN, и бюджет разошёлся бы.
+Превышение
+пишется в лог предупреждением, а при settings.CRM_QUERY_BUDGET_STRICT
+(включается в тестах, см. crm.testing) поднимает QueryBudgetExceeded.
+"""
+
+import json
+import logging
+from contextlib import ExitStack
+from time import perf_counter
+
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger("crm.perf")
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+TRANSACTION_PREFIXES = ("BEGIN", "SAVEPOINT", "RELEASE SAVEPOINT", "ROLLBACK TO SAVEPOINT")
+
+
+class RequestMetrics:
+    """Счётчики одного запроса; экземпляр служит execute_wrapper'ом для подключений."""
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.render_time = 0.0
+        self.total_time = 0.0
+        self.url_name = None
+        self.budget = None
+
+    def __call__(self, execute, sql, params, many, context):
+        started = perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            if not sql.lstrip().upper().startswith(TRANSACTION_PREFIXES):
+                self.queries += 1
+            self.db_time += perf_counter() - started
+
+    def as_dict(self) -> dict:
+        return {
+            "url_name": self.url_name,
+            "queries": self.queries,
+            "budget": self.budget,
+            "db_ms": round(self.db_time * 1000, 2),
+            "render_ms": round(self.render_time * 1000, 2),
+            "total_ms": round(self.total_time * 1000, 2),
+        }
+
+    def server_timing(self) -> str:
+        return (
+            f'db;dur={self.db_time * 1000:.1f};desc="{self.queries} queries", '
+            f"render;dur={self.render_time * 1000:.1f}, "
+            f"total;dur={self.total_time * 1000:.1f}"
+        )
+
+
+def view_budget(request) -> int | None:
+    match = getattr(request, "resolver_match", None)
+    if match is None:
+        return None
+    view = getattr(match.func, "view_class", match.func)
+    budget = getattr(view, "query_budget", None)
+    if isinstance(budget, dict):
+        return budget.get(request.method)
+    return budget
+
+
+class QueryInstrumentationMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        metrics = RequestMetrics()
+        request.perf_metrics = metrics
+        started = perf_counter()
+        with ExitStack() as stack:
+            for alias in connections:
+                stack.enter_context(connections[alias].execute_wrapper(metrics))
+            response = self.get_response(request)
+        metrics.total_time = perf_counter() - started
+
+        match = getattr(request, "resolver_match", None)
+        if match is not None:
+            metrics.url_name = match.view_name
+        metrics.budget = view_budget(request)
+        response.perf_metrics = metrics
+
+        data = metrics.as_dict()
+        if getattr(settings, "CRM_PERF_SERVER_TIMING", False):
+            response["Server-Timing"] = metrics.server_timing()
+        if metrics.budget is not None and metrics.queries > metrics.budget:
+            logger.warning("query budget exceeded %s", json.dumps(data), extra={"perf": data})
+            if getattr(settings, "CRM_QUERY_BUDGET_STRICT", False):
+                raise QueryBudgetExceeded(
+                    f"{metrics.url_name}: {metrics.queries} SQL queries, budget {metrics.budget}"
+                )
+        else:
+            logger.info("%s", json.dumps(data), extra={"perf": data})
+        return response
+
+    def process_template_response(self, request, response):
+        # Вызывается прямо перед render(): время рендера (включая ленивые запросы из шаблона) — до post-render колбэка
+        metrics = getattr(request, "perf_metrics", None)
+        if metrics is not None:
+            started = perf_counter()
+
+            def rendered(response):
+                metrics.render_time += perf_counter() - started
+
+            response.add_post_render_callback(rendered)
+        return response
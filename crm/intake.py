@@ -0,0 +1,101 @@
+"""
+Приём заявок с публичной формы (PublicRequestView).
+
+Запрос посетителя не пишет в БД: проверенная форма дописывается строкой JSON
+в файл очереди (settings.CRM_INTAKE_SPOOL), а команда ``drain_intake``
+забирает накопленное и вставляет пачкой через bulk_create. Всплеск спама
+упирается в ограничитель частоты и дозапись в файл, а не в writer SQLite.
+
+Ограничитель — ведро токенов на IP в кеше Django:
+CRM_INTAKE_THROTTLE = (ёмкость, секунд) — ведро на «ёмкость» заявок,
+которое целиком наполняется за указанное время (пополнение непрерывное,
+считается при чтении из сохранённых токенов и времени). Чтение и запись
+состояния идут под короткой блокировкой в том же кеше (cache.add), поэтому
+параллельные запросы с одного IP не тратят один и тот же токен.
+
+Очередь — crm.spool: пачка удаляется после коммита; если воркер упал между
+коммитом и удалением, пачка будет вставлена повторно (доставка «хотя бы
+один раз»). Без CRM_INTAKE_SPOOL заявка пишется сразу.
+"""
+
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from . import search, spool
+from .models import ClientRequest
+
+FIELDS = ("project_type", "title", "description", "contact_email", "contact_telegram")
+
+
+def spool_dir() -> Path | None:
+    path = getattr(settings, "CRM_INTAKE_SPOOL", None)
+    return Path(path) if path else None
+
+
+# ---- Ограничитель частоты ----
+
+
+LOCK_TIMEOUT = 1  # с; блокировка упавшего процесса истекает сама
+LOCK_ATTEMPTS = 20
+LOCK_WAIT = 0.005
+
+
+def allow(ip: str) -> bool:
+    """Берёт токен из ведра IP; False — ведро пусто (или его не удалось заблокировать)."""
+    capacity, period = getattr(settings, "CRM_INTAKE_THROTTLE", (5, 60))
+    key = f"crm:intake:ip:{ip}"
+    lock = f"{key}:lock"
+    for _ in range(LOCK_ATTEMPTS):
+        if cache.add(lock, 1, LOCK_TIMEOUT):
+            break
+        time.sleep(LOCK_WAIT)
+    else:
+        # столько параллельных заявок с одного IP — уже флуд
+        return False
+    try:
+        now = time.time()
+        tokens, updated = cache.get(key, (capacity, now))
+        tokens = min(capacity, tokens + (now - updated) * capacity / period)
+        allowed = tokens >= 1
+        if allowed:
+            tokens -= 1
+        # полное ведро хранить незачем: к этому времени оно наполнится само
+        cache.set(key, (tokens, now), int((capacity - tokens) * period / capacity) + 1)
+        return allowed
+    finally:
+        cache.delete(lock)
+
+
+# ---- Очередь ----
+
+
+def submit(data: dict) -> None:
+    """Ставит проверенную заявку в очередь (или пишет сразу, если очередь выключена)."""
+    directory = spool_dir()
+    if directory is None:
+        ClientRequest.objects.create(**data)
+        return
+    spool.append(directory, {k: data.get(k, "") for k in FIELDS})
+
+
+def drain(batch_size: int = 500) -> int:
+    """Вставляет все заявки из очереди; возвращает их число."""
+    directory = spool_dir()
+    if directory is None:
+        return 0
+
+    def insert(rows: list[dict]) -> int:
+        with transaction.atomic():
+            created = ClientRequest.objects.bulk_create(
+                [ClientRequest(**{k: row.get(k, "") for k in FIELDS}) for row in rows], batch_size=batch_size
+            )
+            # bulk_create минует сигналы — индекс поиска обновляем сами
+            for obj in created:
+                search.index_instance(obj)
+        return len(created)
+
+    return spool.drain(directory, insert)
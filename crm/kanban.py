@@ -0,0 +1,261 @@
+"""
+Загрузка данных канбан-доски.
+
+Все карточки проекта выбираются одним запросом (исполнитель подтягивается
+через JOIN) и раскладываются по колонкам уже в Python, поэтому число запросов
+не зависит от количества задач на доске.
+"""
+
+from datetime import datetime, timedelta, timezone as dt_timezone
+from functools import reduce
+from operator import or_
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from . import events, ordering, realtime, stats
+from .models import Project, Task, TaskTombstone
+
+
+# Поля, которые реально нужны карточке; остальное (описание и т.п.) не тянем
+CARD_FIELDS = (
+    "id",
+    "project_id",
+    "title",
+    "task_type",
+    "status",
+    "story_points",
+    "order",
+    "due_date",
+    "created_at",
+    "updated_at",
+    "version",
+    "assignee__id",
+    "assignee__username",
+)
+
+
+def board_queryset(project: Project):
+    return (
+        Task.objects.filter(project=project)
+        .select_related("assignee")
+        .only(*CARD_FIELDS)
+        .order_by("order", "created_at")
+    )
+
+
+def load_board(project: Project) -> dict[str, list[Task]]:
+    """Карточки проекта, разложенные по колонкам: {status: [task, ...]}."""
+    columns: dict[str, list[Task]] = {status: [] for status in Task.Status.values}
+    for task in board_queryset(project):
+        columns.setdefault(task.status, []).append(task)
+    return columns
+
+
+def serialize_card(task: Task) -> dict:
+    return {
+        "id": task.id,
+        "title": task.title,
+        "status": task.status,
+        "task_type": task.task_type,
+        "task_type_label": task.get_task_type_display(),
+        "story_points": task.story_points,
+        "order": task.order,
+        "version": task.version,
+        "assignee": task.assignee.username if task.assignee_id else None,
+        "due_date": task.due_date.isoformat() if task.due_date else None,
+    }
+
+
+def board_payload(project: Project) -> dict:
+    columns = load_board(project)
+    return {
+        "project": {"id": project.id, "name": project.name},
+        "columns": [
+            {
+                "status": status,
+                "label": label,
+                "cards": [serialize_card(t) for t in columns.get(status, [])],
+            }
+            for status, label in Task.Status.choices
+        ],
+    }
+
+
+# ---- Инкрементальная синхронизация ----
+#
+# Курсор — пара (updated_at, id) последней отданной карточки, закодированная
+# строкой "<микросекунды от эпохи>-<id>". Порядок (updated_at, id) строгий,
+# поэтому страница изменений продолжается ровно с того места, где закончилась.
+#
+# updated_at ставится в Python до записи, а коммитятся транзакции в другом
+# порядке: карточка с меньшим updated_at может стать видимой уже после того,
+# как курсор ушёл дальше. Поэтому итоговый курсор (последняя страница) не
+# заходит в последние CHANGES_OVERLAP: это окно перечитывается при каждом
+# опросе, а повторы клиент отбрасывает по version карточки.
+
+CHANGES_PAGE_SIZE = 500
+CHANGES_OVERLAP = timedelta(seconds=5)
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+
+
+def encode_cursor(moment: datetime, task_id: int = 0) -> str:
+    delta = moment - _EPOCH
+    micros = (delta.days * 86400 + delta.seconds) * 1_000_000 + delta.microseconds
+    return f"{micros}-{task_id}"
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, int]:
+    """ValueError — курсор не разбирается или время вне диапазона datetime."""
+    micros, _, task_id = cursor.partition("-")
+    try:
+        moment = _EPOCH + timedelta(microseconds=int(micros))
+    except OverflowError:
+        raise ValueError(f"cursor out of range: {cursor}") from None
+    return moment, int(task_id or 0)
+
+
+def _settled(key: tuple[datetime, int]) -> tuple[datetime, int]:
+    """Ключ итогового курсора: не новее начала окна перекрытия."""
+    horizon = timezone.now() - CHANGES_OVERLAP
+    return key if key[0] <= horizon else (horizon, 0)
+
+
+def board_cursor(columns: dict[str, list[Task]]) -> str | None:
+    """Курсор, соответствующий уже загруженной доске (без дополнительного запроса)."""
+    latest = max(
+        ((t.updated_at, t.id) for cards in columns.values() for t in cards),
+        default=None,
+    )
+    return encode_cursor(*_settled(latest)) if latest else None
+
+
+def tombstone_horizon() -> datetime:
+    """Следы удалений старше этого момента удаляет ``manage.py prune_tombstones``."""
+    return timezone.now() - timedelta(days=getattr(settings, "CRM_TOMBSTONE_DAYS", 7))
+
+
+def board_changes(project: Project, cursor: str | None, limit: int = CHANGES_PAGE_SIZE) -> dict:
+    """
+    Карточки, созданные/изменённые после курсора, и id удалённых задач.
+    Без курсора отдаёт всю доску постранично. Курсор старше хранения следов
+    удалений даёт {"reset": True}: доску надо загрузить заново.
+    """
+    qs = board_queryset(project).order_by("updated_at", "id")
+    tombstones = TaskTombstone.objects.filter(project_id=project.id)
+    since = None
+    if cursor:
+        since, since_id = decode_cursor(cursor)
+        if since < tombstone_horizon():
+            return {"reset": True, "cards": [], "deleted": [], "has_more": False, "cursor": None}
+        qs = qs.filter(Q(updated_at__gt=since) | Q(updated_at=since, id__gt=since_id))
+        tombstones = tombstones.filter(deleted_at__gt=since)
+
+    cards = list(qs[: limit + 1])
+    has_more = len(cards) > limit
+    cards = cards[:limit]
+
+    next_key = (since, since_id) if since else None
+    if cards:
+        next_key = (cards[-1].updated_at, cards[-1].id)
+    deleted = []
+    if since and not has_more:
+        # Удаления отдаём только с последней страницей, чтобы курсор не перепрыгнул через изменения
+        for task_id, deleted_at in tombstones.values_list("task_id", "deleted_at"):
+            deleted.append(task_id)
+            if deleted_at > next_key[0]:
+                next_key = (deleted_at, 0)
+    if next_key and not has_more:
+        next_key = _settled(next_key)
+
+    return {
+        "cards": [serialize_card(t) for t in cards],
+        "deleted": deleted,
+        "has_more": has_more,
+        "cursor": encode_cursor(*next_key) if next_key else cursor,
+    }
+
+
+# ---- Пакетное перемещение карточек ----
+
+def apply_moves(moves: list[dict]) -> dict:
+    """
+    Применяет список перемещений [{"id", "status", "position"?}] одной транзакцией.
+    position — индекс в целевой колонке после перемещения; без него карточка уходит в конец.
+    Порядок во всех затронутых колонках выбирается одним запросом; перемещённая карточка
+    получает ключ между соседями (см. crm.ordering), так что пишутся только перемещённые
+    строки — кроме колонок, где пришлось перенумеровать всё. Запись — один bulk_update.
+    Возвращает {"columns": новый порядок затронутых колонок, "orders": {id: ключ}
+    всех записанных карточек}. Неизвестные id — Task.DoesNotExist.
+    """
+    ids = {m["id"] for m in moves}
+    with transaction.atomic():
+        moved = {
+            t.id: t
+            for t in Task.objects.select_for_update()
+            .filter(pk__in=ids)
+            .only("id", "project_id", "sprint_id", "status", "order", "task_type", "story_points", "due_date")
+        }
+        if len(moved) != len(ids):
+            raise Task.DoesNotExist(sorted(ids - moved.keys()))
+
+        keys = {(t.project_id, t.status) for t in moved.values()}
+        keys |= {(moved[m["id"]].project_id, m["status"]) for m in moves}
+        # колонка — список [id, order] в порядке отображения
+        columns: dict[tuple[int, str], list[list[int]]] = {key: [] for key in keys}
+        current: dict[int, tuple[str, int]] = {}
+        rows = (
+            Task.objects.filter(reduce(or_, (Q(project_id=p, status=s) for p, s in keys)))
+            .order_by("order", "created_at", "id")
+            .values_list("id", "project_id", "status", "order")
+        )
+        for task_id, project_id, status, order in rows:
+            columns[(project_id, status)].append([task_id, order])
+            current[task_id] = (status, order)
+
+        for move in moves:
+            task = moved[move["id"]]
+            source = columns[(task.project_id, task.status)]
+            source[:] = [item for item in source if item[0] != task.id]
+            target = columns[(task.project_id, move["status"])]
+            position = move.get("position")
+            if position is None or position >= len(target):
+                position = len(target)
+            position = max(0, position)
+            before = target[position - 1][1] if position > 0 else None
+            after = target[position][1] if position < len(target) else None
+            target.insert(position, [task.id, ordering.key_between(before, after)])
+            if target[position][1] is None:
+                for item, order in zip(target, ordering.spaced(len(target))):
+                    item[1] = order
+            task.status = move["status"]
+
+        extra = ordering.touch_fields(Task)
+        changed = [
+            Task(id=task_id, status=status, order=order, **extra)
+            for (project_id, status), column in columns.items()
+            for task_id, order in column
+            if current[task_id] != (status, order)
+        ]
+        Task.objects.bulk_update(changed, ["status", "order", *extra])
+        # bulk_update не шлёт post_save — статистику, журнал и открытые доски обновляем сами
+        orders = {task_id: order for column in columns.values() for task_id, order in column}
+        changes = [
+            (t.pk, t.saved_state(), {**t.saved_state(), "status": t.status, "order": orders[t.pk]})
+            for t in moved.values()
+        ]
+        stats.tasks_changed([(old, new) for _, old, new in changes])
+        events.record(changes)
+        for project_id in {project_id for project_id, _ in columns}:
+            realtime.publish(realtime.project_channel(project_id), "task", {"ids": sorted(ids)})
+
+    return {
+        "columns": [
+            {"project": project_id, "status": status, "ids": [task_id for task_id, _ in column]}
+            for (project_id, status), column in sorted(columns.items())
+        ],
+        "orders": {task.id: task.order for task in changed},
+    }
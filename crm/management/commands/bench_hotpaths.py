@@ -0,0 +1,56 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from crm import benchmark
+
+
+class Command(BaseCommand):
+    help = (
+        "Замеряет горячие пути (доска, перенос карточки, панель задачи, входящие заявки, "
+        "лента разработчика, публичная заявка): пропускная способность, p50/p99, SQL. "
+        "Результат сохраняется в benchmarks/results/<время>-<ревизия>.json."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--iterations", type=int, default=200)
+        parser.add_argument("--warmup", type=int, default=20)
+        parser.add_argument("--host", default="localhost", help="Host-заголовок (должен проходить ALLOWED_HOSTS)")
+        parser.add_argument("--only", nargs="*", help="Запустить только указанные сценарии")
+        parser.add_argument("--compare", help="JSON прошлого прогона: сравнить и вернуть ошибку при регрессии")
+        parser.add_argument("--threshold", type=float, default=20.0, help="Допустимый рост p99, %%")
+        parser.add_argument("--no-save", action="store_true")
+
+    def handle(self, *args, **options):
+        if options["iterations"] < 1:
+            raise CommandError("--iterations должно быть больше нуля")
+        try:
+            results = benchmark.run(
+                iterations=options["iterations"],
+                warmup=options["warmup"],
+                host=options["host"],
+                only=options["only"],
+            )
+        except RuntimeError as exc:
+            raise CommandError(str(exc))
+
+        self.stdout.write(f"{'сценарий':<24}{'rps':>9}{'p50, ms':>10}{'p99, ms':>10}{'SQL':>6}")
+        for name, row in results.items():
+            self.stdout.write(
+                f"{name:<24}{row['throughput_rps']:>9}{row['p50_ms']:>10}{row['p99_ms']:>10}"
+                f"{row['max_queries'] if row['max_queries'] is not None else '-':>6}"
+            )
+
+        if not options["no_save"]:
+            path = benchmark.save(results, benchmark.dataset_summary())
+            self.stdout.write(f"Сохранено: {path}")
+
+        if options["compare"]:
+            with open(options["compare"], encoding="utf-8") as fh:
+                baseline = json.load(fh)
+            regressions = benchmark.compare(results, baseline["results"], options["threshold"])
+            if regressions:
+                raise CommandError(
+                    f"Регрессия относительно {baseline.get('revision', '?')}:\n" + "\n".join(regressions)
+                )
+            self.stdout.write(self.style.SUCCESS(f"Без регрессий относительно {baseline.get('revision', '?')}"))
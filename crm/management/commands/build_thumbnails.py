@@ -0,0 +1,45 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from accounts.models import User
+from crm import thumbnails
+from crm.models import Attachment
+
+
+class Command(BaseCommand):
+    help = (
+        "Строит превью картинок из очереди (CRM_THUMBNAIL_SPOOL). С --loop работает постоянно, "
+        "--all — досчитывает превью для всех уже загруженных фото и вложений-изображений."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--loop", action="store_true", help="не завершаться после разбора очереди")
+        parser.add_argument("--interval", type=float, default=1.0, help="пауза между проверками, с")
+        parser.add_argument("--all", action="store_true", help="пройти по всем существующим картинкам")
+
+    def handle(self, *args, **options):
+        if options["all"]:
+            self.stdout.write(f"Превью существующих картинок: {self.build_all()}")
+        while True:
+            total = thumbnails.drain()
+            if total:
+                self.stdout.write(f"Построено превью: {total}")
+            if not options["loop"]:
+                break
+            time.sleep(options["interval"])
+
+    def build_all(self) -> int:
+        total = 0
+        for user in User.objects.exclude(photo="").exclude(photo__isnull=True).only("id", "photo", "photo_sha256"):
+            if not user.photo_sha256:
+                try:
+                    user.photo_sha256 = thumbnails.file_sha256(user.photo.name)
+                except OSError:
+                    continue
+                User.objects.filter(pk=user.pk).update(photo_sha256=user.photo_sha256)
+            total += thumbnails.build(user.photo.name, user.photo_sha256)
+        images = Attachment.objects.filter(content_type__startswith="image/").exclude(sha256="")
+        for name, sha256 in images.values_list("file", "sha256").distinct():
+            total += thumbnails.build(name, sha256)
+        return total
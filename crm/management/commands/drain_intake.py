@@ -0,0 +1,29 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from crm import intake
+
+
+class Command(BaseCommand):
+    help = (
+        "Переносит заявки с публичной формы из файловой очереди (CRM_INTAKE_SPOOL) в БД пачками. "
+        "С --loop работает постоянно и проверяет очередь каждые --interval секунд."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--loop", action="store_true", help="не завершаться после разбора очереди")
+        parser.add_argument("--interval", type=float, default=1.0, help="пауза между проверками, с")
+        parser.add_argument("--batch-size", type=int, default=500)
+
+    def handle(self, *args, **options):
+        if intake.spool_dir() is None:
+            self.stdout.write(self.style.WARNING("CRM_INTAKE_SPOOL не задан: заявки пишутся в БД сразу"))
+            return
+        while True:
+            total = intake.drain(options["batch_size"])
+            if total:
+                self.stdout.write(f"Принято заявок: {total}")
+            if not options["loop"]:
+                break
+            time.sleep(options["interval"])
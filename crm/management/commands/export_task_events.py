@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from crm import reports
+from crm.models import TaskEvent
+
+
+class Command(BaseCommand):
+    help = "Выгружает журнал событий задач в CSV (в stdout или файл) потоком, без загрузки в память."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--project", type=int, help="Только события проекта")
+        parser.add_argument("--days", type=int, help="Только за последние N дней")
+        parser.add_argument("-o", "--output", help="Файл (по умолчанию stdout)")
+
+    def handle(self, *args, **options):
+        events = TaskEvent.objects.all()
+        if options["project"]:
+            events = events.filter(project_id=options["project"])
+        if options["days"]:
+            events = events.filter(created_at__gte=reports.default_since(options["days"]))
+        if options["output"]:
+            with open(options["output"], "w", encoding="utf-8", newline="") as fh:
+                fh.writelines(reports.export_rows(events))
+        else:
+            for line in reports.export_rows(events):
+                self.stdout.write(line, ending="")
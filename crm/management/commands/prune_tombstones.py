@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from crm.kanban import tombstone_horizon
+from crm.models import TaskTombstone
+
+
+class Command(BaseCommand):
+    help = (
+        "Удаляет следы удалённых задач старше CRM_TOMBSTONE_DAYS: доски с таким старым "
+        "курсором всё равно перезагружаются целиком. Запускать периодически (cron)."
+    )
+
+    def handle(self, *args, **options):
+        deleted, _ = TaskTombstone.objects.filter(deleted_at__lt=tombstone_horizon()).delete()
+        self.stdout.write(f"Удалено следов: {deleted}")
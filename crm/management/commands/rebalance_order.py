@@ -0,0 +1,50 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from crm import ordering
+from crm.models import RequestCheckpoint, Task, TaskCheckpoint
+
+
+class Command(BaseCommand):
+    help = (
+        "Раздвигает ключи порядка в тесных списках (колонки доски, чекпоинты), "
+        "чтобы перенос элемента снова писал одну строку. Запускать периодически (cron)."
+    )
+
+    # модель -> поля, задающие отдельный список
+    LISTS = (
+        (Task, ("project_id", "status")),
+        (RequestCheckpoint, ("request_id",)),
+        (TaskCheckpoint, ("task_id",)),
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--dry-run", action="store_true", help="Только показать тесные списки")
+
+    def handle(self, *args, **options):
+        for model, group_by in self.LISTS:
+            tight = self.find_tight(model, group_by)
+            for group in tight:
+                if not options["dry_run"]:
+                    with transaction.atomic():
+                        ordering.respace(model.objects.filter(**dict(zip(group_by, group))))
+            verb = "найдено" if options["dry_run"] else "перенумеровано"
+            self.stdout.write(f"{model.__name__}: {verb} тесных списков — {len(tight)}")
+
+    def find_tight(self, model, group_by) -> list[tuple]:
+        """Один проход по индексу порядка: списки, где соседей разделяет меньше MIN_GAP."""
+        rows = (
+            model.objects.order_by(*group_by, "order", "created_at", "id")
+            .values_list(*group_by, "order")
+            .iterator(chunk_size=5000)
+        )
+        tight = []
+        prev_group, prev_order = None, None
+        for *group, order in rows:
+            group = tuple(group)
+            if group != prev_group:
+                prev_group, prev_order = group, 0
+            if order - prev_order < ordering.MIN_GAP and (not tight or tight[-1] != group):
+                tight.append(group)
+            prev_order = order
+        return tight
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from crm import stats
+
+
+class Command(BaseCommand):
+    help = (
+        "Пересчитывает сводную статистику проектов (ProjectStats) с нуля. "
+        "Нужен после массовой загрузки задач в обход сигналов или для сверки."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("projects", nargs="*", type=int, help="id проектов (по умолчанию — все)")
+
+    def handle(self, *args, **options):
+        total = stats.rebuild(options["projects"] or None)
+        self.stdout.write(self.style.SUCCESS(f"Пересчитано проектов: {total}"))
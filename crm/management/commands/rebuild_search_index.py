@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from crm import search
+
+
+class Command(BaseCommand):
+    help = (
+        "Пересобирает поисковый индекс заявок, задач, комментариев и сообщений. "
+        "Нужен после массовой загрузки данных в обход сигналов (bulk_create, seed_benchmark)."
+    )
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            total = search.get_backend().rebuild()
+        self.stdout.write(self.style.SUCCESS(f"Проиндексировано документов: {total}"))
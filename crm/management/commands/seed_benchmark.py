@@ -0,0 +1,40 @@
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from crm import benchmark
+
+
+class Command(BaseCommand):
+    help = (
+        "Заполняет базу синтетическими данными для нагрузочного теста (пользователи bench_*). "
+        "Только для отдельной базы стенда!"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--clients", type=int, default=200)
+        parser.add_argument("--projects", type=int, default=50)
+        parser.add_argument("--tasks", type=int, default=20000)
+        parser.add_argument("--checkpoints-per-task", type=int, default=3)
+        parser.add_argument("--comments-per-task", type=int, default=10)
+        parser.add_argument("--seed", type=int, default=42, help="Зерно генератора: одинаковые данные между прогонами")
+
+    def handle(self, *args, **options):
+        created = benchmark.seed(
+            clients=options["clients"],
+            projects=max(1, options["projects"]),
+            tasks=options["tasks"],
+            checkpoints_per_task=options["checkpoints_per_task"],
+            comments_per_task=options["comments_per_task"],
+            seed=options["seed"],
+        )
+        for name, count in created.items():
+            self.stdout.write(f"{name}: {count}")
+        # bulk_create обходит сигналы: производные данные пересобираем целиком
+        call_command("rebuild_search_index", stdout=self.stdout)
+        call_command("rebuild_project_stats", stdout=self.stdout)
+        if connection.vendor == "sqlite":
+            # статистика планировщика: без неё пул (crm.pool) не читается по частичному индексу
+            with connection.cursor() as cursor:
+                cursor.execute("ANALYZE")
+        self.stdout.write(self.style.SUCCESS(f"Пароль пользователей стенда: {benchmark.PASSWORD}"))
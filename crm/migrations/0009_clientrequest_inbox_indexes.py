@@ -0,0 +1,31 @@
+# Generated by Django 5.2.7 on 2026-10-18 10:57
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('crm', '0008_comment_task_created_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='clientrequest',
+            index=models.Index(fields=['created_at', 'id'], name='request_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='clientrequest',
+            index=models.Index(fields=['status', 'created_at', 'id'], name='request_status_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='clientrequest',
+            index=models.Index(fields=['project_type', 'created_at', 'id'], name='request_type_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='clientrequest',
+            index=models.Index(fields=['manager', 'created_at', 'id'], name='request_manager_created_idx'),
+        ),
+    ]
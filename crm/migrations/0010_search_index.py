@@ -0,0 +1,38 @@
+from django.db import migrations
+
+# rowid = id * 4 + код типа (request 0, task 1, comment 2, message 3), см. crm.search
+CREATE = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS crm_search USING fts5("
+    "title, body, tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3')"
+)
+FILL = (
+    "INSERT INTO crm_search (rowid, title, body) SELECT id * 4 + 0, title, description FROM crm_clientrequest",
+    "INSERT INTO crm_search (rowid, title, body) SELECT id * 4 + 1, title, description FROM crm_task",
+    "INSERT INTO crm_search (rowid, title, body) SELECT id * 4 + 2, '', text FROM crm_comment",
+    "INSERT INTO crm_search (rowid, title, body) SELECT id * 4 + 3, '', text FROM crm_message",
+)
+
+
+def create_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(CREATE)
+        for sql in FILL:
+            cursor.execute(sql)
+
+
+def drop_index(apps, schema_editor):
+    if schema_editor.connection.vendor == "sqlite":
+        schema_editor.execute("DROP TABLE IF EXISTS crm_search")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("crm", "0009_clientrequest_inbox_indexes"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, drop_index),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.7 on 2026-10-18 11:01
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('crm', '0010_search_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProjectStats',
+            fields=[
+                ('project', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='crm.project')),
+                ('tasks_total', models.IntegerField(default=0)),
+                ('points_total', models.IntegerField(default=0)),
+                ('checkpoints_total', models.IntegerField(default=0)),
+                ('checkpoints_done', models.IntegerField(default=0)),
+                ('by_status', models.JSONField(default=dict)),
+                ('by_type', models.JSONField(default=dict)),
+                ('open_due', models.JSONField(default=dict)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,60 @@
+# Generated by Django 5.2.7 on 2026-10-18 11:04
+
+import django.utils.timezone
+from django.db import migrations, models
+
+# Коды статусов — как crm.events.STATUS_CODES
+STATUS_CODES = {"todo": 1, "in_progress": 2, "review": 3, "done": 4}
+
+
+def backfill_created(apps, schema_editor):
+    """Стартовая точка журнала: событие CREATED с текущим состоянием каждой существующей задачи."""
+    Task = apps.get_model("crm", "Task")
+    TaskEvent = apps.get_model("crm", "TaskEvent")
+    rows = Task.objects.values_list("id", "project_id", "sprint_id", "status", "story_points", "created_at")
+    batch = []
+    for task_id, project_id, sprint_id, status, points, created_at in rows.iterator(chunk_size=2000):
+        batch.append(
+            TaskEvent(
+                task_id=task_id,
+                project_id=project_id,
+                sprint_id=sprint_id,
+                kind=1,
+                status=STATUS_CODES.get(status, 1),
+                points=points,
+                created_at=created_at,
+            )
+        )
+        if len(batch) == 2000:
+            TaskEvent.objects.bulk_create(batch)
+            batch = []
+    TaskEvent.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('crm', '0011_projectstats'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TaskEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('task_id', models.PositiveIntegerField()),
+                ('project_id', models.PositiveIntegerField()),
+                ('sprint_id', models.PositiveIntegerField(null=True)),
+                ('kind', models.PositiveSmallIntegerField(choices=[(1, 'Создана'), (2, 'Смена статуса'), (3, 'Перенос в спринт'), (4, 'Убрана из спринта'), (5, 'Смена оценки'), (6, 'Удалена')])),
+                ('status', models.PositiveSmallIntegerField()),
+                ('points', models.PositiveSmallIntegerField(default=0)),
+                ('old_value', models.IntegerField(null=True)),
+                ('new_value', models.IntegerField(null=True)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['project_id', 'sprint_id', 'created_at'], name='taskevent_project_sprint_idx')],
+            },
+        ),
+        migrations.RunPython(backfill_created, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-18 11:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('crm', '0012_taskevent'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='taskevent',
+            name='kind',
+            field=models.PositiveSmallIntegerField(choices=[(1, 'Создана'), (2, 'Смена статуса'), (3, 'Перенос в спринт'), (4, 'Убрана из спринта'), (5, 'Смена оценки'), (6, 'Удалена'), (7, 'Смена исполнителя'), (8, 'Перенос в колонке')]),
+        ),
+    ]
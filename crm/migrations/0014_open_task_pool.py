@@ -0,0 +1,52 @@
+# Generated by Django 5.2.7 on 2026-10-18 11:08
+
+from django.conf import settings
+from django.db import migrations, models
+
+# Прежнее правило DeveloperOpenTasksView: фулстек видит фронтенд, бэкенд и фулстек, остальные — свой тип
+DEFAULT_MAPPING = [
+    ("frontend", "frontend"),
+    ("backend", "backend"),
+    ("fullstack", "frontend"),
+    ("fullstack", "backend"),
+    ("fullstack", "fullstack"),
+    ("devops", "devops"),
+    ("qa", "qa"),
+    ("android", "android"),
+    ("db", "db"),
+]
+
+
+def seed_mapping(apps, schema_editor):
+    DeveloperTaskType = apps.get_model("crm", "DeveloperTaskType")
+    DeveloperTaskType.objects.bulk_create(
+        [DeveloperTaskType(developer_type=d, task_type=t) for d, t in DEFAULT_MAPPING], ignore_conflicts=True
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('crm', '0013_taskevent_assignee_order_kinds'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DeveloperTaskType',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('developer_type', models.CharField(choices=[('none', 'Не задано'), ('frontend', 'Фронтенд'), ('backend', 'Бэкенд'), ('fullstack', 'Фулстек'), ('devops', 'DevOps'), ('qa', 'Тестировщик'), ('android', 'Android'), ('db', 'Разработчик БД')], max_length=20)),
+                ('task_type', models.CharField(choices=[('frontend', 'Фронтенд'), ('backend', 'Бэкенд'), ('fullstack', 'Фулстек'), ('devops', 'DevOps'), ('qa', 'Тестирование'), ('android', 'Android'), ('db', 'База данных')], max_length=20)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(condition=models.Q(('assignee__isnull', True), ('status', 'todo')), fields=['task_type', 'project', 'id'], name='task_open_pool_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='developertasktype',
+            constraint=models.UniqueConstraint(fields=('developer_type', 'task_type'), name='developer_task_type_unique'),
+        ),
+        migrations.RunPython(seed_mapping, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,62 @@
+# Generated by Django 5.2.7 on 2026-10-18 11:14
+
+import hashlib
+import os
+
+from django.core.files.storage import default_storage
+from django.db import migrations, models
+
+
+def fill_hashes(apps, schema_editor):
+    # старые файлы остаются на месте: хеш и размер нужны для ETag и дедупликации новых загрузок
+    Attachment = apps.get_model("crm", "Attachment")
+    for attachment in Attachment.objects.filter(sha256="").iterator(chunk_size=500):
+        digest = hashlib.sha256()
+        size = 0
+        try:
+            with default_storage.open(attachment.file.name, "rb") as fh:
+                for chunk in iter(lambda: fh.read(1024 * 1024), b""):
+                    digest.update(chunk)
+                    size += len(chunk)
+        except OSError:
+            continue
+        attachment.sha256 = digest.hexdigest()
+        attachment.size = size
+        attachment.name = attachment.name or os.path.basename(attachment.file.name)
+        attachment.save(update_fields=["sha256", "size", "name"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('crm', '0014_open_task_pool'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='attachment',
+            name='content_type',
+            field=models.CharField(blank=True, max_length=100),
+        ),
+        migrations.AddField(
+            model_name='attachment',
+            name='name',
+            field=models.CharField(blank=True, max_length=255),
+        ),
+        migrations.AddField(
+            model_name='attachment',
+            name='sha256',
+            field=models.CharField(blank=True, db_index=True, max_length=64),
+        ),
+        migrations.AddField(
+            model_name='attachment',
+            name='size',
+            field=models.PositiveBigIntegerField(default=0),
+        ),
+        migrations.AlterField(
+            model_name='attachment',
+            name='file',
+            field=models.FileField(max_length=255, upload_to='attachments/%Y/%m/%d/'),
+        ),
+        migrations.RunPython(fill_hashes, migrations.RunPython.noop),
+    ]
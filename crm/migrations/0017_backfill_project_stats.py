@@ -0,0 +1,79 @@
+# Generated by Django 5.2.7 on 2026-10-18 12:40
+
+from django.db import migrations
+
+
+def _bucket(bucket, key, count, points=None):
+    if points is None:
+        bucket[key] = bucket.get(key, 0) + count
+        return
+    entry = bucket.setdefault(key, {"count": 0, "points": 0})
+    entry["count"] += count
+    entry["points"] += points
+
+
+def backfill(apps, schema_editor):
+    # сводки проектов, созданных до ProjectStats: раньше они создавались на первом чтении.
+    # Подсчёт повторяет crm.stats.collect на исторических моделях — миграция не зависит
+    # от того, как этот модуль будет меняться дальше
+    from django.db.models import Count, Q, Sum
+
+    Project = apps.get_model("crm", "Project")
+    ProjectStats = apps.get_model("crm", "ProjectStats")
+    Task = apps.get_model("crm", "Task")
+    TaskCheckpoint = apps.get_model("crm", "TaskCheckpoint")
+    ids = list(Project.objects.filter(stats__isnull=True).values_list("id", flat=True))
+    if not ids:
+        return
+    data = {
+        pk: {
+            "tasks_total": 0,
+            "points_total": 0,
+            "checkpoints_total": 0,
+            "checkpoints_done": 0,
+            "by_status": {},
+            "by_type": {},
+            "open_due": {},
+        }
+        for pk in ids
+    }
+    tasks = Task.objects.filter(project_id__in=ids)
+    grouped = tasks.values("project_id", "status", "task_type").annotate(n=Count("id"), sp=Sum("story_points"))
+    for row in grouped.order_by():
+        stats = data[row["project_id"]]
+        points = row["sp"] or 0
+        stats["tasks_total"] += row["n"]
+        stats["points_total"] += points
+        _bucket(stats["by_status"], row["status"], row["n"], points)
+        _bucket(stats["by_type"], row["task_type"], row["n"], points)
+    due = (
+        tasks.exclude(status="done")
+        .filter(due_date__isnull=False)
+        .values("project_id", "due_date")
+        .annotate(n=Count("id"))
+    )
+    for row in due.order_by():
+        _bucket(data[row["project_id"]]["open_due"], row["due_date"].isoformat(), row["n"])
+    checkpoints = (
+        TaskCheckpoint.objects.filter(task__project_id__in=ids)
+        .values("task__project_id")
+        .annotate(n=Count("id"), done=Count("id", filter=Q(is_done=True)))
+    )
+    for row in checkpoints.order_by():
+        stats = data[row["task__project_id"]]
+        stats["checkpoints_total"] = row["n"]
+        stats["checkpoints_done"] = row["done"]
+    ProjectStats.objects.bulk_create(
+        [ProjectStats(project_id=pk, **values) for pk, values in data.items()], batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('crm', '0016_message_request_created_idx'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.7 on 2026-10-18 12:00
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def analyze(apps, schema_editor):
+    # без sqlite_stat1 планировщик берёт индекс по assignee_id и сортирует пул во временном B-дереве
+    if schema_editor.connection.vendor == "sqlite":
+        schema_editor.execute("ANALYZE")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('crm', '0017_backfill_project_stats'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='task',
+            name='task_open_pool_idx',
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(condition=models.Q(('assignee__isnull', True), ('status', 'todo')), fields=['project', 'id', 'task_type'], name='task_open_pool_idx'),
+        ),
+        migrations.RunPython(analyze, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.7 on 2026-10-18 12:08
+
+from django.db import migrations, models
+
+
+def backfill(apps, schema_editor):
+    Attachment = apps.get_model("crm", "Attachment")
+    AttachmentBlob = apps.get_model("crm", "AttachmentBlob")
+    hashes = Attachment.objects.exclude(sha256="").values_list("sha256", flat=True).distinct()
+    AttachmentBlob.objects.bulk_create(
+        [AttachmentBlob(sha256=sha256) for sha256 in hashes.iterator()],
+        batch_size=500,
+        ignore_conflicts=True,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('crm', '0018_open_pool_index_by_project'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AttachmentBlob',
+            fields=[
+                ('sha256', models.CharField(max_length=64, primary_key=True, serialize=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
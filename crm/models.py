@@ -1,5 +1,49 @@
-from django.db import models
+from django.db import models, transaction
 from django.conf import settings
+from django.utils import timezone
+
+from accounts.models import User
+
+
+class TrackedStateMixin:
+    """
+    Снимок отслеживаемых полей (attname) на момент загрузки из БД или последнего save().
+    Во время save() прежний снимок доступен в ``previous_state`` (None — объект новый),
+    по нему обработчики сигналов считают дельты.
+    """
+
+    tracked_fields: tuple[str, ...] = ()
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._saved_state = {f: v for f, v in zip(field_names, values) if f in cls.tracked_fields}
+        return instance
+
+    def saved_state(self) -> dict | None:
+        return getattr(self, "_saved_state", None)
+
+    def current_state(self) -> dict:
+        # to_python: атрибут мог быть присвоен строкой (дата из формы) — снимок хранит значения как из БД
+        deferred = self.get_deferred_fields()
+        return {
+            f: self._meta.get_field(f).to_python(getattr(self, f))
+            for f in self.tracked_fields
+            if f not in deferred
+        }
+
+    def save(self, *args, **kwargs):
+        self.previous_state = self.saved_state()
+        # запись и обработчики post_save (статистика, журнал) — одной транзакцией
+        with transaction.atomic(using=kwargs.get("using")):
+            super().save(*args, **kwargs)
+        state = self.current_state()
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and self.previous_state is not None:
+            saved = {self._meta.get_field(name).attname for name in update_fields}
+            state = {**self.previous_state, **{f: v for f, v in state.items() if f in saved}}
+        self._saved_state = state
+        self.previous_state = None
 
 
 class ClientRequest(models.Model):
@@ -29,6 +73,15 @@ class ClientRequest(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            # Входящие менеджера: keyset по (created_at, id), с фильтром или без
+            models.Index(fields=["created_at", "id"], name="request_created_idx"),
+            models.Index(fields=["status", "created_at", "id"], name="request_status_created_idx"),
+            models.Index(fields=["project_type", "created_at", "id"], name="request_type_created_idx"),
+            models.Index(fields=["manager", "created_at", "id"], name="request_manager_created_idx"),
+        ]
+
     def __str__(self) -> str:
         return f"{self.title} ({self.get_project_type_display()})"
 
@@ -80,7 +133,7 @@ class Sprint(models.Model):
         return f"{self.project.name}: {self.name}"
 
 
-class Task(models.Model):
+class Task(TrackedStateMixin, models.Model):
     class Status(models.TextChoices):
         TODO = "todo", "К выполнению"
         IN_PROGRESS = "in_progress", "В работе"
@@ -96,6 +149,9 @@ class Task(models.Model):
         ANDROID = "android", "Android"
         DB = "db", "База данных"
 
+    # Поля, по изменению которых считаются дельты статистики проекта и журнал событий
+    tracked_fields = ("project_id", "status", "task_type", "story_points", "due_date", "assignee_id", "sprint_id", "order")
+
     project = models.ForeignKey(Project, on_delete=models.CASCADE, related_name="tasks")
     sprint = models.ForeignKey(Sprint, null=True, blank=True, on_delete=models.SET_NULL, related_name="tasks")
     title = models.CharField(max_length=255)
@@ -116,22 +172,118 @@ class Task(models.Model):
     due_date = models.DateField(null=True, blank=True, help_text="Дедлайн/дата завершения")
     story_points = models.PositiveSmallIntegerField(default=0)
     order = models.PositiveIntegerField(default=0)
+    # Версия строки: растёт при каждом сохранении, клиенты доски по ней отбрасывают устаревшие данные
+    version = models.PositiveIntegerField(default=1)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     starts_after_task = models.ForeignKey(
         'self', null=True, blank=True, on_delete=models.SET_NULL, related_name='unblocks'
     )
 
+    class Meta:
+        indexes = [
+            # Курсор синхронизации доски: (project, updated_at, id)
+            models.Index(fields=["project", "updated_at", "id"], name="task_project_updated_idx"),
+            # Пул свободных задач (crm.pool): только TODO без исполнителя, в порядке выдачи (project, id).
+            # task_type — последним: фильтр по нескольким типам проверяется по записи индекса,
+            # без сортировки и без чтения строк чужих типов
+            models.Index(
+                fields=["project", "id", "task_type"],
+                condition=models.Q(status="todo", assignee__isnull=True),
+                name="task_open_pool_idx",
+            ),
+        ]
+
     def __str__(self) -> str:
         return f"[{self.get_task_type_display()}] {self.title}"
 
+    def save(self, *args, **kwargs):
+        if self.pk:
+            self.version = (self.version or 0) + 1
+            update_fields = kwargs.get("update_fields")
+            if update_fields is not None and "version" not in update_fields:
+                kwargs["update_fields"] = [*update_fields, "version"]
+        super().save(*args, **kwargs)
+
+
+class DeveloperTaskType(models.Model):
+    """Какие типы задач попадают в пул свободных задач разработчика данного типа (правится в админке)."""
+
+    developer_type = models.CharField(max_length=20, choices=User.DeveloperType.choices)
+    task_type = models.CharField(max_length=20, choices=Task.TaskType.choices)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["developer_type", "task_type"], name="developer_task_type_unique"),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.developer_type} -> {self.task_type}"
+
+
+class TaskTombstone(models.Model):
+    """
+    След удалённой задачи, чтобы открытые доски узнали об удалении при синхронизации.
+    """
+
+    task_id = models.BigIntegerField()
+    project_id = models.BigIntegerField()
+    deleted_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [models.Index(fields=["project_id", "deleted_at"], name="tasktombstone_project_idx")]
+
+    def __str__(self) -> str:
+        return f"Удалена задача {self.task_id}"
+
 
-class TaskCheckpoint(models.Model):
+class TaskEvent(models.Model):
+    """
+    Журнал изменений задач только на добавление (crm.events). Строка компактная:
+    id как простые целые (переживают удаление задачи), коды — smallint,
+    состояние задачи после события (status, points) — чтобы отчёты и burndown
+    воспроизводились по журналу, не читая горячую таблицу Task.
+    """
+
+    class Kind(models.IntegerChoices):
+        CREATED = 1, "Создана"
+        STATUS = 2, "Смена статуса"
+        SPRINT = 3, "Перенос в спринт"
+        SPRINT_LEFT = 4, "Убрана из спринта"
+        POINTS = 5, "Смена оценки"
+        DELETED = 6, "Удалена"
+        ASSIGNEE = 7, "Смена исполнителя"
+        ORDER = 8, "Перенос в колонке"
+
+    task_id = models.PositiveIntegerField()
+    project_id = models.PositiveIntegerField()
+    # Спринт задачи после события; для SPRINT_LEFT — спринт, из которого задачу убрали
+    sprint_id = models.PositiveIntegerField(null=True)
+    kind = models.PositiveSmallIntegerField(choices=Kind.choices)
+    status = models.PositiveSmallIntegerField()
+    points = models.PositiveSmallIntegerField(default=0)
+    old_value = models.IntegerField(null=True)
+    new_value = models.IntegerField(null=True)
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            # Единственный индекс: burndown спринта (project, sprint) и отчёты проекта по префиксу (project)
+            models.Index(fields=["project_id", "sprint_id", "created_at"], name="taskevent_project_sprint_idx"),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.get_kind_display()}: задача {self.task_id}"
+
+
+class TaskCheckpoint(TrackedStateMixin, models.Model):
     """
     Чекпоинты/этапы внутри задачи (для менеджера и исполнителя).
     Отображаются в карточке задачи на канбане.
     """
 
+    tracked_fields = ("task_id", "is_done")
+
     task = models.ForeignKey(Task, on_delete=models.CASCADE, related_name="checkpoints")
     title = models.CharField("Заголовок", max_length=255)
     comment = models.TextField("Комментарий / детали", blank=True)
@@ -147,24 +299,98 @@ class TaskCheckpoint(models.Model):
         return f"Task {self.task_id}: {self.title}"
 
 
+class ProjectStats(models.Model):
+    """
+    Сводка по проекту одной строкой: задачи и story points по статусам и типам,
+    просроченные задачи, прогресс чекпоинтов. Поддерживается инкрементально
+    (crm.stats) в той же транзакции, что и изменение задачи/чекпоинта;
+    полный пересчёт — ``manage.py rebuild_project_stats``.
+    """
+
+    project = models.OneToOneField(Project, on_delete=models.CASCADE, primary_key=True, related_name="stats")
+    tasks_total = models.IntegerField(default=0)
+    points_total = models.IntegerField(default=0)
+    checkpoints_total = models.IntegerField(default=0)
+    checkpoints_done = models.IntegerField(default=0)
+    # {status: {"count": n, "points": sp}}, {task_type: {...}}
+    by_status = models.JSONField(default=dict)
+    by_type = models.JSONField(default=dict)
+    # Незавершённые задачи по дедлайну {"YYYY-MM-DD": n}: просрочка считается на чтении, без ночного пересчёта
+    open_due = models.JSONField(default=dict)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self) -> str:
+        return f"Статистика проекта {self.project_id}"
+
+    def overdue_count(self, today=None) -> int:
+        today = (today or timezone.localdate()).isoformat()
+        return sum(n for due, n in self.open_due.items() if due < today)
+
+    def checkpoints_percent(self) -> int:
+        return round(100 * self.checkpoints_done / self.checkpoints_total) if self.checkpoints_total else 0
+
+    def status_rows(self) -> list[tuple[str, int, int]]:
+        """(название статуса, задач, SP) в порядке колонок доски."""
+        return [
+            (label, self.by_status.get(value, {}).get("count", 0), self.by_status.get(value, {}).get("points", 0))
+            for value, label in Task.Status.choices
+        ]
+
+    def type_rows(self) -> list[tuple[str, int, int]]:
+        return [
+            (label, self.by_type[value]["count"], self.by_type[value]["points"])
+            for value, label in Task.TaskType.choices
+            if value in self.by_type
+        ]
+
+
 class Comment(models.Model):
     task = models.ForeignKey(Task, on_delete=models.CASCADE, related_name="comments")
     author = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
     text = models.TextField()
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            # Keyset-пагинация чата задачи: (task, created_at, id)
+            models.Index(fields=["task", "created_at", "id"], name="comment_task_created_idx"),
+        ]
+
     def __str__(self) -> str:
         return f"Комментарий к {self.task_id} от {self.author_id}"
 
 
+class AttachmentBlob(models.Model):
+    """
+    Содержимое вложений с данным sha256. Строка — точка блокировки: загрузка
+    (crm.attachments.store) и удаление последней ссылки на файл (release)
+    берут её select_for_update и поэтому не пересекаются.
+    """
+
+    sha256 = models.CharField(max_length=64, primary_key=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self) -> str:
+        return self.sha256
+
+
 class Attachment(models.Model):
+    """
+    Вложение задачи. Содержимое хранится один раз на хеш (crm.attachments):
+    одинаковые файлы разных вложений указывают на один путь в хранилище.
+    """
+
     task = models.ForeignKey(Task, on_delete=models.CASCADE, related_name="attachments")
-    file = models.FileField(upload_to="attachments/%Y/%m/%d/")
+    file = models.FileField(upload_to="attachments/%Y/%m/%d/", max_length=255)
+    name = models.CharField(max_length=255, blank=True)  # имя файла у загрузившего
+    content_type = models.CharField(max_length=100, blank=True)
+    size = models.PositiveBigIntegerField(default=0)
+    sha256 = models.CharField(max_length=64, blank=True, db_index=True)
     uploaded_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
     created_at = models.DateTimeField(auto_now_add=True)
 
     def __str__(self) -> str:
-        return f"Файл {self.file.name}"
+        return f"Файл {self.name or self.file.name}"
 
 
 class Message(models.Model):
@@ -175,6 +401,10 @@ class Message(models.Model):
 
     class Meta:
         ordering = ["created_at"]
+        indexes = [
+            # Keyset-пагинация переписки по заявке: (request, created_at, id)
+            models.Index(fields=["request", "created_at", "id"], name="message_request_created_idx"),
+        ]
 
     def __str__(self) -> str:
         return f"Сообщение {self.author_id} -> {self.request_id}"
@@ -0,0 +1,136 @@
+"""
+Разреженный порядок элементов списка (задачи в колонке доски, чекпоинты).
+
+Соседние элементы нумеруются с шагом GAP, поэтому перенос элемента в любое
+место списка — это запись одной строки: новый ключ берётся посередине между
+ключами соседей. Когда место между соседями кончается, список
+перенумеровывается целиком: прямо в запросе (редкий случай) или заранее,
+фоновой командой ``manage.py rebalance_order``.
+"""
+
+from django.db import transaction
+from django.db.models import Case, F, Max, QuerySet, Value, When
+from django.utils import timezone
+
+GAP = 1024
+# Списки, где соседей разделяет меньше MIN_GAP, фоновая перенумерация раздвигает заранее
+MIN_GAP = 8
+
+
+def spaced(count: int) -> list[int]:
+    return [GAP * i for i in range(1, count + 1)]
+
+
+def key_between(before: int | None, after: int | None) -> int | None:
+    """Ключ между соседями или None, если свободного места нет."""
+    low = before if before is not None else 0
+    if after is None:
+        return low + GAP
+    if after - low >= 2:
+        return (low + after) // 2
+    return None
+
+
+def _ordered(queryset: QuerySet) -> QuerySet:
+    return queryset.order_by("order", "created_at", "id")
+
+
+def last_key(queryset: QuerySet) -> int:
+    """Ключ для добавления в конец списка."""
+    return key_between(queryset.aggregate(m=Max("order"))["m"], None)
+
+
+def position_key(siblings: QuerySet, position: int | None) -> int | None:
+    """
+    Ключ для вставки на позицию position (индекс) среди siblings.
+    siblings не должен содержать перемещаемый элемент. None — нужна перенумерация.
+    """
+    if position is None or position < 0:
+        return last_key(siblings)
+    start = max(0, position - 1)
+    keys = list(_ordered(siblings).values_list("order", flat=True)[start : position + 1])
+    if position == 0:
+        return key_between(None, keys[0] if keys else None)
+    if len(keys) == 2:
+        return key_between(keys[0], keys[1])
+    if len(keys) == 1:
+        return key_between(keys[0], None)
+    return last_key(siblings)
+
+
+def touch_fields(model) -> dict:
+    """Поля, которые надо обновить вместе с порядком при массовой записи (bulk_update не знает auto_now)."""
+    extra = {"updated_at": timezone.now()}
+    if any(f.name == "version" for f in model._meta.concrete_fields):
+        extra["version"] = F("version") + 1
+    return extra
+
+
+def respace(siblings: QuerySet, insert: tuple[int, int | None] | None = None) -> dict[int, int]:
+    """
+    Перенумеровывает список с шагом GAP одним bulk_update.
+    insert=(pk, position) — заодно ставит элемент pk на позицию; его строку
+    не пишет (это делает вызывающий код), но ключ возвращает.
+    Возвращает {pk: новый ключ}.
+    """
+    model = siblings.model
+    ids = list(_ordered(siblings).values_list("id", flat=True))
+    if insert is not None:
+        pk, position = insert
+        if pk in ids:
+            ids.remove(pk)
+        if position is None or position < 0 or position >= len(ids):
+            ids.append(pk)
+        else:
+            ids.insert(position, pk)
+    orders = dict(zip(ids, spaced(len(ids))))
+    extra = touch_fields(model)
+    skip = insert[0] if insert is not None else None
+    objs = [model(id=pk, order=order, **extra) for pk, order in orders.items() if pk != skip]
+    model.objects.bulk_update(objs, ["order", *extra])
+    return orders
+
+
+def move_to(obj, siblings: QuerySet, position: int | None) -> dict[int, int]:
+    """
+    Переносит obj на позицию position среди siblings (того же списка).
+    Обычно пишет ровно одну строку. Возвращает {pk: ключ} всех изменённых строк.
+    Строки списка блокируются до конца транзакции: параллельный перенос
+    не возьмёт тот же ключ и не перенумерует список по устаревшим соседям.
+    """
+    model = type(obj)
+    with transaction.atomic():
+        list(siblings.select_for_update().order_by().values_list("pk", flat=True))
+        others = siblings.exclude(pk=obj.pk)
+        key = position_key(others, position)
+        if key is None:
+            orders = respace(others, insert=(obj.pk, position))
+            key = orders[obj.pk]
+        else:
+            orders = {obj.pk: key}
+        obj.order = key
+        model.objects.filter(pk=obj.pk).update(order=key, **touch_fields(model))
+    return orders
+
+
+def bulk_reorder(siblings: QuerySet, ids: list[int]) -> dict[int, int]:
+    """
+    Ставит элементы ids в указанном порядке одним UPDATE ... CASE WHEN внутри транзакции.
+    Принадлежность проверяется тем же запросом: siblings уже отфильтрован по владельцу,
+    и если обновилось меньше строк, чем передано id, изменения откатываются
+    (model.DoesNotExist). Возвращает {pk: новый ключ}.
+    """
+    model = siblings.model
+    ids = list(dict.fromkeys(ids))
+    orders = dict(zip(ids, spaced(len(ids))))
+    if not orders:
+        return orders
+    key = Case(
+        *(When(pk=pk, then=Value(order)) for pk, order in orders.items()),
+        output_field=model._meta.get_field("order"),
+    )
+    with transaction.atomic():
+        updated = siblings.filter(pk__in=ids).update(order=key, **touch_fields(model))
+        if updated != len(ids):
+            raise model.DoesNotExist("reorder ids do not belong to the list")
+    return orders
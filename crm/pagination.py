@@ -0,0 +1,41 @@
+"""
+Keyset-пагинация (seek) по паре (created_at, id).
+
+В отличие от OFFSET стоимость страницы не зависит от её глубины: запрос идёт
+по составному индексу (владелец, created_at, id) сразу от ключа-якоря.
+Якорь задаётся id элемента, на котором закончилась предыдущая страница.
+"""
+
+from django.db.models import Q, QuerySet
+
+
+def _anchor(queryset: QuerySet, pk: int) -> tuple:
+    anchor = queryset.filter(pk=pk).values_list("created_at", "id").first()
+    if anchor is None:
+        raise queryset.model.DoesNotExist(pk)
+    return anchor
+
+
+def keyset_window(
+    queryset: QuerySet, *, before_id: int | None = None, after_id: int | None = None, limit: int = 50
+) -> tuple[list, bool]:
+    """
+    Окно из limit элементов по возрастанию (created_at, id) и флаг «есть ещё».
+    - без якоря: последние limit элементов, флаг — есть ли более старые;
+    - before_id: limit элементов перед якорем, флаг — есть ли ещё старше;
+    - after_id: limit элементов после якоря, флаг — есть ли ещё новее.
+    Якорь ищется в том же queryset, чужой id даёт model.DoesNotExist.
+    """
+    if after_id is not None:
+        created_at, pk = _anchor(queryset, after_id)
+        rows = list(
+            queryset.filter(Q(created_at__gt=created_at) | Q(created_at=created_at, id__gt=pk))
+            .order_by("created_at", "id")[: limit + 1]
+        )
+        return rows[:limit], len(rows) > limit
+
+    if before_id is not None:
+        created_at, pk = _anchor(queryset, before_id)
+        queryset = queryset.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=pk))
+    rows = list(queryset.order_by("-created_at", "-id")[: limit + 1])
+    return rows[:limit][::-1], len(rows) > limit
@@ -0,0 +1,108 @@
+"""
+Пул свободных задач для разработчиков.
+
+claim() — атомарный захват задачи: одно условное UPDATE
+(«задача ещё свободна и у разработчика нет активной задачи») с проверкой
+числа обновлённых строк. Параллельные захваты одной задачи разными
+разработчиками разрешаются самой БД: обновит строку только первый.
+Захваты одного разработчика сериализуются блокировкой его строки User,
+остальные разработчики друг друга не ждут.
+
+open_tasks() — выдача пула: частичный индекс task_open_pool_idx содержит
+только свободные TODO-задачи в порядке выдачи (project_id, id), тип задачи —
+последняя колонка: пул из нескольких типов (фулстек) читается одним проходом
+по индексу без сортировки. Страницы — по ключу (project_id, id) без OFFSET и
+COUNT. Частичный индекс планировщик SQLite выбирает по статистике
+sqlite_stat1 (ANALYZE в миграции 0018; после массовой загрузки — снова ANALYZE),
+без неё он предпочитает индекс по assignee_id и сортирует результат. Соответствие «тип разработчика -> типы задач» хранится в
+таблице DeveloperTaskType и кешируется (сбрасывается при её изменении).
+"""
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Exists, F, Q
+from django.utils import timezone
+
+from accounts.models import User
+from . import events, realtime, stats
+from .models import DeveloperTaskType, Task
+
+ACTIVE_STATUSES = (Task.Status.TODO, Task.Status.IN_PROGRESS, Task.Status.REVIEW)
+MAPPING_CACHE_KEY = "crm:pool:task-types"
+MAPPING_TTL = 300
+
+
+class ClaimError(Exception):
+    """code: not_found — задачи нет или она не свободна; taken — уже взята; has_active — есть активная задача."""
+
+    def __init__(self, code: str):
+        super().__init__(code)
+        self.code = code
+
+
+def claim(task_id: int, user: User) -> Task:
+    with transaction.atomic():
+        # блокировка строки разработчика: два его параллельных захвата не пройдут оба проверку «нет активной»
+        User.objects.select_for_update().filter(pk=user.pk).values_list("id", flat=True).first()
+        has_active = Task.objects.filter(assignee_id=user.pk, status__in=ACTIVE_STATUSES)
+        updated = (
+            Task.objects.filter(pk=task_id, assignee__isnull=True, status=Task.Status.TODO)
+            .filter(~Exists(has_active))
+            .update(
+                assignee_id=user.pk,
+                status=Task.Status.IN_PROGRESS,
+                updated_at=timezone.now(),
+                version=F("version") + 1,
+            )
+        )
+        if not updated:
+            raise ClaimError(_claim_failure(task_id, user))
+
+        # update() обходит сигналы: статистика, журнал и доска — явно
+        task = Task.objects.get(pk=task_id)
+        new = task.current_state()
+        old = {**new, "status": Task.Status.TODO, "assignee_id": None}
+        stats.tasks_changed([(old, new)])
+        events.record([(task.pk, old, new)])
+        realtime.publish(realtime.project_channel(task.project_id), "task", {"ids": [task.pk]})
+    return task
+
+
+def _claim_failure(task_id: int, user: User) -> str:
+    task = Task.objects.filter(pk=task_id).values("assignee_id", "status").first()
+    if task is None:
+        return "not_found"
+    if task["assignee_id"] is not None or task["status"] != Task.Status.TODO:
+        return "taken"
+    return "has_active"
+
+
+def task_types_for(developer_type: str) -> list[str]:
+    mapping = cache.get(MAPPING_CACHE_KEY)
+    if mapping is None:
+        mapping = {}
+        for dev_type, task_type in DeveloperTaskType.objects.values_list("developer_type", "task_type"):
+            mapping.setdefault(dev_type, []).append(task_type)
+        cache.set(MAPPING_CACHE_KEY, mapping, MAPPING_TTL)
+    return mapping.get(developer_type, [developer_type])
+
+
+def invalidate_mapping() -> None:
+    transaction.on_commit(lambda: cache.delete(MAPPING_CACHE_KEY))
+
+
+def pool_queryset(task_types: list[str], after_id: int | None = None):
+    """Свободные задачи типов task_types после задачи after_id в порядке (project_id, id)."""
+    qs = Task.objects.filter(status=Task.Status.TODO, assignee__isnull=True, task_type__in=task_types)
+    if after_id is not None:
+        anchor = Task.objects.filter(pk=after_id).values_list("project_id", flat=True).first()
+        if anchor is not None:
+            # project_id >= anchor — отдельным условием: по нему индекс начинает проход с якоря
+            qs = qs.filter(project_id__gte=anchor).filter(Q(project_id__gt=anchor) | Q(id__gt=after_id))
+    return qs.order_by("project_id", "id")
+
+
+def open_tasks(task_types: list[str], after_id: int | None = None, limit: int = 50) -> tuple[list[Task], bool]:
+    """Страница пула после задачи after_id и флаг «есть ещё»."""
+    rows = list(pool_queryset(task_types, after_id).select_related("project")[: limit + 1])
+    return rows[:limit], len(rows) > limit
@@ -0,0 +1,122 @@
+"""
+Push-события для канбана, чата задачи и переписки по заявке (Server-Sent Events).
+
+Публикация — синхронная publish(channel, event, data): её вызывают обработчики
+сигналов и сервисы после коммита транзакции. Подписчики — асинхронные
+SSE-ответы, которые держит ASGI-сервер (``uvicorn Diplom3.asgi:application``).
+Брокер по умолчанию живёт в памяти процесса; для нескольких процессов в
+settings.CRM_PUSH_BROKER указывается другой класс с тем же интерфейсом
+(publish / subscribe / unsubscribe).
+
+Каналы: ``project:<id>`` (доска и чаты задач проекта), ``request:<id>``
+(переписка и этапы заявки). Кадры маленькие: тип события и id изменённых
+объектов, сами данные клиент добирает через дельта-API.
+"""
+
+import asyncio
+import json
+import threading
+from functools import lru_cache
+
+from django.conf import settings
+from django.db import transaction
+from django.http import StreamingHttpResponse
+from django.utils.module_loading import import_string
+
+
+class Subscription:
+    """Очередь событий одного SSE-соединения, привязанная к его event loop."""
+
+    def __init__(self, channel: str, maxsize: int = 256):
+        self.channel = channel
+        self.loop = asyncio.get_running_loop()
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+
+    def push(self, message: dict) -> None:
+        # publish вызывается из потоков синхронных view, поэтому только через call_soon_threadsafe
+        self.loop.call_soon_threadsafe(self._put, message)
+
+    def _put(self, message: dict) -> None:
+        if self.queue.full():
+            # медленный клиент: теряем самое старое событие, клиент всё равно досинхронизируется по курсору
+            self.queue.get_nowait()
+        self.queue.put_nowait(message)
+
+    async def get(self) -> dict:
+        return await self.queue.get()
+
+
+class InProcessBroker:
+    """Pub/sub в памяти процесса: подходит для одного ASGI-воркера и разработки."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._channels: dict[str, set[Subscription]] = {}
+
+    def subscribe(self, channel: str) -> Subscription:
+        subscription = Subscription(channel)
+        with self._lock:
+            self._channels.setdefault(channel, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            subscribers = self._channels.get(subscription.channel)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._channels[subscription.channel]
+
+    def publish(self, channel: str, message: dict) -> None:
+        with self._lock:
+            subscribers = list(self._channels.get(channel, ()))
+        for subscription in subscribers:
+            try:
+                subscription.push(message)
+            except RuntimeError:
+                # event loop соединения уже закрыт
+                self.unsubscribe(subscription)
+
+
+@lru_cache(maxsize=None)
+def get_broker():
+    return import_string(getattr(settings, "CRM_PUSH_BROKER", "crm.realtime.InProcessBroker"))()
+
+
+def publish(channel: str, event: str, data: dict) -> None:
+    """Отправить событие после коммита текущей транзакции (сразу, если транзакции нет)."""
+    message = {"event": event, "data": data}
+    transaction.on_commit(lambda: get_broker().publish(channel, message))
+
+
+def project_channel(project_id: int) -> str:
+    return f"project:{project_id}"
+
+
+def request_channel(request_id: int) -> str:
+    return f"request:{request_id}"
+
+
+def event_stream_response(channel: str) -> StreamingHttpResponse:
+    keepalive = getattr(settings, "CRM_PUSH_KEEPALIVE", 15)
+
+    async def stream():
+        broker = get_broker()
+        subscription = broker.subscribe(channel)
+        try:
+            yield "retry: 3000\n\n"
+            while True:
+                try:
+                    message = await asyncio.wait_for(subscription.get(), keepalive)
+                except asyncio.TimeoutError:
+                    # комментарий-пинг держит соединение живым через прокси
+                    yield ": keepalive\n\n"
+                    continue
+                yield f"event: {message['event']}\ndata: {json.dumps(message['data'])}\n\n"
+        finally:
+            broker.unsubscribe(subscription)
+
+    response = StreamingHttpResponse(stream(), content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"
+    return response
@@ -0,0 +1,113 @@
+"""
+Отчёты по журналу TaskEvent: lead time / cycle time и потоковая выгрузка.
+
+Всё читается из журнала по префиксу индекса (project_id, ...), горячая
+таблица Task не затрагивается.
+- lead time — от создания задачи до последнего перехода в «Готово»;
+- cycle time — от первого перехода «В работу» до того же момента.
+Задача учитывается, если она готова и этот переход попал в период.
+"""
+
+import csv
+import math
+from datetime import timedelta
+from statistics import mean
+
+from django.utils import timezone
+
+from .events import DONE, STATUS_BY_CODE, STATUS_CODES
+from .models import Task, TaskEvent
+
+IN_PROGRESS = STATUS_CODES[Task.Status.IN_PROGRESS]
+FLOW_KINDS = (TaskEvent.Kind.CREATED, TaskEvent.Kind.STATUS, TaskEvent.Kind.DELETED)
+EXPORT_FIELDS = (
+    "id",
+    "created_at",
+    "task_id",
+    "project_id",
+    "sprint_id",
+    "kind",
+    "status",
+    "points",
+    "old_value",
+    "new_value",
+)
+
+
+def percentile(values: list[float], pct: float) -> float:
+    """Процентиль методом ближайшего ранга (значение из выборки, без интерполяции)."""
+    ordered = sorted(values)
+    # ранг ceil(pct * n / 100); round(x + 0.5) на целых x округляет к чётному и даёт ранг на 1 больше
+    index = max(0, min(len(ordered) - 1, math.ceil(pct * len(ordered) / 100) - 1))
+    return ordered[index]
+
+
+def _summary(hours: list[float]) -> dict:
+    if not hours:
+        return {"count": 0, "avg_h": None, "p50_h": None, "p85_h": None}
+    return {
+        "count": len(hours),
+        "avg_h": round(mean(hours), 1),
+        "p50_h": round(percentile(hours, 50), 1),
+        "p85_h": round(percentile(hours, 85), 1),
+    }
+
+
+def flow_report(project_id: int, since, until=None) -> dict:
+    """Lead/cycle time задач проекта, завершённых в [since, until)."""
+    until = until or timezone.now()
+    rows = (
+        TaskEvent.objects.filter(project_id=project_id, kind__in=FLOW_KINDS, created_at__lt=until)
+        .order_by("created_at", "id")
+        .values_list("task_id", "kind", "status", "created_at")
+    )
+    created, started, finished, final = {}, {}, {}, {}
+    for task_id, kind, status, at in rows.iterator(chunk_size=5000):
+        if kind == TaskEvent.Kind.CREATED:
+            created[task_id] = at
+        if status == IN_PROGRESS and task_id not in started:
+            started[task_id] = at
+        if kind == TaskEvent.Kind.STATUS and status == DONE:
+            finished[task_id] = at
+        final[task_id] = None if kind == TaskEvent.Kind.DELETED else status
+
+    lead, cycle, tasks = [], [], []
+    for task_id, done_at in finished.items():
+        if final.get(task_id) != DONE or done_at < since:
+            continue
+        row = {"task_id": task_id, "done_at": done_at.isoformat(), "lead_h": None, "cycle_h": None}
+        if task_id in created:
+            row["lead_h"] = round((done_at - created[task_id]).total_seconds() / 3600, 1)
+            lead.append(row["lead_h"])
+        if task_id in started and started[task_id] <= done_at:
+            row["cycle_h"] = round((done_at - started[task_id]).total_seconds() / 3600, 1)
+            cycle.append(row["cycle_h"])
+        tasks.append(row)
+    return {
+        "since": since.isoformat(),
+        "until": until.isoformat(),
+        "lead_time": _summary(lead),
+        "cycle_time": _summary(cycle),
+        "tasks": tasks,
+    }
+
+
+def default_since(days: int):
+    return timezone.now() - timedelta(days=days)
+
+
+class _Echo:
+    """Псевдофайл для csv.writer: возвращает строку, а не пишет её (потоковый ответ)."""
+
+    def write(self, value):
+        return value
+
+
+def export_rows(queryset):
+    """CSV-строки журнала одна за другой: память не зависит от размера выгрузки."""
+    writer = csv.writer(_Echo())
+    kinds = dict(TaskEvent.Kind.choices)
+    yield writer.writerow([*EXPORT_FIELDS, "kind_label", "status_label"])
+    for row in queryset.order_by("id").values_list(*EXPORT_FIELDS).iterator(chunk_size=5000):
+        kind, status = row[5], row[6]
+        yield writer.writerow([*row, kinds.get(kind, ""), STATUS_BY_CODE.get(status, "")])
@@ -0,0 +1,280 @@
+"""
+Полнотекстовый поиск по заявкам, задачам, комментариям и сообщениям.
+
+Индекс — виртуальная таблица SQLite FTS5 ``crm_search`` (создаётся миграцией
+0010). Ключ строки кодирует тип и id документа (rowid = id * 4 + код типа),
+поэтому обновление и удаление документа — поиск по rowid, без сканирования.
+Индекс обновляется сигналами (crm.signals) в той же транзакции, что и сама
+запись; после bulk-операций в обход сигналов — ``manage.py rebuild_search_index``.
+
+Бэкенд выбирается settings.CRM_SEARCH_BACKEND (путь к классу) или по
+движку БД: для SQLite — FTS5, иначе ScanBackend (icontains, без индекса),
+пока не появится бэкенд на tsvector для PostgreSQL с тем же интерфейсом.
+
+Права проверяются в самом запросе к бэкенду: для не-менеджера каждый тип
+ограничен подзапросом видимых id (visible_ids) — разработчику его задачи и
+их обсуждение, клиенту его заявки и переписка по ним. Владелец в индекс не
+пишется: смена исполнителя не требует переиндексации.
+"""
+
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Q
+from django.urls import reverse
+from django.utils.module_loading import import_string
+
+from accounts.models import User
+from .models import ClientRequest, Comment, Message, Task
+
+KINDS = ("request", "task", "comment", "message")
+KIND_CODES = {kind: code for code, kind in enumerate(KINDS)}
+MODELS = {"request": ClientRequest, "task": Task, "comment": Comment, "message": Message}
+KIND_BY_MODEL = {model: kind for kind, model in MODELS.items()}
+# Поля, изменение которых требует переиндексации
+TEXT_FIELDS = {
+    "request": ("title", "description"),
+    "task": ("title", "description"),
+    "comment": ("text",),
+    "message": ("text",),
+}
+
+TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+@dataclass
+class Hit:
+    kind: str
+    pk: int
+    snippet: str
+    score: float
+
+
+def document(kind: str, obj) -> tuple[str, str]:
+    """(заголовок, текст) документа; заголовок весит больше при ранжировании."""
+    if kind in ("request", "task"):
+        return obj.title, obj.description
+    return "", obj.text
+
+
+def fts_query(text: str) -> str | None:
+    """Пользовательский ввод -> запрос FTS5: все слова обязательны, последнее — как префикс."""
+    tokens = TOKEN_RE.findall(text)[:16]
+    if not tokens:
+        return None
+    return " ".join(f'"{t}"' for t in tokens) + "*"
+
+
+class SearchBackend:
+    def index(self, kind: str, pk: int, title: str, body: str) -> None:
+        raise NotImplementedError
+
+    def remove(self, kind: str, pk: int) -> None:
+        raise NotImplementedError
+
+    def search(self, text: str, kinds: tuple[str, ...], limit: int, scope: dict | None = None) -> list[Hit]:
+        """scope — {тип: QuerySet из id}: документы типа только из этих id; тип без записи — все."""
+        raise NotImplementedError
+
+    def rebuild(self) -> int:
+        raise NotImplementedError
+
+
+class SqliteFtsBackend(SearchBackend):
+    table = "crm_search"
+
+    def index(self, kind, pk, title, body):
+        rowid = pk * len(KINDS) + KIND_CODES[kind]
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {self.table} WHERE rowid = %s", [rowid])
+            cursor.execute(f"INSERT INTO {self.table} (rowid, title, body) VALUES (%s, %s, %s)", [rowid, title, body])
+
+    def remove(self, kind, pk):
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {self.table} WHERE rowid = %s", [pk * len(KINDS) + KIND_CODES[kind]])
+
+    def search(self, text, kinds, limit, scope=None):
+        match = fts_query(text)
+        if match is None:
+            return []
+        scope = scope or {}
+        conditions, params = [], []
+        for kind in kinds:
+            code = f"rowid %% {len(KINDS)} = {KIND_CODES[kind]}"
+            if kind not in scope:
+                conditions.append(code)
+                continue
+            # id документа = rowid / 4 (целочисленное деление), подзапрос прав — из ORM
+            subquery, subparams = scope[kind].query.sql_with_params()
+            conditions.append(f"({code} AND rowid / {len(KINDS)} IN ({subquery}))")
+            params.extend(subparams)
+        # bm25: чем меньше, тем релевантнее; заголовок весит в 5 раз больше текста
+        sql = (
+            f"SELECT rowid, snippet({self.table}, -1, '', '', '…', 16), bm25({self.table}, 5.0, 1.0) AS rank "
+            f"FROM {self.table} WHERE {self.table} MATCH %s AND ({' OR '.join(conditions)}) "
+            f"ORDER BY rank LIMIT %s"
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(sql, [match, *params, limit])
+            rows = cursor.fetchall()
+        return [Hit(KINDS[rowid % len(KINDS)], rowid // len(KINDS), snippet, -rank) for rowid, snippet, rank in rows]
+
+    def rebuild(self):
+        total = 0
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {self.table}")
+            for kind, model in MODELS.items():
+                fields = TEXT_FIELDS[kind]
+                rows = model.objects.values_list("id", *fields).iterator(chunk_size=2000)
+                batch = []
+                for pk, *texts in rows:
+                    title, body = ("", texts[0]) if len(texts) == 1 else texts
+                    batch.append([pk * len(KINDS) + KIND_CODES[kind], title, body])
+                    if len(batch) == 2000:
+                        cursor.executemany(f"INSERT INTO {self.table} (rowid, title, body) VALUES (%s, %s, %s)", batch)
+                        total += len(batch)
+                        batch = []
+                if batch:
+                    cursor.executemany(f"INSERT INTO {self.table} (rowid, title, body) VALUES (%s, %s, %s)", batch)
+                    total += len(batch)
+            cursor.execute(f"INSERT INTO {self.table} ({self.table}) VALUES ('optimize')")
+        return total
+
+
+class ScanBackend(SearchBackend):
+    """Запасной вариант без индекса (icontains по всем словам) для БД без FTS5."""
+
+    def index(self, kind, pk, title, body):
+        pass
+
+    def remove(self, kind, pk):
+        pass
+
+    def search(self, text, kinds, limit, scope=None):
+        tokens = TOKEN_RE.findall(text)[:16]
+        if not tokens:
+            return []
+        scope = scope or {}
+        hits = []
+        for kind in kinds:
+            fields = TEXT_FIELDS[kind]
+            condition = Q()
+            for token in tokens:
+                condition &= Q(*(Q(**{f"{f}__icontains": token}) for f in fields), _connector=Q.OR)
+            if kind in scope:
+                condition &= Q(pk__in=scope[kind])
+            for pk, *texts in MODELS[kind].objects.filter(condition).values_list("id", *fields)[:limit]:
+                hits.append(Hit(kind, pk, texts[-1][:200], 0.0))
+        return hits[:limit]
+
+    def rebuild(self):
+        return 0
+
+
+@lru_cache(maxsize=None)
+def get_backend() -> SearchBackend:
+    path = getattr(settings, "CRM_SEARCH_BACKEND", None)
+    if path:
+        return import_string(path)()
+    return SqliteFtsBackend() if connection.vendor == "sqlite" else ScanBackend()
+
+
+def index_instance(instance) -> None:
+    kind = KIND_BY_MODEL[type(instance)]
+    get_backend().index(kind, instance.pk, *document(kind, instance))
+
+
+def remove_instance(instance) -> None:
+    get_backend().remove(KIND_BY_MODEL[type(instance)], instance.pk)
+
+
+# ---- Права и выдача ----
+
+
+def visible_kinds(user) -> tuple[str, ...]:
+    if user.role == User.Role.MANAGER:
+        return KINDS
+    if user.role == User.Role.DEVELOPER:
+        return ("task", "comment")
+    return ("request", "message")
+
+
+def visible_ids(user, kind: str):
+    """QuerySet id документов типа kind, доступных не-менеджеру."""
+    if kind == "request":
+        return ClientRequest.objects.filter(client=user).values("id")
+    if kind == "task":
+        return Task.objects.filter(assignee=user).values("id")
+    if kind == "comment":
+        return Comment.objects.filter(task__assignee=user).values("id")
+    return Message.objects.filter(request__client=user).values("id")
+
+
+def _hydrate(user, kind: str, ids: list[int]) -> dict[int, dict]:
+    """Один запрос на тип: видимые пользователю документы с заголовком и ссылкой."""
+    is_manager = user.role == User.Role.MANAGER
+    if kind == "request":
+        qs = ClientRequest.objects.filter(pk__in=ids)
+        if not is_manager:
+            qs = qs.filter(client=user)
+        route = "crm:manager_request_detail" if is_manager else "crm:client_request_detail"
+        return {r["id"]: {"title": r["title"], "url": reverse(route, args=[r["id"]])} for r in qs.values("id", "title")}
+    if kind == "task":
+        qs = Task.objects.filter(pk__in=ids)
+        if not is_manager:
+            qs = qs.filter(assignee=user)
+        return {
+            r["id"]: {
+                "title": r["title"],
+                "url": reverse("crm:kanban_board", args=[r["project_id"]]) if is_manager else None,
+            }
+            for r in qs.values("id", "title", "project_id")
+        }
+    if kind == "comment":
+        qs = Comment.objects.filter(pk__in=ids)
+        if not is_manager:
+            qs = qs.filter(task__assignee=user)
+        return {
+            r["id"]: {
+                "title": r["task__title"],
+                "task_id": r["task_id"],
+                "url": reverse("crm:kanban_board", args=[r["task__project_id"]]) if is_manager else None,
+            }
+            for r in qs.values("id", "task_id", "task__title", "task__project_id")
+        }
+    qs = Message.objects.filter(pk__in=ids)
+    if not is_manager:
+        qs = qs.filter(request__client=user)
+    route = "crm:manager_request_detail" if is_manager else "crm:client_request_detail"
+    return {
+        r["id"]: {"title": r["request__title"], "url": reverse(route, args=[r["request_id"]])}
+        for r in qs.values("id", "request_id", "request__title")
+    }
+
+
+def search(user, text: str, kinds: tuple[str, ...] | None = None, limit: int = 20) -> list[dict]:
+    """Ранжированные хиты, отфильтрованные по правам пользователя."""
+    allowed = visible_kinds(user)
+    kinds = tuple(k for k in (kinds or allowed) if k in allowed)
+    if not kinds:
+        return []
+    scope = None if user.role == User.Role.MANAGER else {kind: visible_ids(user, kind) for kind in kinds}
+    hits = get_backend().search(text, kinds, limit, scope)
+
+    by_kind: dict[str, list[int]] = {}
+    for hit in hits:
+        by_kind.setdefault(hit.kind, []).append(hit.pk)
+    visible = {kind: _hydrate(user, kind, ids) for kind, ids in by_kind.items()}
+
+    results = []
+    for hit in hits:
+        meta = visible[hit.kind].get(hit.pk)
+        if meta is None:
+            continue
+        results.append({"kind": hit.kind, "id": hit.pk, "snippet": hit.snippet, "score": round(hit.score, 3), **meta})
+        if len(results) == limit:
+            break
+    return results
@@ -0,0 +1,147 @@
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from accounts.models import User
+
+from . import attachments, db, events, fragments, pool, realtime, search, stats, thumbnails
+from .models import (
+    Attachment,
+    ClientRequest,
+    Comment,
+    DeveloperTaskType,
+    Message,
+    Project,
+    RequestCheckpoint,
+    Sprint,
+    Task,
+    TaskCheckpoint,
+    TaskTombstone,
+)
+
+
+@receiver(post_save, sender=Project)
+def project_saved(sender, instance: Project, created: bool, **kwargs):
+    if created:
+        stats.project_created(instance)
+
+
+@receiver(post_delete, sender=Task)
+def task_deleted(sender, instance: Task, **kwargs):
+    # Надгробие нужно синхронизации доски: иначе удалённая карточка так и останется у других менеджеров
+    TaskTombstone.objects.create(task_id=instance.pk, project_id=instance.project_id)
+    state = instance.saved_state() or instance.current_state()
+    stats.tasks_changed([(state, None)])
+    events.record([(instance.pk, state, None)])
+    realtime.publish(realtime.project_channel(instance.project_id), "task", {"ids": [instance.pk]})
+
+
+@receiver(post_save, sender=Task)
+def task_saved(sender, instance: Task, created: bool, **kwargs):
+    state = instance.current_state()
+    if "project_id" not in state:
+        # загружена через only() без project — неполное состояние, stats пересчитает проект целиком
+        state["project_id"] = instance.project_id
+    previous = None if created else instance.previous_state or {}
+    stats.tasks_changed([(previous, state)])
+    events.record([(instance.pk, previous, state)])
+    realtime.publish(realtime.project_channel(instance.project_id), "task", {"ids": [instance.pk]})
+
+
+@receiver(post_save, sender=TaskCheckpoint)
+@receiver(post_delete, sender=TaskCheckpoint)
+def task_checkpoint_changed(sender, instance: TaskCheckpoint, created: bool = False, **kwargs):
+    project_id = Task.objects.filter(pk=instance.task_id).values_list("project_id", flat=True).first()
+    if project_id is None:
+        return
+    if kwargs["signal"] is post_delete:
+        stats.checkpoint_changed(project_id, instance.saved_state() or instance.current_state(), None)
+    else:
+        stats.checkpoint_changed(project_id, None if created else instance.previous_state, instance.current_state())
+    realtime.publish(realtime.project_channel(project_id), "checkpoint", {"task_id": instance.task_id})
+
+
+@receiver(post_save, sender=Comment)
+def comment_created(sender, instance: Comment, created: bool, **kwargs):
+    if created:
+        realtime.publish(
+            realtime.project_channel(instance.task.project_id),
+            "chat",
+            {"task_id": instance.task_id, "id": instance.pk},
+        )
+
+
+@receiver(post_save, sender=RequestCheckpoint)
+@receiver(post_delete, sender=RequestCheckpoint)
+def request_checkpoint_changed(sender, instance: RequestCheckpoint, **kwargs):
+    realtime.publish(realtime.request_channel(instance.request_id), "checkpoint", {"id": instance.pk})
+
+
+@receiver(post_save, sender=Message)
+def message_created(sender, instance: Message, created: bool, **kwargs):
+    if created:
+        realtime.publish(realtime.request_channel(instance.request_id), "message", {"id": instance.pk})
+
+
+@receiver(post_save, sender=ClientRequest)
+@receiver(post_save, sender=Task)
+@receiver(post_save, sender=Comment)
+@receiver(post_save, sender=Message)
+def search_document_saved(sender, instance, update_fields=None, **kwargs):
+    # save(update_fields=[...]) без текстовых полей (статус, порядок) индекс не трогает
+    fields = search.TEXT_FIELDS[search.KIND_BY_MODEL[sender]]
+    if update_fields is None or set(update_fields) & set(fields):
+        search.index_instance(instance)
+
+
+@receiver(post_delete, sender=ClientRequest)
+@receiver(post_delete, sender=Task)
+@receiver(post_delete, sender=Comment)
+@receiver(post_delete, sender=Message)
+def search_document_deleted(sender, instance, **kwargs):
+    search.remove_instance(instance)
+
+
+@receiver(post_save, sender=Sprint)
+@receiver(post_delete, sender=Sprint)
+def sprint_changed(sender, instance: Sprint, **kwargs):
+    # даты спринта задают ось burndown
+    events.invalidate_sprints([instance.pk])
+
+
+@receiver(post_save, sender=DeveloperTaskType)
+@receiver(post_delete, sender=DeveloperTaskType)
+def developer_task_type_changed(sender, **kwargs):
+    pool.invalidate_mapping()
+
+
+@receiver(post_delete, sender=Attachment)
+def attachment_deleted(sender, instance: Attachment, **kwargs):
+    attachments.release(instance)
+
+
+@receiver(post_save, sender=Attachment)
+def attachment_saved(sender, instance: Attachment, created: bool, **kwargs):
+    if created and instance.content_type.startswith("image/"):
+        thumbnails.enqueue(instance.file.name, instance.sha256)
+
+
+@receiver(post_save, sender=User)
+def user_photo_saved(sender, instance: User, update_fields=None, **kwargs):
+    # last_login и прочие save(update_fields=...) без фото очередь не трогают
+    if update_fields is None or "photo" in update_fields:
+        thumbnails.enqueue(instance.photo.name if instance.photo else "", instance.photo_sha256)
+
+
+@receiver(post_save, sender=User)
+@receiver(pre_delete, sender=User)
+def user_name_changed(sender, instance: User, update_fields=None, **kwargs):
+    # имя пользователя есть в кешированных карточках и строках задач, а updated_at задач не меняется;
+    # при удалении — до SET_NULL, пока задачи ещё ссылаются на пользователя
+    if update_fields is None or "username" in update_fields:
+        fragments.bump_for_user(instance.pk)
+
+
+@receiver(connection_created)
+def connection_opened(sender, connection, **kwargs):
+    db.configure_sqlite(sender, connection)
@@ -0,0 +1,96 @@
+"""
+Файловая очередь для фоновых воркеров (заявки, превью картинок).
+
+Запись — строка JSON, дописанная одним O_APPEND-write в <каталог>/queue.jsonl:
+строки параллельных процессов не перемешиваются, внешний брокер не нужен.
+Разбор — атомарное переименование очереди в batch-<время>.jsonl; пачка
+удаляется после успешной обработки, упавшая пачка разбирается повторно
+(доставка «хотя бы один раз»).
+
+Писатель мог открыть queue.jsonl до переименования и записать после — строка
+попала бы в уже прочитанную пачку и пропала вместе с ней. Поэтому запись идёт
+под разделяемой блокировкой flock, переименование — под исключительной, а
+писатель после блокировки проверяет, что открытый файл всё ещё queue.jsonl
+(иначе открывает заново). Без fcntl (Windows) блокировок нет.
+"""
+
+import json
+import os
+import time
+from pathlib import Path
+from typing import Callable
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+QUEUE_NAME = "queue.jsonl"
+BATCH_PREFIX = "batch-"
+
+
+def _lock(fd: int, exclusive: bool = False) -> None:
+    if fcntl is not None:
+        fcntl.flock(fd, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+
+
+def _is_current(fd: int, path: Path) -> bool:
+    """fd всё ещё открыт на path, а не на файле, который воркер уже переименовал в пачку."""
+    try:
+        return os.path.samestat(os.fstat(fd), os.stat(path))
+    except FileNotFoundError:
+        return False
+
+
+def append(directory: Path, record: dict) -> None:
+    directory.mkdir(parents=True, exist_ok=True)
+    line = (json.dumps(record, ensure_ascii=False) + "\n").encode()
+    queue = directory / QUEUE_NAME
+    while True:
+        fd = os.open(queue, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o640)
+        try:
+            _lock(fd)
+            if fcntl is None or _is_current(fd, queue):
+                os.write(fd, line)
+                return
+        finally:
+            # закрытие снимает и блокировку
+            os.close(fd)
+
+
+def _claim_queue(directory: Path) -> None:
+    queue = directory / QUEUE_NAME
+    if not queue.exists() or not queue.stat().st_size:
+        return
+    fd = os.open(queue, os.O_RDONLY)
+    try:
+        # ждёт писателей, которые уже пишут; пришедшие позже увидят, что файл переименован
+        _lock(fd, exclusive=True)
+        if fcntl is None or _is_current(fd, queue):
+            os.replace(queue, directory / f"{BATCH_PREFIX}{time.time_ns()}.jsonl")
+    finally:
+        os.close(fd)
+
+
+def _read(path: Path) -> list[dict]:
+    rows = []
+    with path.open(encoding="utf-8") as fh:
+        for line in fh:
+            try:
+                rows.append(json.loads(line))
+            except ValueError:
+                # строка, оборванная при аварии процесса, — пропускаем
+                continue
+    return rows
+
+
+def drain(directory: Path, handle: Callable[[list[dict]], int]) -> int:
+    """Передаёт handle все накопленные записи пачками; возвращает сумму его результатов."""
+    if not directory.exists():
+        return 0
+    _claim_queue(directory)
+    total = 0
+    for path in sorted(directory.glob(f"{BATCH_PREFIX}*.jsonl")):
+        total += handle(_read(path))
+        path.unlink()
+    return total
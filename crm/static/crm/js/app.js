@@ -14,14 +14,15 @@ document.addEventListener('DOMContentLoaded', () => {
   const cols = document.querySelectorAll('[data-col]');
   let dragged = null;
 
-  document.querySelectorAll('[data-task]').forEach(card => {
-    card.draggable = true;
-    card.addEventListener('dragstart', e => {
-      dragged = card;
-      e.dataTransfer.effectAllowed = 'move';
-    });
-    card.addEventListener('dragend', () => { dragged = null; });
+  document.querySelectorAll('[data-task]').forEach(card => { card.draggable = true; });
+  // делегирование: карточки, добавленные синхронизацией, работают так же, как отрисованные сервером
+  document.addEventListener('dragstart', e => {
+    const card = e.target.closest && e.target.closest('[data-task]');
+    if (!card) return;
+    dragged = card;
+    e.dataTransfer.effectAllowed = 'move';
   });
+  document.addEventListener('dragend', () => { dragged = null; });
 
   cols.forEach(col => {
     col.addEventListener('dragover', e => {
@@ -31,29 +32,80 @@ document.addEventListener('DOMContentLoaded', () => {
     col.addEventListener('drop', e => {
       e.preventDefault();
       if (!dragged) return;
-      col.querySelector('[data-list]').appendChild(dragged);
-      const taskId = dragged.getAttribute('data-task');
+      const list = col.querySelector('[data-list]');
+      // вставляем перед первой карточкой, чья середина ниже курсора
+      const before = Array.from(list.children).find(el => {
+        if (el === dragged) return false;
+        const rect = el.getBoundingClientRect();
+        return e.clientY < rect.top + rect.height / 2;
+      });
+      if (before) list.insertBefore(dragged, before);
+      else list.appendChild(dragged);
+      const taskId = parseInt(dragged.getAttribute('data-task'), 10);
       const newStatus = col.getAttribute('data-col');
-      fetch(`/kanban/move/`, {
+      const position = Array.from(list.children).indexOf(dragged);
+      fetch(`/kanban/move/batch/`, {
         method: 'POST',
         headers: { 'Content-Type': 'application/json', 'X-CSRFToken': getCsrfToken() },
-        body: JSON.stringify({ id: taskId, status: newStatus })
-      }).catch(() => {});
+        body: JSON.stringify({ moves: [{ id: taskId, status: newStatus, position }] })
+      })
+        .then(r => r.json())
+        .then(resp => {
+          if (!resp.ok) return;
+          // настоящие ключи порядка: с ними сравнивает placeKanbanCard при синхронизации
+          Object.entries(resp.orders).forEach(([id, order]) => {
+            const card = document.querySelector(`[data-task="${id}"]`);
+            if (card) card.setAttribute('data-order', order);
+          });
+        })
+        .catch(() => {});
     });
   });
 
+  // Kanban incremental sync (other managers' moves)
+  const board = document.querySelector('.kanban[data-changes-url]');
+  if (board) {
+    initKanbanSync(board);
+  }
+
   // Kanban task panel (details/checkpoints/chat)
   const taskPanel = document.getElementById('task-panel');
   if (taskPanel) {
     initKanbanTaskPanel(taskPanel);
   }
 
+  // Developer open tasks: claim without page reload
+  document.querySelectorAll('form[data-claim]').forEach(form => {
+    form.addEventListener('submit', e => {
+      e.preventDefault();
+      fetch(form.action, {
+        method: 'POST',
+        headers: { 'Accept': 'application/json', 'X-CSRFToken': getCsrfToken() },
+      })
+        .then(r => r.json())
+        .then(data => {
+          const item = form.closest('li');
+          if (data.ok) {
+            item.textContent = 'Задача ваша — она уже в работе';
+          } else if (data.error === 'has_active') {
+            alert('Сначала завершите текущую задачу');
+          } else {
+            item.remove();  // задачу успел взять кто-то другой
+          }
+        })
+        .catch(() => form.submit());
+    });
+  });
+
   // Request checkpoints timeline (manager request detail)
   const timeline = document.getElementById('cp-timeline');
   if (timeline) {
     initRequestTimeline(timeline);
   }
 
+  // Request message thread (client and manager request detail)
+  document.querySelectorAll('[data-thread]').forEach(initMessageThread);
+
   // Matrix visual ornaments (for landing page)
   const matrix = document.querySelector('.matrix-bg');
   if (matrix) {
@@ -98,6 +150,8 @@ function initKanbanTaskPanel(panel) {
   let apiUrl = null;
   let checkpoints = [];
   let chat = [];
+  let chatHasMore = false;
+  let chatLoading = false;
 
   function show() {
     panel.classList.remove('task-panel--hidden');
@@ -187,34 +241,99 @@ function initKanbanTaskPanel(panel) {
     apiUrl = `/manager/tasks/${taskId}/panel/`;
     show();
     setActiveTab('checkpoints');
-    return apiRequest({ action: 'detail' }).then(resp => {
-      if (!resp.ok) return;
-      const t = resp.task;
-      if (titleEl) titleEl.textContent = t.title;
-      if (metaEl) metaEl.textContent = `${t.task_type_label} • ${t.status_label}`;
-      if (assigneeEl) assigneeEl.textContent = t.assignee || '—';
-      if (createdByEl) createdByEl.textContent = t.created_by || '—';
-      if (dueEl) dueEl.textContent = t.due_date || '—';
-      if (spEl) spEl.textContent = String(t.story_points ?? 0);
-      checkpoints = resp.checkpoints || [];
-      chat = resp.chat || [];
+    // три GET-подресурса с ETag: повторное открытие той же карточки браузер перепроверяет и получает 304
+    const base = `/manager/tasks/${taskId}`;
+    const getJson = url => fetch(url, { headers: { Accept: 'application/json' } }).then(r => r.json());
+    return Promise.all([
+      getJson(`${base}/meta/`),
+      getJson(`${base}/checkpoints/`),
+      getJson(`${base}/chat/`),
+    ]).then(([metaResp, cpResp, chatResp]) => {
+      if (taskId !== currentTaskId) return;
+      if (metaResp.ok) {
+        const t = metaResp.task;
+        if (titleEl) titleEl.textContent = t.title;
+        if (metaEl) metaEl.textContent = `${t.task_type_label} • ${t.status_label}`;
+        if (assigneeEl) assigneeEl.textContent = t.assignee || '—';
+        if (createdByEl) createdByEl.textContent = t.created_by || '—';
+        if (dueEl) dueEl.textContent = t.due_date || '—';
+        if (spEl) spEl.textContent = String(t.story_points ?? 0);
+      }
+      checkpoints = cpResp.ok ? cpResp.checkpoints : [];
+      chat = chatResp.ok ? chatResp.messages : [];
+      chatHasMore = chatResp.ok && chatResp.has_more;
       renderCheckpoints();
       renderChat();
     });
   }
 
-  // click on kanban cards (ignore drag)
-  document.querySelectorAll('[data-task]').forEach(card => {
-    card.addEventListener('click', e => {
-      if (card === window.__kanbanDragged) return;
-      const id = parseInt(card.getAttribute('data-task') || '0', 10);
-      if (!id) return;
-      loadTask(id).catch(() => {});
-    });
-    card.addEventListener('dragstart', () => {
-      window.__kanbanDragged = card;
-      setTimeout(() => { window.__kanbanDragged = null; }, 50);
+  // подгрузка более старых сообщений при прокрутке чата вверх
+  function loadOlderChat() {
+    if (!currentTaskId || !chatHasMore || chatLoading || !chat.length) return;
+    chatLoading = true;
+    const taskId = currentTaskId;
+    fetch(`/manager/tasks/${taskId}/chat/?before_id=${chat[0].id}`, { headers: { Accept: 'application/json' } })
+      .then(r => r.json())
+      .then(resp => {
+        if (!resp.ok || taskId !== currentTaskId) return;
+        const prevHeight = chatList.scrollHeight;
+        chat = resp.messages.concat(chat);
+        chatHasMore = resp.has_more;
+        renderChat();
+        chatList.scrollTop = chatList.scrollHeight - prevHeight;
+      })
+      .catch(() => {})
+      .finally(() => { chatLoading = false; });
+  }
+
+  // push-события по открытой задаче: дочитываем только новое
+  document.addEventListener('crm:push', e => {
+    const { event, data } = e.detail;
+    if (!currentTaskId || data.task_id !== currentTaskId) return;
+    const base = `/manager/tasks/${currentTaskId}`;
+    if (event === 'chat') {
+      if (chat.some(m => m.id === data.id)) return;
+      const after = chat.length ? `?after_id=${chat[chat.length - 1].id}` : '';
+      fetch(`${base}/chat/${after}`, { headers: { Accept: 'application/json' } })
+        .then(r => r.json())
+        .then(resp => {
+          if (!resp.ok) return;
+          const known = new Set(chat.map(m => m.id));
+          chat = chat.concat(resp.messages.filter(m => !known.has(m.id)));
+          renderChat();
+        })
+        .catch(() => {});
+    } else if (event === 'checkpoint') {
+      fetch(`${base}/checkpoints/`, { headers: { Accept: 'application/json' } })
+        .then(r => r.json())
+        .then(resp => {
+          if (!resp.ok) return;
+          checkpoints = resp.checkpoints;
+          renderCheckpoints();
+        })
+        .catch(() => {});
+    }
+  });
+
+  if (chatList) {
+    chatList.addEventListener('scroll', () => {
+      if (chatList.scrollTop < 40) loadOlderChat();
     });
+  }
+
+  // click on kanban cards (ignore drag)
+  document.addEventListener('click', e => {
+    const card = e.target.closest && e.target.closest('[data-task]');
+    if (!card || card === window.__kanbanDragged) return;
+    const id = parseInt(card.getAttribute('data-task') || '0', 10);
+    if (!id) return;
+    loadTask(id).catch(() => {});
+  });
+  document.addEventListener('dragstart', e => {
+    const card = e.target.closest && e.target.closest('[data-task]');
+    if (!card) return;
+    window.__kanbanDragged = card;
+    setTimeout(() => { window.__kanbanDragged = null; }, 50);
   });
 
   if (closeBtn) closeBtn.addEventListener('click', () => hide());
@@ -242,7 +361,8 @@ function initKanbanTaskPanel(panel) {
       apiRequest({ action: 'chat_add', text })
         .then(resp => {
           if (!resp.ok) return;
-          chat.push(resp.message);
+          // push-событие о собственном сообщении могло прийти раньше ответа
+          if (!chat.some(m => m.id === resp.message.id)) chat.push(resp.message);
           if (chatText) chatText.value = '';
           renderChat();
         })
@@ -251,6 +371,118 @@ function initKanbanTaskPanel(panel) {
   }
 }
 
+function renderKanbanCard(c) {
+  const card = document.createElement('div');
+  card.className = 'task';
+  card.draggable = true;
+  card.setAttribute('data-task', c.id);
+
+  const title = document.createElement('div');
+  const meta = document.createElement('div');
+  meta.className = 'meta';
+  const type = document.createElement('span');
+  const sp = document.createElement('span');
+  meta.appendChild(type);
+  meta.appendChild(sp);
+  const meta2 = document.createElement('div');
+  meta2.className = 'meta';
+  const assignee = document.createElement('span');
+  assignee.className = 'muted';
+  const due = document.createElement('span');
+  due.className = 'muted';
+  meta2.appendChild(assignee);
+  meta2.appendChild(due);
+  card.appendChild(title);
+  card.appendChild(meta);
+  card.appendChild(meta2);
+  fillKanbanCard(card, c);
+  return card;
+}
+
+function fillKanbanCard(card, c) {
+  card.setAttribute('data-order', c.order);
+  card.setAttribute('data-version', c.version);
+  const [title, meta, meta2] = card.children;
+  title.textContent = c.title;
+  meta.children[0].textContent = c.task_type_label;
+  meta.children[1].textContent = `SP: ${c.story_points}`;
+  meta2.children[0].textContent = `Исп: ${c.assignee || '—'}`;
+  // d.m, как фильтр date в шаблоне
+  meta2.children[1].textContent = c.due_date ? c.due_date.slice(8, 10) + '.' + c.due_date.slice(5, 7) : '';
+}
+
+function placeKanbanCard(list, card) {
+  const order = parseInt(card.getAttribute('data-order') || '0', 10);
+  const next = Array.from(list.children).find(
+    el => el !== card && parseInt(el.getAttribute('data-order') || '0', 10) > order,
+  );
+  if (next) list.insertBefore(card, next);
+  else list.appendChild(card);
+}
+
+function initKanbanSync(board) {
+  const url = board.getAttribute('data-changes-url');
+  const projectId = board.getAttribute('data-project');
+  let cursor = board.getAttribute('data-cursor') || '';
+  let busy = false;
+
+  function applyCard(c) {
+    const list = board.querySelector(`[data-col="${c.status}"] [data-list]`);
+    if (!list) return;
+    let card = board.querySelector(`[data-task="${c.id}"]`);
+    if (card) {
+      // локальная версия новее или та же — ответ устарел
+      if (parseInt(card.getAttribute('data-version') || '0', 10) >= c.version) return;
+      fillKanbanCard(card, c);
+    } else {
+      card = renderKanbanCard(c);
+    }
+    placeKanbanCard(list, card);
+  }
+
+  function poll() {
+    if (busy || document.hidden) return;
+    busy = true;
+    const params = new URLSearchParams({ project: projectId, cursor });
+    fetch(`${url}?${params}`, { headers: { Accept: 'application/json' } })
+      .then(r => r.json())
+      .then(resp => {
+        if (!resp.ok) return;
+        // курсор старше хранения следов удалений: дельтой доску уже не догнать
+        if (resp.reset) { window.location.reload(); return; }
+        resp.cards.forEach(applyCard);
+        resp.deleted.forEach(id => {
+          const card = board.querySelector(`[data-task="${id}"]`);
+          if (card) card.remove();
+        });
+        cursor = resp.cursor || cursor;
+        if (resp.has_more) setTimeout(poll, 0);
+      })
+      .catch(() => {})
+      .finally(() => { busy = false; });
+  }
+
+  board.kanbanSync = poll;
+
+  // Push-канал (SSE): при живом соединении опрос нужен только как страховка
+  let live = false;
+  const streamUrl = board.getAttribute('data-stream-url');
+  if (streamUrl && window.EventSource) {
+    const source = new EventSource(streamUrl);
+    source.addEventListener('open', () => { live = true; });
+    source.addEventListener('error', () => { live = false; });
+    source.addEventListener('task', () => poll());
+    ['chat', 'checkpoint'].forEach(name => source.addEventListener(name, e => {
+      document.dispatchEvent(new CustomEvent('crm:push', { detail: { event: name, data: JSON.parse(e.data) } }));
+    }));
+  }
+  let ticks = 0;
+  setInterval(() => {
+    ticks += 1;
+    if (!live || ticks % 6 === 0) poll();
+  }, 5000);
+}
+
 function initRequestTimeline(root) {
   const apiUrl = root.getAttribute('data-api-url');
   const scriptEl = document.getElementById('cp-data');
@@ -360,7 +592,7 @@ function initRequestTimeline(root) {
           child.classList.toggle('cp-point--first', idx === 0);
         });
 
-        saveOrder(list);
+        saveMove(list, dragSrc);
       });
 
       el.addEventListener('dragend', () => {
@@ -482,32 +714,28 @@ function initRequestTimeline(root) {
       .catch(() => {});
   }
 
-  function saveOrder(list) {
-    const ids = Array.from(list.querySelectorAll('.cp-point')).map(el =>
-      parseInt(el.getAttribute('data-id') || '0', 10),
-    );
-    if (!ids.length) return;
+  function saveMove(list, moved) {
+    const id = parseInt(moved.getAttribute('data-id') || '0', 10);
+    const position = Array.from(list.querySelectorAll('.cp-point')).indexOf(moved);
+    if (!id || position < 0) return;
+    // на сервере переносится одна строка; в ответе — новые ключи порядка изменённых чекпоинтов
     fetch(apiUrl, {
       method: 'POST',
       headers: {
         'Content-Type': 'application/json',
         'X-CSRFToken': getCsrfToken(),
       },
-      body: JSON.stringify({ action: 'reorder', ids }),
-    }).catch(() => {});
-
-    // локально обновим порядок
-    const map = new Map();
-    checkpoints.forEach(c => map.set(c.id, c));
-    const sorted = ids
-      .map((id, idx) => {
-        const cp = map.get(id);
-        if (cp) cp.order = idx + 1;
-        return cp;
+      body: JSON.stringify({ action: 'move', id, position }),
+    })
+      .then(r => r.json())
+      .then(resp => {
+        if (!resp.ok) return;
+        checkpoints.forEach(cp => {
+          if (resp.orders[cp.id] !== undefined) cp.order = resp.orders[cp.id];
+        });
+        render();
       })
-      .filter(Boolean);
-    checkpoints = sorted;
-    render();
+      .catch(() => {});
   }
 
   if (addBtn) {
@@ -565,6 +793,126 @@ function initRequestTimeline(root) {
   render();
 }
 
+function initMessageThread(root) {
+  const apiUrl = root.getAttribute('data-api-url');
+  const list = root.querySelector('[data-thread-list]');
+  const form = root.querySelector('[data-thread-form]');
+  const text = form && form.querySelector('textarea[name="text"]');
+  const headers = { Accept: 'application/json' };
+  let loading = false;
+
+  function ids() {
+    return Array.from(list.querySelectorAll('[data-message]')).map(el => parseInt(el.getAttribute('data-message'), 10));
+  }
+
+  function renderMessage(m) {
+    const item = document.createElement('div');
+    item.className = 'task';
+    item.style.marginBottom = '8px';
+    item.setAttribute('data-message', m.id);
+    const meta = document.createElement('div');
+    const author = document.createElement('strong');
+    author.textContent = m.author__username || 'user';
+    const time = document.createElement('span');
+    time.className = 'muted';
+    time.style.fontSize = '12px';
+    time.textContent = (m.created_at || '').toString().slice(0, 16).replace('T', ' ');
+    meta.appendChild(author);
+    meta.appendChild(document.createTextNode(' '));
+    meta.appendChild(time);
+    const body = document.createElement('div');
+    body.textContent = m.text;
+    item.appendChild(meta);
+    item.appendChild(body);
+    return item;
+  }
+
+  function append(messages) {
+    const known = new Set(ids());
+    const fresh = messages.filter(m => !known.has(m.id));
+    if (!fresh.length) return;
+    const empty = list.querySelector('[data-thread-empty]');
+    if (empty) empty.remove();
+    const stick = list.scrollTop + list.clientHeight >= list.scrollHeight - 20;
+    fresh.forEach(m => list.appendChild(renderMessage(m)));
+    if (stick) list.scrollTop = list.scrollHeight;
+  }
+
+  // только новое: ?after_id=<последнее известное>
+  function loadNewer() {
+    const known = ids();
+    const after = known.length ? `?after_id=${known[known.length - 1]}` : '';
+    return fetch(`${apiUrl}${after}`, { headers })
+      .then(r => r.json())
+      .then(resp => {
+        if (!resp.ok) return;
+        append(resp.messages);
+        // за один ответ не больше страницы — дочитываем остаток, как опрос доски
+        if (resp.has_more && resp.messages.length) return loadNewer();
+      })
+      .catch(() => {});
+  }
+
+  function loadOlder() {
+    const known = ids();
+    const more = list.querySelector('[data-thread-more]');
+    if (!more || loading || !known.length) return;
+    loading = true;
+    fetch(`${apiUrl}?before_id=${known[0]}`, { headers })
+      .then(r => r.json())
+      .then(resp => {
+        if (!resp.ok) return;
+        const prevHeight = list.scrollHeight;
+        const first = list.querySelector('[data-message]');
+        resp.messages.forEach(m => list.insertBefore(renderMessage(m), first));
+        if (!resp.has_more) more.remove();
+        list.scrollTop += list.scrollHeight - prevHeight;
+      })
+      .catch(() => {})
+      .finally(() => { loading = false; });
+  }
+
+  list.scrollTop = list.scrollHeight;
+  list.addEventListener('scroll', () => { if (list.scrollTop < 40) loadOlder(); });
+  const moreBtn = list.querySelector('[data-thread-more]');
+  if (moreBtn) moreBtn.addEventListener('click', loadOlder);
+
+  if (form) {
+    form.addEventListener('submit', e => {
+      e.preventDefault();
+      const value = (text && text.value || '').trim();
+      if (!value) return;
+      fetch(apiUrl, {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json', 'X-CSRFToken': getCsrfToken(), ...headers },
+        body: JSON.stringify({ text: value }),
+      })
+        .then(r => r.json())
+        .then(resp => {
+          if (!resp.ok) return;
+          append([resp.message]);
+          if (text) text.value = '';
+          list.scrollTop = list.scrollHeight;
+        })
+        .catch(() => form.submit());
+    });
+  }
+
+  // Push-канал заявки; без него — редкий опрос, который при отсутствии новых сообщений даёт 304
+  let live = false;
+  const streamUrl = root.getAttribute('data-stream-url');
+  if (streamUrl && window.EventSource) {
+    const source = new EventSource(streamUrl);
+    source.addEventListener('open', () => { live = true; });
+    source.addEventListener('error', () => { live = false; });
+    source.addEventListener('message', e => {
+      const data = JSON.parse(e.data);
+      if (!ids().includes(data.id)) loadNewer();
+    });
+  }
+  setInterval(() => { if (!live) loadNewer(); }, 10000);
+}
+
 function getCsrfToken() {
   const name = 'csrftoken=';
   const parts = document.cookie.split(';');
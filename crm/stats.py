@@ -0,0 +1,173 @@
+"""
+Инкрементальная статистика проекта (ProjectStats).
+
+Каждое изменение задачи или чекпоинта превращается в дельту счётчиков
+(«минус» старое состояние, «плюс» новое) и применяется к строке
+ProjectStats под блокировкой строки в той же транзакции, что и само
+изменение. Сигналы покрывают save()/delete(); массовые операции в обход
+сигналов (apply_moves) вызывают tasks_changed сами.
+
+Строка создаётся вместе с проектом (сигнал post_save), для проектов,
+созданных до ProjectStats, — миграцией 0017. Чтение (get_stats) ничего не
+пересчитывает; проект без строки (bulk_create в обход сигналов) получает
+её командой ``manage.py rebuild_project_stats``, до тех пор дельты для него
+пропускаются.
+"""
+
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Count, Q, Sum
+
+from .models import Project, ProjectStats, Task, TaskCheckpoint
+
+TASK_KEYS = ("project_id", "status", "task_type", "story_points", "due_date")
+SCALARS = ("tasks_total", "points_total", "checkpoints_total", "checkpoints_done")
+BUCKETS = ("by_status", "by_type", "open_due")
+
+
+def _empty() -> dict:
+    return {**{k: 0 for k in SCALARS}, **{k: {} for k in BUCKETS}}
+
+
+def _add_bucket(bucket: dict, key: str, count: int, points: int | None = None) -> None:
+    if points is None:
+        bucket[key] = bucket.get(key, 0) + count
+        return
+    entry = bucket.setdefault(key, {"count": 0, "points": 0})
+    entry["count"] += count
+    entry["points"] += points
+
+
+def _task_delta(delta: dict, state: dict, sign: int) -> None:
+    points = state["story_points"] or 0
+    delta["tasks_total"] += sign
+    delta["points_total"] += sign * points
+    _add_bucket(delta["by_status"], state["status"], sign, sign * points)
+    _add_bucket(delta["by_type"], state["task_type"], sign, sign * points)
+    if state["due_date"] and state["status"] != Task.Status.DONE:
+        _add_bucket(delta["open_due"], state["due_date"].isoformat(), sign)
+
+
+def _complete(state: dict | None) -> bool:
+    return state is not None and all(k in state for k in TASK_KEYS)
+
+
+def tasks_changed(changes: list[tuple[dict | None, dict | None]]) -> None:
+    """
+    changes — пары (состояние до, состояние после) по полям TASK_KEYS; None — задачи не было
+    (создание) или больше нет (удаление). Неполное состояние — полный пересчёт проекта.
+    """
+    deltas: dict[int, dict] = defaultdict(_empty)
+    rebuild_ids = set()
+    for old, new in changes:
+        for state, sign in ((old, -1), (new, 1)):
+            if state is None:
+                continue
+            if not _complete(state):
+                rebuild_ids.update(s["project_id"] for s in (old, new) if s and s.get("project_id"))
+                continue
+            _task_delta(deltas[state["project_id"]], state, sign)
+    for project_id, delta in deltas.items():
+        if project_id not in rebuild_ids:
+            apply(project_id, delta)
+    if rebuild_ids and ProjectStats.objects.filter(pk__in=rebuild_ids).exists():
+        rebuild(rebuild_ids)
+
+
+def checkpoint_changed(project_id: int, old: dict | None, new: dict | None) -> None:
+    """Дельта по чекпоинту задачи проекта: состояния {"is_done"}, None — создание/удаление."""
+    delta = _empty()
+    for state, sign in ((old, -1), (new, 1)):
+        if state is not None:
+            delta["checkpoints_total"] += sign
+            delta["checkpoints_done"] += sign * bool(state["is_done"])
+    apply(project_id, delta)
+
+
+def _is_zero(delta: dict) -> bool:
+    if any(delta[k] for k in SCALARS):
+        return False
+    for bucket in BUCKETS:
+        for value in delta[bucket].values():
+            if (value if isinstance(value, int) else value["count"] or value["points"]):
+                return False
+    return True
+
+
+def apply(project_id: int, delta: dict) -> None:
+    if _is_zero(delta):
+        return
+    with transaction.atomic():
+        row = ProjectStats.objects.select_for_update().filter(pk=project_id).first()
+        if row is None:
+            return
+        for key in SCALARS:
+            setattr(row, key, getattr(row, key) + delta[key])
+        for key in BUCKETS:
+            bucket = getattr(row, key)
+            for name, value in delta[key].items():
+                if isinstance(value, int):
+                    _add_bucket(bucket, name, value)
+                    if not bucket[name]:
+                        del bucket[name]
+                else:
+                    _add_bucket(bucket, name, value["count"], value["points"])
+                    if not bucket[name]["count"]:
+                        del bucket[name]
+        row.save()
+
+
+def collect(tasks, checkpoints, project_ids) -> dict[int, dict]:
+    """Счётчики проектов project_ids тремя групповыми запросами."""
+    data = {pk: _empty() for pk in project_ids}
+    grouped = tasks.values("project_id", "status", "task_type").annotate(n=Count("id"), sp=Sum("story_points"))
+    for row in grouped.order_by():
+        stats = data[row["project_id"]]
+        stats["tasks_total"] += row["n"]
+        stats["points_total"] += row["sp"] or 0
+        _add_bucket(stats["by_status"], row["status"], row["n"], row["sp"] or 0)
+        _add_bucket(stats["by_type"], row["task_type"], row["n"], row["sp"] or 0)
+    due = (
+        tasks.exclude(status=Task.Status.DONE)
+        .filter(due_date__isnull=False)
+        .values("project_id", "due_date")
+        .annotate(n=Count("id"))
+    )
+    for row in due.order_by():
+        _add_bucket(data[row["project_id"]]["open_due"], row["due_date"].isoformat(), row["n"])
+    done = checkpoints.values("task__project_id").annotate(n=Count("id"), done=Count("id", filter=Q(is_done=True)))
+    for row in done.order_by():
+        stats = data[row["task__project_id"]]
+        stats["checkpoints_total"] = row["n"]
+        stats["checkpoints_done"] = row["done"]
+    return data
+
+
+def rebuild(project_ids=None) -> int:
+    """Полный пересчёт (всех проектов или указанных)."""
+    tasks = Task.objects.all()
+    checkpoints = TaskCheckpoint.objects.all()
+    projects = Project.objects.all()
+    if project_ids is not None:
+        tasks = tasks.filter(project_id__in=project_ids)
+        checkpoints = checkpoints.filter(task__project_id__in=project_ids)
+        projects = projects.filter(pk__in=project_ids)
+
+    data = collect(tasks, checkpoints, projects.values_list("id", flat=True))
+    with transaction.atomic():
+        existing = ProjectStats.objects.all() if project_ids is None else ProjectStats.objects.filter(pk__in=data.keys())
+        existing.delete()
+        ProjectStats.objects.bulk_create(
+            [ProjectStats(project_id=pk, **stats) for pk, stats in data.items()], batch_size=1000
+        )
+    return len(data)
+
+
+def project_created(project: Project) -> None:
+    """Пустая сводка нового проекта: задач у него ещё нет."""
+    ProjectStats.objects.get_or_create(project=project)
+
+
+def get_stats(project: Project) -> ProjectStats:
+    return ProjectStats.objects.get(pk=project.pk)
@@ -0,0 +1,11 @@
+from django import template
+
+from crm import thumbnails
+
+register = template.Library()
+
+
+@register.simple_tag
+def thumbnail_url(file, sha256: str, size: str = "avatar") -> str:
+    """{% thumbnail_url user.photo user.photo_sha256 "avatar" %} — превью или оригинал, пока превью нет."""
+    return thumbnails.url(file, sha256, size)
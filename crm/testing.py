@@ -0,0 +1,40 @@
+"""
+Помощники для тестов производительности view.
+
+    class KanbanTests(QueryBudgetTestMixin, TestCase):
+        def test_board(self):
+            response = self.client.get(url)
+            self.assertWithinBudget(response)        # бюджет view (query_budget)
+            self.assertWithinBudget(response, 5)     # или явный
+
+Миксин включает строгий режим: любой запрос клиента к view с объявленным
+query_budget, превысивший бюджет, падает с QueryBudgetExceeded прямо в тесте.
+"""
+
+from django.test.utils import override_settings
+
+from .instrumentation import QueryBudgetExceeded
+
+
+class QueryBudgetTestMixin:
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls._budget_override = override_settings(CRM_QUERY_BUDGET_STRICT=True)
+        cls._budget_override.enable()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls._budget_override.disable()
+        super().tearDownClass()
+
+    def assertWithinBudget(self, response, max_queries: int | None = None):
+        metrics = getattr(response, "perf_metrics", None)
+        if metrics is None:
+            self.fail("Нет метрик: подключите crm.instrumentation.QueryInstrumentationMiddleware")
+        budget = max_queries if max_queries is not None else metrics.budget
+        if budget is None:
+            self.fail(f"У {metrics.url_name} не объявлен query_budget")
+        if metrics.queries > budget:
+            raise QueryBudgetExceeded(f"{metrics.url_name}: {metrics.queries} SQL queries, budget {budget}")
+        return metrics
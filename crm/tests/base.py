@@ -0,0 +1,42 @@
+import json
+
+from django.core.cache import caches
+from django.test import TestCase
+
+from accounts.models import User
+from crm.models import ClientRequest, Project, Task
+from crm.testing import QueryBudgetTestMixin
+
+
+class CrmTestCase(QueryBudgetTestMixin, TestCase):
+    """Менеджер, разработчик, клиент, заявка с проектом и по задаче в каждой колонке доски."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.manager = User.objects.create_user("mgr", "mgr@example.com", "pw", role=User.Role.MANAGER, phone="+79990000001")
+        cls.developer = User.objects.create_user(
+            "dev", "dev@example.com", "pw", role=User.Role.DEVELOPER, developer_type="backend", phone="+79990000002"
+        )
+        cls.client_user = User.objects.create_user("cli", "cli@example.com", "pw", role=User.Role.CLIENT, phone="+79990000003")
+        cls.request_obj = ClientRequest.objects.create(
+            project_type=ClientRequest.ProjectType.WEBSITE,
+            title="Сайт",
+            contact_email="cli@example.com",
+            client=cls.client_user,
+        )
+        cls.project = Project.objects.create(client_request=cls.request_obj, name="Проект")
+        cls.tasks = [
+            Task.objects.create(project=cls.project, title=f"Задача {i}", task_type="backend", status=status, order=1024)
+            for i, status in enumerate(Task.Status.values)
+        ]
+
+    def setUp(self):
+        # кеш пользователей, версий фрагментов и т.п. не должен переживать откат теста
+        for alias in ("default", "fragments"):
+            caches[alias].clear()
+
+    def login(self, user):
+        self.client.force_login(user)
+
+    def post_json(self, url, payload, **extra):
+        return self.client.post(url, json.dumps(payload), content_type="application/json", **extra)
@@ -0,0 +1,110 @@
+import shutil
+import tempfile
+
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import override_settings
+from django.urls import reverse
+
+from crm import attachments
+from crm.models import Attachment, AttachmentBlob
+
+from .base import CrmTestCase
+
+CONTENT = b"0123456789abcdefghij"
+
+
+class AttachmentTests(CrmTestCase):
+    def setUp(self):
+        super().setUp()
+        media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media, ignore_errors=True)
+        settings = override_settings(MEDIA_ROOT=media, CRM_ATTACHMENT_SENDFILE=None)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.task = self.tasks[0]
+        self.login(self.manager)
+
+    def upload(self, content=CONTENT, name="notes.txt"):
+        response = self.client.post(
+            reverse("crm:task_attachments_api", args=[self.task.pk]),
+            {"file": SimpleUploadedFile(name, content, content_type="text/plain")},
+        )
+        self.assertWithinBudget(response)
+        self.assertEqual(response.status_code, 201)
+        return Attachment.objects.get(pk=response.json()["attachment"]["id"])
+
+    def download(self, attachment, **headers):
+        response = self.client.get(reverse("crm:attachment_download", args=[attachment.pk]), **headers)
+        self.assertWithinBudget(response)
+        return response
+
+    def test_same_content_is_stored_once(self):
+        first = self.upload(name="a.txt")
+        second = self.upload(name="b.txt")
+        self.assertNotEqual(first.pk, second.pk)
+        self.assertEqual(first.file.name, second.file.name)
+        self.assertEqual(first.file.name, attachments.blob_name(first.sha256))
+        self.assertEqual(len(default_storage.listdir(first.file.name.rsplit("/", 1)[0])[1]), 1)
+        self.assertEqual(AttachmentBlob.objects.filter(pk=first.sha256).count(), 1)
+
+    def test_file_removed_with_last_reference(self):
+        first = self.upload()
+        second = self.upload()
+        name = first.file.name
+        with self.captureOnCommitCallbacks(execute=True):
+            first.delete()
+        self.assertTrue(default_storage.exists(name))
+        with self.captureOnCommitCallbacks(execute=True):
+            second.delete()
+        self.assertFalse(default_storage.exists(name))
+        self.assertFalse(AttachmentBlob.objects.exists())
+
+    def test_upload_after_release_restores_file(self):
+        first = self.upload()
+        with self.captureOnCommitCallbacks(execute=True):
+            first.delete()
+        again = self.upload()
+        self.assertTrue(default_storage.exists(again.file.name))
+        self.assertEqual(self.download(again).status_code, 200)
+
+    def test_full_download(self):
+        response = self.download(self.upload())
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b"".join(response.streaming_content), CONTENT)
+
+    def test_range_is_partial_content(self):
+        response = self.download(self.upload(), HTTP_RANGE="bytes=2-5")
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response["Content-Range"], f"bytes 2-5/{len(CONTENT)}")
+        self.assertEqual(b"".join(response.streaming_content), CONTENT[2:6])
+
+    def test_suffix_range(self):
+        response = self.download(self.upload(), HTTP_RANGE="bytes=-4")
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(b"".join(response.streaming_content), CONTENT[-4:])
+
+    def test_range_past_end_is_unsatisfiable(self):
+        response = self.download(self.upload(), HTTP_RANGE="bytes=100-")
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response["Content-Range"], f"bytes */{len(CONTENT)}")
+
+    def test_invalid_range_is_ignored(self):
+        for header in ("bytes=5-2", "bytes=abc", "items=0-1"):
+            with self.subTest(header):
+                response = self.download(self.upload(), HTTP_RANGE=header)
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(b"".join(response.streaming_content), CONTENT)
+
+    def test_stale_if_range_gets_full_body(self):
+        response = self.download(self.upload(), HTTP_RANGE="bytes=2-5", HTTP_IF_RANGE='"stale"')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b"".join(response.streaming_content), CONTENT)
+
+    def test_etag_revalidation(self):
+        attachment = self.upload()
+        etag = self.download(attachment)["ETag"]
+        self.assertEqual(etag, f'"{attachment.sha256}"')
+        response = self.download(attachment, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b"")
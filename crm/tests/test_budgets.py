@@ -0,0 +1,90 @@
+from django.urls import reverse
+
+from crm.models import ClientRequest, Project
+
+from .base import CrmTestCase
+
+
+class QueryBudgetTests(CrmTestCase):
+    """Бюджеты запросов view в строгом режиме: превышение падает QueryBudgetExceeded прямо в запросе."""
+
+    def test_project_detail_first_view(self):
+        self.login(self.manager)
+        other = ClientRequest.objects.create(project_type="bot", title="Бот", contact_email="x@example.com")
+        project = Project.objects.create(client_request=other, name="Новый")
+        response = self.client.get(reverse("crm:manager_project_detail", args=[project.pk]))
+        self.assertEqual(response.status_code, 200)
+        self.assertWithinBudget(response)
+
+    def test_project_detail_create_task(self):
+        self.login(self.manager)
+        url = reverse("crm:manager_project_detail", args=[self.project.pk])
+        response = self.client.post(url, {"title": "Новая", "task_type": "backend", "due_date": "2026-11-01"})
+        self.assertEqual(response.status_code, 302)
+        self.assertWithinBudget(response)
+
+    def test_board(self):
+        self.login(self.manager)
+        for name in ("crm:kanban_board", "crm:kanban_board_data"):
+            with self.subTest(name):
+                response = self.client.get(reverse(name, args=[self.project.pk]))
+                self.assertEqual(response.status_code, 200)
+                self.assertWithinBudget(response)
+
+    def test_request_list(self):
+        self.login(self.manager)
+        response = self.client.get(reverse("crm:manager_request_list"))
+        self.assertEqual(response.status_code, 200)
+        self.assertWithinBudget(response)
+
+    def test_open_tasks(self):
+        self.login(self.developer)
+        response = self.client.get(reverse("crm:dev_open_tasks"))
+        self.assertEqual(response.status_code, 200)
+        self.assertWithinBudget(response)
+        self.assertIn(self.tasks[0], response.context["object_list"])
+
+    def test_claim(self):
+        self.login(self.developer)
+        response = self.client.post(reverse("crm:dev_take_task", args=[self.tasks[0].pk]), HTTP_ACCEPT="application/json")
+        self.assertEqual(response.status_code, 200)
+        self.assertWithinBudget(response)
+
+    def test_search(self):
+        for user in (self.manager, self.developer, self.client_user):
+            with self.subTest(user.username):
+                self.login(user)
+                response = self.client.get(reverse("crm:search_api"), {"q": "задача"})
+                self.assertEqual(response.status_code, 200)
+                self.assertWithinBudget(response)
+
+    def test_request_checkpoints_api(self):
+        self.login(self.manager)
+        url = reverse("crm:manager_request_checkpoints_api", args=[self.request_obj.pk])
+        created = self.post_json(url, {"action": "create", "title": "Шаг"})
+        self.assertEqual(created.status_code, 200)
+        self.assertWithinBudget(created)
+        cp_id = created.json()["checkpoint"]["id"]
+        for payload in (
+            {"action": "update", "id": cp_id, "is_done": True},
+            {"action": "move", "id": cp_id, "position": 0},
+            {"action": "reorder", "ids": [cp_id]},
+            {"action": "delete", "id": cp_id},
+        ):
+            with self.subTest(payload["action"]):
+                response = self.post_json(url, payload)
+                self.assertEqual(response.status_code, 200)
+                self.assertWithinBudget(response)
+
+    def test_pages_without_data(self):
+        self.login(self.manager)
+        for url in (reverse("crm:landing"), reverse("crm:dashboard")):
+            with self.subTest(url):
+                self.assertWithinBudget(self.client.get(url))
+
+    def test_event_export(self):
+        self.login(self.manager)
+        response = self.client.get(reverse("crm:project_events_export", args=[self.project.pk]))
+        self.assertEqual(response.status_code, 200)
+        b"".join(response.streaming_content)
+        self.assertWithinBudget(response)
@@ -0,0 +1,81 @@
+from datetime import date, datetime
+
+from django.urls import reverse
+from django.utils import timezone
+
+from crm.burndown import project_velocity, sprint_burndown
+from crm.events import STATUS_CODES
+from crm.models import Sprint, Task, TaskEvent
+
+from .base import CrmTestCase
+
+Kind = TaskEvent.Kind
+TODO, DONE = STATUS_CODES[Task.Status.TODO], STATUS_CODES[Task.Status.DONE]
+
+
+def at(day: int, hour: int = 12):
+    return timezone.make_aware(datetime(2026, 1, day, hour))
+
+
+class BurndownTests(CrmTestCase):
+    def setUp(self):
+        super().setUp()
+        self.sprint = Sprint.objects.create(
+            project=self.project, name="Спринт 1", start_date=date(2026, 1, 5), end_date=date(2026, 1, 7)
+        )
+
+    def event(self, task_id, kind, status, points, moment, sprint=None):
+        TaskEvent.objects.create(
+            task_id=task_id,
+            project_id=self.project.pk,
+            sprint_id=(sprint or self.sprint).pk,
+            kind=kind,
+            status=status,
+            points=points,
+            created_at=moment,
+        )
+
+    def test_known_series(self):
+        # 5 SP взяты до старта, 3 SP добавлены в первый день, убраны в последний
+        self.event(1, Kind.SPRINT, TODO, 5, at(4))
+        self.event(2, Kind.SPRINT, TODO, 3, at(5))
+        self.event(1, Kind.STATUS, DONE, 5, at(6))
+        self.event(2, Kind.SPRINT_LEFT, TODO, 3, at(7))
+        data = sprint_burndown(self.sprint)
+        self.assertEqual(data["days"], ["2026-01-05", "2026-01-06", "2026-01-07"])
+        self.assertEqual(data["remaining"], [8, 3, 0])
+        self.assertEqual(data["committed"], 5)
+        self.assertEqual(data["ideal"], [5, 2.5, 0])
+        self.assertEqual(data["completed"], 5)
+
+    def test_empty_sprint(self):
+        data = sprint_burndown(self.sprint)
+        self.assertEqual(data["remaining"], [0, 0, 0])
+        self.assertEqual(data["ideal"], [0, 0, 0])
+        self.assertEqual((data["committed"], data["completed"]), (0, 0))
+
+    def test_sprint_without_dates(self):
+        sprint = Sprint.objects.create(project=self.project, name="Без дат")
+        self.assertIsNone(sprint_burndown(sprint))
+
+    def test_velocity_rolling_average(self):
+        self.event(1, Kind.STATUS, DONE, 5, at(6))
+        later = Sprint.objects.create(
+            project=self.project, name="Спринт 2", start_date=date(2026, 1, 12), end_date=date(2026, 1, 16)
+        )
+        self.event(2, Kind.STATUS, DONE, 2, at(13), sprint=later)
+        Sprint.objects.create(
+            project=self.project, name="Спринт 3", start_date=date(2026, 1, 19), end_date=date(2026, 1, 23)
+        )
+        rows = project_velocity(self.project, window=2)
+        self.assertEqual([r["completed"] for r in rows], [5, 2, 0])
+        self.assertEqual([r["rolling"] for r in rows], [5.0, 3.5, 1.0])
+
+    def test_api(self):
+        self.event(1, Kind.SPRINT, TODO, 5, at(4))
+        self.login(self.manager)
+        for name, pk in (("crm:sprint_burndown_api", self.sprint.pk), ("crm:project_velocity_api", self.project.pk)):
+            with self.subTest(name):
+                response = self.client.get(reverse(name, args=[pk]))
+                self.assertEqual(response.status_code, 200)
+                self.assertWithinBudget(response)
@@ -0,0 +1,61 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from crm.models import ClientRequest, RequestCheckpoint, TaskCheckpoint
+
+from .base import CrmTestCase
+
+
+class CheckpointReorderTests(CrmTestCase):
+    def setUp(self):
+        super().setUp()
+        self.login(self.manager)
+        self.url = reverse("crm:manager_request_checkpoints_api", args=[self.request_obj.pk])
+        self.checkpoints = [
+            RequestCheckpoint.objects.create(request=self.request_obj, title=f"Шаг {i}", order=(i + 1) * 1024)
+            for i in range(3)
+        ]
+
+    def order(self):
+        return list(self.request_obj.checkpoints.order_by("order").values_list("id", flat=True))
+
+    def test_reorder(self):
+        ids = [cp.pk for cp in reversed(self.checkpoints)]
+        with CaptureQueriesContext(connection) as queries:
+            response = self.post_json(self.url, {"action": "reorder", "ids": ids})
+        self.assertEqual(response.status_code, 200)
+        updates = [q for q in queries.captured_queries if q["sql"].startswith('UPDATE "crm_requestcheckpoint"')]
+        self.assertEqual(len(updates), 1)
+        self.assertEqual(self.order(), ids)
+
+    def test_reorder_rejects_foreign_ids(self):
+        other = ClientRequest.objects.create(project_type="bot", title="Бот", contact_email="x@example.com")
+        foreign = RequestCheckpoint.objects.create(request=other, title="Чужой", order=1024)
+        before = self.order()
+        response = self.post_json(self.url, {"action": "reorder", "ids": [foreign.pk, *before]})
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(self.order(), before)
+        self.assertEqual(RequestCheckpoint.objects.get(pk=foreign.pk).order, 1024)
+
+    def test_reorder_requires_list(self):
+        before = self.order()
+        response = self.post_json(self.url, {"action": "reorder", "ids": "123"})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.order(), before)
+
+
+class TaskCheckpointReorderTests(CrmTestCase):
+    def test_reorder(self):
+        task = self.tasks[0]
+        checkpoints = [
+            TaskCheckpoint.objects.create(task=task, title=f"Шаг {i}", order=(i + 1) * 1024) for i in range(3)
+        ]
+        ids = [cp.pk for cp in reversed(checkpoints)]
+        self.login(self.manager)
+        response = self.post_json(
+            reverse("crm:task_panel_api", args=[task.pk]), {"action": "checkpoint_reorder", "ids": ids}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertWithinBudget(response)
+        self.assertEqual(list(task.checkpoints.order_by("order").values_list("id", flat=True)), ids)
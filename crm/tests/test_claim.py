@@ -0,0 +1,53 @@
+from django.urls import reverse
+
+from accounts.models import User
+from crm.models import ProjectStats, Task, TaskEvent
+
+from .base import CrmTestCase
+
+
+class ClaimTests(CrmTestCase):
+    def setUp(self):
+        super().setUp()
+        self.other = User.objects.create_user(
+            "dev2", "dev2@example.com", "pw", role=User.Role.DEVELOPER, developer_type="backend", phone="+79990000004"
+        )
+
+    def take(self, user, task_id):
+        self.login(user)
+        return self.client.post(reverse("crm:dev_take_task", args=[task_id]), HTTP_ACCEPT="application/json")
+
+    def test_claim_moves_task_to_work(self):
+        todo = self.tasks[0]
+        response = self.take(self.developer, todo.pk)
+        self.assertEqual(response.status_code, 200)
+        self.assertWithinBudget(response)
+        task = Task.objects.get(pk=todo.pk)
+        self.assertEqual((task.assignee, task.status, task.version), (self.developer, "in_progress", todo.version + 1))
+        # update() в обход сигналов: сводка и журнал пишутся явно
+        self.assertEqual(ProjectStats.objects.get(pk=self.project.pk).by_status["in_progress"]["count"], 2)
+        self.assertEqual(TaskEvent.objects.filter(task_id=todo.pk, kind=TaskEvent.Kind.STATUS).count(), 1)
+
+    def test_second_claim_is_rejected(self):
+        self.assertEqual(self.take(self.developer, self.tasks[0].pk).status_code, 200)
+        response = self.take(self.other, self.tasks[0].pk)
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.json()["error"], "taken")
+        self.assertEqual(Task.objects.get(pk=self.tasks[0].pk).assignee, self.developer)
+
+    def test_one_active_task_per_developer(self):
+        extra = Task.objects.create(project=self.project, title="Ещё", task_type="backend")
+        self.assertEqual(self.take(self.developer, self.tasks[0].pk).status_code, 200)
+        response = self.take(self.developer, extra.pk)
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.json()["error"], "has_active")
+
+    def test_unknown_task(self):
+        response = self.take(self.developer, 999999)
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(response.json()["error"], "not_found")
+
+    def test_form_post_redirects_to_pool(self):
+        self.login(self.developer)
+        response = self.client.post(reverse("crm:dev_take_task", args=[self.tasks[0].pk]))
+        self.assertRedirects(response, reverse("crm:dev_open_tasks"), fetch_redirect_response=False)
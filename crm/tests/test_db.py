@@ -0,0 +1,118 @@
+import warnings
+from unittest import mock
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connection, transaction
+from django.db.backends.signals import connection_created
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from crm import db
+from crm.models import Task
+from crm.views import KanbanBatchMoveApiView, KanbanBoardDataApiView
+
+from .base import CrmTestCase
+
+
+class SqlitePragmaTests(CrmTestCase):
+    def reopen(self):
+        connection_created.send(sender=connection.__class__, connection=connection)
+
+    def test_pragmas_are_applied(self):
+        self.reopen()
+        raw = connection.connection
+        self.assertEqual(raw.execute("PRAGMA busy_timeout").fetchone()[0], db.DEFAULT_PRAGMAS["busy_timeout"])
+        self.assertEqual(raw.execute("PRAGMA synchronous").fetchone()[0], 1)  # NORMAL
+
+    def test_pragmas_bypass_query_wrappers(self):
+        seen = []
+
+        def wrapper(execute, sql, params, many, context):
+            seen.append(sql)
+            return execute(sql, params, many, context)
+
+        with connection.execute_wrapper(wrapper), CaptureQueriesContext(connection) as captured:
+            self.reopen()
+        self.assertEqual(seen, [])
+        self.assertEqual(len(captured), 0)
+
+    def test_reconnect_during_request_stays_within_budget(self):
+        # тестовая БД в памяти игнорирует close(), поэтому переподключение воспроизводится так же,
+        # как его делает connect(): connection_created на первом запросе к БД внутри HTTP-запроса
+        ensure_connection = connection.ensure_connection
+        opened = []
+
+        def reconnect():
+            ensure_connection()
+            if not opened:
+                opened.append(True)
+                self.reopen()
+
+        self.login(self.manager)
+        with mock.patch.object(connection, "ensure_connection", reconnect):
+            response = self.client.get(reverse("crm:kanban_board_data", args=[self.project.pk]))
+        self.assertTrue(opened)
+        self.assertEqual(response.status_code, 200)
+        self.assertWithinBudget(response)
+
+
+class ReadReplicaRouterTests(SimpleTestCase):
+    databases = {DEFAULT_DB_ALIAS}
+
+    def setUp(self):
+        databases = {**settings.DATABASES, "replica": {**settings.DATABASES[DEFAULT_DB_ALIAS]}}
+        override = override_settings(DATABASES=databases, CRM_REPLICA_DB="replica")
+        with warnings.catch_warnings():
+            # роутер смотрит только на наличие алиаса, подключений к нему тест не открывает
+            warnings.simplefilter("ignore")
+            override.enable()
+        self.addCleanup(override.disable)
+        token = db.use_replica.set(True)
+        self.addCleanup(db.use_replica.reset, token)
+
+    def test_reads_go_to_replica(self):
+        self.assertEqual(Task.objects.all().db, "replica")
+
+    def test_reads_inside_atomic_stay_on_default(self):
+        with transaction.atomic():
+            self.assertEqual(Task.objects.all().db, DEFAULT_DB_ALIAS)
+
+    def test_reads_without_flag_stay_on_default(self):
+        db.use_replica.set(False)
+        self.assertEqual(Task.objects.all().db, DEFAULT_DB_ALIAS)
+
+    def test_writes_go_to_default(self):
+        self.assertEqual(Task.objects.select_for_update().db, DEFAULT_DB_ALIAS)
+        self.assertEqual(db.ReadReplicaRouter().db_for_write(Task), DEFAULT_DB_ALIAS)
+
+    def test_other_apps_stay_on_default(self):
+        from accounts.models import User
+
+        self.assertEqual(User.objects.all().db, DEFAULT_DB_ALIAS)
+
+    def test_no_migrations_on_replica(self):
+        router = db.ReadReplicaRouter()
+        self.assertFalse(router.allow_migrate("replica", "crm"))
+        self.assertTrue(router.allow_migrate(DEFAULT_DB_ALIAS, "crm"))
+
+
+class ReplicaMiddlewareTests(SimpleTestCase):
+    def run_view(self, method, view_class):
+        flags = []
+
+        def get_response(request):
+            middleware.process_view(request, view_class.as_view(), (), {})
+            flags.append(db.use_replica.get())
+            return HttpResponse()
+
+        middleware = db.ReplicaMiddleware(get_response)
+        middleware(getattr(RequestFactory(), method)("/"))
+        self.assertFalse(db.use_replica.get())
+        return flags[0]
+
+    def test_only_safe_requests_to_marked_views(self):
+        self.assertTrue(self.run_view("get", KanbanBoardDataApiView))
+        self.assertFalse(self.run_view("post", KanbanBoardDataApiView))
+        self.assertFalse(self.run_view("get", KanbanBatchMoveApiView))
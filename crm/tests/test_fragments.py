@@ -0,0 +1,78 @@
+from django.urls import reverse
+
+from crm import fragments
+from crm.models import Task
+
+from .base import CrmTestCase
+
+
+class FragmentCacheTests(CrmTestCase):
+    def setUp(self):
+        super().setUp()
+        self.task = self.tasks[0]
+        Task.objects.filter(pk=self.task.pk).update(assignee=self.developer)
+        self.login(self.manager)
+
+    def page(self, name="crm:kanban_board"):
+        response = self.client.get(reverse(name, args=[self.project.pk]))
+        self.assertEqual(response.status_code, 200)
+        self.assertWithinBudget(response)
+        return response.content.decode()
+
+    def test_unchanged_card_comes_from_cache(self):
+        self.page()
+        # обход save() не меняет updated_at — карточка остаётся прежней
+        Task.objects.filter(pk=self.task.pk).update(title="Мимо кеша")
+        self.assertNotIn("Мимо кеша", self.page())
+        self.assertIn(self.task.title, self.page())
+
+    def test_task_save_rerenders_card_and_row(self):
+        for name in ("crm:kanban_board", "crm:manager_project_detail"):
+            self.page(name)
+        self.task.title = "Новое название"
+        self.task.save()
+        for name in ("crm:kanban_board", "crm:manager_project_detail"):
+            with self.subTest(name):
+                self.assertIn("Новое название", self.page(name))
+
+    def test_batch_move_rerenders_card(self):
+        self.page()
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.post_json(
+                reverse("crm:kanban_move_batch"), {"moves": [{"id": self.task.pk, "status": "done", "position": 0}]}
+            )
+        self.assertEqual(response.status_code, 200)
+        order = response.json()["orders"][str(self.task.pk)]
+        self.assertIn(f'data-task="{self.task.pk}" data-order="{order}"', self.page())
+
+    def test_assignee_rename_bumps_project_version(self):
+        for name in ("crm:kanban_board", "crm:manager_project_detail"):
+            self.page(name)
+        version = fragments.project_version(self.project.pk)
+        self.developer.username = "renamed_dev"
+        with self.captureOnCommitCallbacks(execute=True):
+            self.developer.save()
+        self.assertNotEqual(fragments.project_version(self.project.pk), version)
+        for name in ("crm:kanban_board", "crm:manager_project_detail"):
+            with self.subTest(name):
+                self.assertIn("renamed_dev", self.page(name))
+
+    def test_unrelated_save_keeps_version(self):
+        version = fragments.project_version(self.project.pk)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.developer.save(update_fields=["last_login"])
+        self.assertEqual(fragments.project_version(self.project.pk), version)
+
+    def test_bump_after_commit_only(self):
+        version = fragments.project_version(self.project.pk)
+        with self.captureOnCommitCallbacks() as callbacks:
+            fragments.bump([self.project.pk])
+            self.assertEqual(fragments.project_version(self.project.pk), version)
+        for callback in callbacks:
+            callback()
+        self.assertNotEqual(fragments.project_version(self.project.pk), version)
+
+    def test_context_carries_version(self):
+        ctx = fragments.context(self.project.pk)
+        self.assertEqual(ctx["fragment_version"], fragments.project_version(self.project.pk))
+        self.assertGreater(ctx["fragment_ttl"], 0)
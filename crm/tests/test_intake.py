@@ -0,0 +1,98 @@
+import tempfile
+from io import StringIO
+from pathlib import Path
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from crm import intake, search
+from crm.models import ClientRequest
+
+FORM = {"project_type": "website", "title": "Лендинг", "description": "Нужен сайт", "contact_email": "a@example.com"}
+
+
+@override_settings(CRM_INTAKE_THROTTLE=(2, 60))
+class ThrottleTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.now = 1_000_000.0
+        patcher = mock.patch("crm.intake.time.time", side_effect=lambda: self.now)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_bucket_empties_and_refills(self):
+        self.assertEqual([intake.allow("1.1.1.1") for _ in range(3)], [True, True, False])
+        # 2 заявки за 60 с — один токен за 30 с
+        self.now += 29
+        self.assertFalse(intake.allow("1.1.1.1"))
+        self.now += 2
+        self.assertTrue(intake.allow("1.1.1.1"))
+        self.assertFalse(intake.allow("1.1.1.1"))
+
+    def test_refill_is_capped(self):
+        intake.allow("1.1.1.1")
+        self.now += 3600
+        self.assertEqual([intake.allow("1.1.1.1") for _ in range(3)], [True, True, False])
+
+    def test_buckets_are_per_ip(self):
+        intake.allow("1.1.1.1")
+        intake.allow("1.1.1.1")
+        self.assertFalse(intake.allow("1.1.1.1"))
+        self.assertTrue(intake.allow("2.2.2.2"))
+
+    def test_held_lock_denies(self):
+        cache.add("crm:intake:ip:1.1.1.1:lock", 1)
+        with mock.patch("crm.intake.time.sleep"):
+            self.assertFalse(intake.allow("1.1.1.1"))
+
+    def test_view_returns_429(self):
+        url = reverse("crm:public_request")
+        for _ in range(2):
+            self.client.post(url, FORM)
+        response = self.client.post(url, FORM)
+        self.assertEqual(response.status_code, 429)
+        self.assertTrue(response.context["throttled"])
+        self.assertEqual(ClientRequest.objects.count(), 2)
+
+
+class SpoolTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.spool = Path(tmp.name) / "intake"
+        override = override_settings(CRM_INTAKE_SPOOL=self.spool)
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def test_view_writes_to_spool_and_worker_drains_it(self):
+        response = self.client.post(reverse("crm:public_request"), FORM)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue((self.spool / "queue.jsonl").exists())
+        self.assertFalse(ClientRequest.objects.exists())
+
+        out = StringIO()
+        call_command("drain_intake", stdout=out)
+        self.assertIn("1", out.getvalue())
+        created = ClientRequest.objects.get()
+        self.assertEqual((created.title, created.contact_email), ("Лендинг", "a@example.com"))
+        # bulk_create минует сигналы — индекс поиска обновляется явно
+        self.assertEqual([h.pk for h in search.get_backend().search("лендинг", ("request",), 10)], [created.pk])
+        self.assertEqual(list(self.spool.iterdir()), [])
+
+    def test_failed_batch_is_retried(self):
+        intake.submit(FORM)
+        with mock.patch("crm.intake.ClientRequest.objects.bulk_create", side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                intake.drain()
+        self.assertEqual(intake.drain(), 1)
+        self.assertEqual(ClientRequest.objects.count(), 1)
+
+    def test_without_spool_request_is_written_at_once(self):
+        with override_settings(CRM_INTAKE_SPOOL=None):
+            intake.submit(FORM)
+        self.assertEqual(ClientRequest.objects.count(), 1)
+        self.assertFalse(self.spool.exists())
@@ -0,0 +1,37 @@
+from django.urls import reverse
+
+from crm.models import Task
+
+from .base import CrmTestCase
+
+
+class KanbanBatchMoveTests(CrmTestCase):
+    def setUp(self):
+        super().setUp()
+        self.login(self.manager)
+        self.url = reverse("crm:kanban_move_batch")
+
+    def test_batch_move(self):
+        moves = [{"id": t.pk, "status": "review", "position": i} for i, t in enumerate(self.tasks[:2])]
+        response = self.post_json(self.url, {"moves": moves})
+        self.assertEqual(response.status_code, 200)
+        self.assertWithinBudget(response)
+        review = next(c for c in response.json()["columns"] if c["status"] == "review")
+        self.assertEqual(review["ids"][:2], [self.tasks[0].pk, self.tasks[1].pk])
+        statuses = dict(Task.objects.filter(pk__in=[t.pk for t in self.tasks[:2]]).values_list("pk", "status"))
+        self.assertEqual(set(statuses.values()), {"review"})
+
+    def test_batch_move_unknown_id(self):
+        response = self.post_json(self.url, {"moves": [{"id": 999999, "status": "done"}]})
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(response.json()["ids"], [999999])
+
+    def test_batch_move_is_all_or_nothing(self):
+        moves = [{"id": self.tasks[0].pk, "status": "done"}, {"id": 999999, "status": "done"}]
+        self.post_json(self.url, {"moves": moves})
+        self.assertEqual(Task.objects.get(pk=self.tasks[0].pk).status, self.tasks[0].status)
+
+    def test_batch_move_rejects_bad_status(self):
+        response = self.post_json(self.url, {"moves": [{"id": self.tasks[0].pk, "status": "nope"}]})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()["error"], "bad_status")
@@ -0,0 +1,55 @@
+from datetime import timedelta
+
+from django.urls import reverse
+from django.utils import timezone
+
+from crm.kanban import board_changes, encode_cursor
+from crm.models import Task
+
+from .base import CrmTestCase
+
+
+class KanbanChangesTests(CrmTestCase):
+    def changes(self, cursor=None):
+        params = {"project": self.project.pk}
+        if cursor:
+            params["cursor"] = cursor
+        return self.client.get(reverse("crm:kanban_changes"), params)
+
+    def test_first_page_is_whole_board(self):
+        self.login(self.manager)
+        response = self.changes()
+        self.assertEqual(response.status_code, 200)
+        self.assertWithinBudget(response)
+        data = response.json()
+        self.assertEqual(sorted(c["id"] for c in data["cards"]), sorted(t.pk for t in self.tasks))
+        self.assertFalse(data["has_more"])
+
+    def test_cursor_returns_only_changes(self):
+        Task.objects.update(updated_at=timezone.now() - timedelta(hours=1))
+        cursor = board_changes(self.project, None)["cursor"]
+        task = self.tasks[0]
+        task.title = "Переименована"
+        task.save()
+        deleted = self.tasks[1].pk
+        self.tasks[1].delete()
+
+        data = board_changes(self.project, cursor)
+        self.assertEqual([c["id"] for c in data["cards"]], [task.pk])
+        self.assertEqual(data["deleted"], [deleted])
+
+    def test_pages_do_not_skip_cards(self):
+        seen = []
+        cursor = encode_cursor(timezone.now() - timedelta(days=1))
+        while True:
+            data = board_changes(self.project, cursor, limit=2)
+            seen += [c["id"] for c in data["cards"]]
+            cursor = data["cursor"]
+            if not data["has_more"]:
+                break
+        self.assertEqual(sorted(seen), sorted(t.pk for t in self.tasks))
+
+    def test_changes_rejects_out_of_range_cursor(self):
+        self.login(self.manager)
+        response = self.changes("99999999999999999999-1")
+        self.assertEqual(response.status_code, 400)
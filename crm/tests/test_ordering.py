@@ -0,0 +1,57 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from crm import ordering
+from crm.kanban import apply_moves
+from crm.models import RequestCheckpoint, Task
+
+from .base import CrmTestCase
+
+
+class OrderingTests(CrmTestCase):
+    def test_key_between(self):
+        self.assertEqual(ordering.key_between(None, None), ordering.GAP)
+        self.assertEqual(ordering.key_between(1024, 2048), 1536)
+        self.assertEqual(ordering.key_between(None, 1024), 512)
+        self.assertIsNone(ordering.key_between(5, 6))
+
+    def test_move_to_respaces_when_out_of_room(self):
+        checkpoints = [
+            RequestCheckpoint.objects.create(request=self.request_obj, title=f"Шаг {i}", order=i + 1) for i in range(3)
+        ]
+        last = checkpoints[-1]
+        orders = ordering.move_to(last, self.request_obj.checkpoints.all(), 1)
+        self.assertEqual(set(orders), {cp.pk for cp in checkpoints})
+        ids = list(self.request_obj.checkpoints.order_by("order").values_list("id", flat=True))
+        self.assertEqual(ids, [checkpoints[0].pk, last.pk, checkpoints[1].pk])
+        self.assertEqual(sorted(orders.values()), ordering.spaced(3))
+
+
+class KanbanOrderTests(CrmTestCase):
+    def test_move_writes_one_task_row(self):
+        self.login(self.manager)
+        todo = self.tasks[0]
+        with CaptureQueriesContext(connection) as queries:
+            response = self.post_json(reverse("crm:kanban_move"), {"id": todo.pk, "status": "done", "position": 0})
+        self.assertEqual(response.status_code, 200)
+        task_updates = [q for q in queries.captured_queries if q["sql"].startswith('UPDATE "crm_task"')]
+        self.assertEqual(len(task_updates), 1)
+        done = Task.objects.filter(project=self.project, status="done").order_by("order").values_list("id", flat=True)
+        self.assertEqual(list(done)[0], todo.pk)
+
+    def test_apply_moves_returns_written_keys(self):
+        todo, done = self.tasks[0], Task.objects.get(project=self.project, status="done")
+        result = apply_moves([{"id": todo.pk, "status": "done", "position": 1}])
+        stored = dict(Task.objects.filter(status="done").values_list("id", "order"))
+        self.assertEqual(result["orders"], {todo.pk: stored[todo.pk]})
+        self.assertGreater(stored[todo.pk], stored[done.pk])
+
+    def test_new_task_goes_to_column_end(self):
+        self.login(self.manager)
+        url = reverse("crm:manager_project_detail", args=[self.project.pk])
+        self.client.post(url, {"title": "Первая", "task_type": "backend"})
+        self.client.post(url, {"title": "Вторая", "task_type": "backend"})
+        first, second = Task.objects.get(title="Первая"), Task.objects.get(title="Вторая")
+        self.assertLess(self.tasks[0].order, first.order)
+        self.assertLess(first.order, second.order)
@@ -0,0 +1,68 @@
+from django.db import connection
+from django.urls import reverse
+
+from accounts.models import User
+from crm import pool
+from crm.models import ClientRequest, Project, Task
+
+from .base import CrmTestCase
+
+
+class OpenTaskPoolTests(CrmTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.fullstack = User.objects.create_user(
+            "full", "full@example.com", "pw", role=User.Role.DEVELOPER, developer_type="fullstack", phone="+79990000005"
+        )
+        other = ClientRequest.objects.create(project_type="bot", title="Бот", contact_email="x@example.com")
+        cls.second = Project.objects.create(client_request=other, name="Второй")
+        types = ("frontend", "backend", "fullstack", "qa")
+        tasks = [
+            Task(project=project, title=f"{task_type} {i}", task_type=task_type)
+            for project in (cls.project, cls.second)
+            for i in range(3)
+            for task_type in types
+        ]
+        # большая часть задач уже в работе: статистика должна отличать их от пула
+        tasks += [
+            Task(
+                project=cls.project, title=f"В работе {i}", task_type="backend", status="in_progress", assignee=cls.developer
+            )
+            for i in range(100)
+        ]
+        Task.objects.bulk_create(tasks)
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+
+    def expected(self, types):
+        return list(
+            Task.objects.filter(status="todo", assignee__isnull=True, task_type__in=types)
+            .order_by("project_id", "id")
+            .values_list("id", flat=True)
+        )
+
+    def test_multi_type_pool_reads_index_in_order(self):
+        types = pool.task_types_for("fullstack")
+        self.assertCountEqual(types, ["frontend", "backend", "fullstack"])
+        for after_id in (None, self.expected(types)[4]):
+            with self.subTest(after_id=after_id):
+                plan = pool.pool_queryset(types, after_id).select_related("project")[:51].explain()
+                self.assertIn("task_open_pool_idx", plan)
+                self.assertNotIn("TEMP B-TREE", plan)
+
+    def test_pages_cover_pool_once(self):
+        types = pool.task_types_for("fullstack")
+        seen, after_id, has_more = [], None, True
+        while has_more:
+            rows, has_more = pool.open_tasks(types, after_id=after_id, limit=4)
+            seen += [t.pk for t in rows]
+            after_id = rows[-1].pk
+        self.assertEqual(seen, self.expected(types))
+
+    def test_view_for_fullstack_developer(self):
+        self.login(self.fullstack)
+        response = self.client.get(reverse("crm:dev_open_tasks"))
+        self.assertEqual(response.status_code, 200)
+        self.assertWithinBudget(response)
+        self.assertTrue(all(t.task_type != "qa" for t in response.context["object_list"]))
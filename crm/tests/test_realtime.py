@@ -0,0 +1,60 @@
+import asyncio
+from datetime import timedelta
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import SimpleTestCase
+from django.utils import timezone
+
+from crm import realtime
+from crm.kanban import board_changes, encode_cursor
+from crm.models import Task, TaskTombstone
+
+from .base import CrmTestCase
+
+
+class EventStreamTests(SimpleTestCase):
+    async def test_stream_receives_published_event(self):
+        channel = realtime.project_channel(999)
+        stream = aiter(realtime.event_stream_response(channel).streaming_content)
+        try:
+            self.assertEqual(await anext(stream), b"retry: 3000\n\n")
+            # синхронные view публикуют из своих потоков, не из event loop соединения
+            message = {"event": "task", "data": {"ids": [1, 2]}}
+            await asyncio.to_thread(realtime.get_broker().publish, channel, message)
+            frame = await asyncio.wait_for(anext(stream), 1)
+            self.assertEqual(frame, b'event: task\ndata: {"ids": [1, 2]}\n\n')
+        finally:
+            await stream.aclose()
+
+
+class BoardChangesOverlapTests(CrmTestCase):
+    def setUp(self):
+        super().setUp()
+        Task.objects.update(updated_at=timezone.now() - timedelta(hours=1))
+
+    def test_late_commit_with_older_timestamp_is_not_lost(self):
+        task = self.tasks[0]
+        Task.objects.filter(pk=task.pk).update(updated_at=timezone.now())
+        cursor = board_changes(self.project, encode_cursor(timezone.now() - timedelta(minutes=1)))["cursor"]
+        # транзакция, начатая раньше, коммитится после опроса со своим, более старым updated_at
+        late = self.tasks[1]
+        Task.objects.filter(pk=late.pk).update(updated_at=timezone.now() - timedelta(seconds=2))
+
+        ids = [c["id"] for c in board_changes(self.project, cursor)["cards"]]
+        self.assertIn(late.pk, ids)
+        # карточки из окна перекрытия приходят повторно, клиент отбрасывает их по version
+        self.assertIn(task.pk, ids)
+
+    def test_cursor_older_than_tombstones_resets_board(self):
+        cursor = encode_cursor(timezone.now() - timedelta(days=30))
+        data = board_changes(self.project, cursor)
+        self.assertTrue(data["reset"])
+        self.assertEqual(data["cards"], [])
+
+    def test_prune_tombstones(self):
+        old, recent = (task.pk for task in self.tasks[:2])
+        Task.objects.filter(pk__in=[old, recent]).delete()
+        TaskTombstone.objects.filter(task_id=old).update(deleted_at=timezone.now() - timedelta(days=30))
+        call_command("prune_tombstones", stdout=StringIO())
+        self.assertEqual(list(TaskTombstone.objects.values_list("task_id", flat=True)), [recent])
@@ -0,0 +1,87 @@
+from datetime import datetime, timedelta
+
+from django.test import SimpleTestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from crm.events import STATUS_CODES
+from crm.models import Task, TaskEvent
+from crm.reports import flow_report, percentile
+
+from .base import CrmTestCase
+
+Kind = TaskEvent.Kind
+TODO, IN_PROGRESS, REVIEW, DONE = (STATUS_CODES[s] for s in Task.Status.values)
+T0 = timezone.make_aware(datetime(2026, 3, 2, 9))
+PROJECT = 999  # журнал хранит project_id числом: сигналы тестовых задач сюда не пишут
+
+
+def hours(n: float):
+    return T0 + timedelta(hours=n)
+
+
+class PercentileTests(SimpleTestCase):
+    def test_single_sample(self):
+        for pct in (0, 50, 85, 99, 100):
+            with self.subTest(pct):
+                self.assertEqual(percentile([7.5], pct), 7.5)
+
+    def test_nearest_rank(self):
+        self.assertEqual(percentile([10, 4], 50), 4)
+        self.assertEqual(percentile([1, 2, 3, 4], 50), 2)
+        self.assertEqual(percentile([1, 2, 3, 4], 75), 3)
+        self.assertEqual(percentile(list(range(1, 21)), 85), 17)
+        self.assertEqual(percentile(list(range(1, 101)), 99), 99)
+        self.assertEqual(percentile([3, 1, 2], 100), 3)
+
+
+class FlowReportTests(CrmTestCase):
+    def event(self, task_id, kind, status, moment):
+        TaskEvent.objects.create(task_id=task_id, project_id=PROJECT, kind=kind, status=status, created_at=moment)
+
+    def test_known_lead_and_cycle_times(self):
+        # 1: создана -> в работе через 2 ч -> готова через 10 ч
+        self.event(1, Kind.CREATED, TODO, hours(0))
+        self.event(1, Kind.STATUS, IN_PROGRESS, hours(2))
+        self.event(1, Kind.STATUS, DONE, hours(10))
+        # 2: сразу в «Готово» через 4 ч, cycle time нет
+        self.event(2, Kind.CREATED, TODO, hours(0))
+        self.event(2, Kind.STATUS, DONE, hours(4))
+        # 3: готова, но возвращена на проверку; 4: готова и удалена
+        self.event(3, Kind.CREATED, TODO, hours(0))
+        self.event(3, Kind.STATUS, DONE, hours(1))
+        self.event(3, Kind.STATUS, REVIEW, hours(3))
+        self.event(4, Kind.CREATED, TODO, hours(0))
+        self.event(4, Kind.STATUS, DONE, hours(1))
+        self.event(4, Kind.DELETED, DONE, hours(5))
+
+        report = flow_report(PROJECT, since=T0, until=hours(24))
+        self.assertEqual(
+            {row["task_id"]: (row["lead_h"], row["cycle_h"]) for row in report["tasks"]},
+            {1: (10.0, 8.0), 2: (4.0, None)},
+        )
+        self.assertEqual(report["lead_time"], {"count": 2, "avg_h": 7.0, "p50_h": 4.0, "p85_h": 10.0})
+        self.assertEqual(report["cycle_time"], {"count": 1, "avg_h": 8.0, "p50_h": 8.0, "p85_h": 8.0})
+
+    def test_period_bounds(self):
+        self.event(1, Kind.CREATED, TODO, hours(0))
+        self.event(1, Kind.STATUS, DONE, hours(30))
+        self.assertEqual(flow_report(PROJECT, since=T0, until=hours(24))["tasks"], [])
+        self.assertEqual(flow_report(PROJECT, since=hours(31), until=hours(48))["tasks"], [])
+        empty = flow_report(PROJECT, since=hours(31), until=hours(48))["lead_time"]
+        self.assertEqual(empty, {"count": 0, "avg_h": None, "p50_h": None, "p85_h": None})
+
+    def test_status_change_is_journaled(self):
+        task = self.tasks[0]
+        task.status = Task.Status.IN_PROGRESS
+        task.save()
+        event = TaskEvent.objects.filter(task_id=task.pk).latest("id")
+        self.assertEqual((event.kind, event.status), (Kind.STATUS, IN_PROGRESS))
+
+    def test_api(self):
+        self.login(self.manager)
+        url = reverse("crm:project_flow_api", args=[self.project.pk])
+        response = self.client.get(url, {"days": 7})
+        self.assertEqual(response.status_code, 200)
+        self.assertWithinBudget(response)
+        self.assertEqual(self.client.get(url, {"days": "x"}).status_code, 400)
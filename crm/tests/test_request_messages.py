@@ -0,0 +1,84 @@
+from django.urls import reverse
+
+from accounts.models import User
+from crm.models import ClientRequest, Message
+
+from .base import CrmTestCase
+
+
+class RequestMessagesApiTests(CrmTestCase):
+    def setUp(self):
+        super().setUp()
+        self.messages = [
+            Message.objects.create(request=self.request_obj, author=self.client_user, text=f"#{i}") for i in range(5)
+        ]
+        self.ids = [m.pk for m in self.messages]
+        self.url = reverse("crm:request_messages_api", args=[self.request_obj.pk])
+        self.login(self.client_user)
+
+    def page(self, **params):
+        response = self.client.get(self.url, {"limit": 2, **params})
+        self.assertEqual(response.status_code, 200)
+        self.assertWithinBudget(response)
+        data = response.json()
+        return [m["id"] for m in data["messages"]], data["has_more"]
+
+    def test_latest_page(self):
+        self.assertEqual(self.page(), (self.ids[3:], True))
+
+    def test_exact_fit_has_no_more(self):
+        self.assertEqual(self.page(limit=5), (self.ids, False))
+
+    def test_scroll_back_to_the_first_message(self):
+        self.assertEqual(self.page(before_id=self.ids[3]), (self.ids[1:3], True))
+        self.assertEqual(self.page(before_id=self.ids[1]), (self.ids[:1], False))
+        self.assertEqual(self.page(before_id=self.ids[0]), ([], False))
+
+    def test_poll_newer(self):
+        self.assertEqual(self.page(after_id=self.ids[1]), (self.ids[2:4], True))
+        self.assertEqual(self.page(after_id=self.ids[3]), (self.ids[4:], False))
+        self.assertEqual(self.page(after_id=self.ids[4]), ([], False))
+
+    def test_poll_picks_up_posted_message(self):
+        etag = self.client.get(self.url, {"after_id": self.ids[4]})["ETag"]
+        response = self.post_json(self.url, {"text": "  Новое  "})
+        self.assertEqual(response.status_code, 200)
+        self.assertWithinBudget(response)
+        posted = response.json()["message"]["id"]
+        self.assertEqual(Message.objects.get(pk=posted).text, "Новое")
+        response = self.client.get(self.url, {"after_id": self.ids[4]}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([m["id"] for m in response.json()["messages"]], [posted])
+
+    def test_unchanged_poll_is_not_modified(self):
+        first = self.client.get(self.url, {"after_id": self.ids[4]})
+        again = self.client.get(self.url, {"after_id": self.ids[4]}, HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(again.status_code, 304)
+        self.assertWithinBudget(again)
+
+    def test_manager_sees_any_request(self):
+        self.login(self.manager)
+        self.assertEqual(self.page(), (self.ids[3:], True))
+
+    def test_foreign_client_and_anchor(self):
+        other = User.objects.create_user("cli2", "cli2@example.com", "pw", role=User.Role.CLIENT, phone="+79990000004")
+        self.login(other)
+        self.assertEqual(self.client.get(self.url).status_code, 404)
+        self.assertEqual(self.post_json(self.url, {"text": "чужое"}).status_code, 404)
+
+        foreign_request = ClientRequest.objects.create(
+            project_type=ClientRequest.ProjectType.WEBSITE, title="Другая", contact_email="cli2@example.com", client=other
+        )
+        foreign = Message.objects.create(request=foreign_request, author=other, text="чужое")
+        self.login(self.client_user)
+        self.assertEqual(self.client.get(self.url, {"after_id": foreign.pk}).status_code, 404)
+
+    def test_developer_is_forbidden(self):
+        self.login(self.developer)
+        self.assertEqual(self.client.get(self.url).status_code, 403)
+
+    def test_invalid_params(self):
+        for params in ({"limit": "0"}, {"limit": "abc"}, {"before_id": "x"}):
+            with self.subTest(params):
+                self.assertEqual(self.client.get(self.url, params).status_code, 400)
+        self.assertEqual(self.post_json(self.url, {"text": "   "}).status_code, 400)
@@ -0,0 +1,50 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.urls import reverse
+
+from crm.models import Comment, Message, Task
+
+from .base import CrmTestCase
+
+
+class SearchVisibilityTests(CrmTestCase):
+    def search(self, user, q):
+        self.login(user)
+        response = self.client.get(reverse("crm:search_api"), {"q": q})
+        self.assertEqual(response.status_code, 200)
+        return [(r["kind"], r["id"]) for r in response.json()["results"]]
+
+    def test_own_documents_found_below_foreign_matches(self):
+        Task.objects.bulk_create(
+            [Task(project=self.project, title="редкоеслово редкоеслово", task_type="backend") for _ in range(150)]
+        )
+        call_command("rebuild_search_index", stdout=StringIO())
+        mine = Task.objects.create(
+            project=self.project,
+            title="Своя",
+            description="редкоеслово в описании",
+            task_type="backend",
+            assignee=self.developer,
+        )
+        self.assertEqual(self.search(self.developer, "редкоеслово"), [("task", mine.pk)])
+
+    def test_kinds_by_role(self):
+        task = Task.objects.create(project=self.project, title="Зебра", task_type="backend", assignee=self.developer)
+        comment = Comment.objects.create(task=task, author=self.manager, text="зебра в комментарии")
+        message = Message.objects.create(request=self.request_obj, author=self.client_user, text="зебра в письме")
+        self.assertCountEqual(
+            self.search(self.manager, "зебра"), [("task", task.pk), ("comment", comment.pk), ("message", message.pk)]
+        )
+        self.assertCountEqual(self.search(self.developer, "зебра"), [("task", task.pk), ("comment", comment.pk)])
+        self.assertEqual(self.search(self.client_user, "зебра"), [("message", message.pk)])
+
+    def test_index_follows_edits_and_deletes(self):
+        task = Task.objects.create(project=self.project, title="Жираф", task_type="backend")
+        self.assertEqual(self.search(self.manager, "жираф"), [("task", task.pk)])
+        task.title = "Носорог"
+        task.save()
+        self.assertEqual(self.search(self.manager, "жираф"), [])
+        self.assertEqual(self.search(self.manager, "носорог"), [("task", task.pk)])
+        task.delete()
+        self.assertEqual(self.search(self.manager, "носорог"), [])
@@ -0,0 +1,92 @@
+from datetime import date
+from importlib import import_module
+
+from django.apps import apps
+from django.urls import reverse
+
+from crm import stats
+from crm.kanban import apply_moves
+from crm.models import ClientRequest, Project, ProjectStats, Task, TaskCheckpoint
+
+from .base import CrmTestCase
+
+backfill = import_module("crm.migrations.0017_backfill_project_stats").backfill
+
+
+class ProjectStatsTests(CrmTestCase):
+    def row(self):
+        return ProjectStats.objects.get(pk=self.project.pk)
+
+    def assertMatchesRebuild(self):
+        row = self.row()
+        fresh = stats.collect(
+            Task.objects.filter(project=self.project),
+            TaskCheckpoint.objects.filter(task__project=self.project),
+            [self.project.pk],
+        )[self.project.pk]
+        self.assertEqual({k: getattr(row, k) for k in fresh}, fresh)
+
+    def test_create(self):
+        before = self.row()
+        Task.objects.create(
+            project=self.project, title="Новая", task_type="frontend", story_points=3, due_date=date(2026, 11, 1)
+        )
+        row = self.row()
+        self.assertEqual(row.tasks_total, before.tasks_total + 1)
+        self.assertEqual(row.points_total, before.points_total + 3)
+        self.assertEqual(row.by_type["frontend"], {"count": 1, "points": 3})
+        self.assertEqual(row.open_due, {"2026-11-01": 1})
+        self.assertMatchesRebuild()
+
+    def test_move_via_save_and_batch(self):
+        task = Task.objects.create(
+            project=self.project, title="Новая", task_type="backend", story_points=2, due_date=date(2026, 11, 1)
+        )
+        task.status = Task.Status.REVIEW
+        task.save()
+        self.assertEqual(self.row().by_status["review"], {"count": 2, "points": 2})
+        apply_moves([{"id": task.pk, "status": Task.Status.DONE}])
+        row = self.row()
+        self.assertEqual(row.by_status["review"], {"count": 1, "points": 0})
+        self.assertEqual(row.by_status["done"], {"count": 2, "points": 2})
+        # выполненная задача больше не висит в дедлайнах
+        self.assertEqual(row.open_due, {})
+        self.assertMatchesRebuild()
+
+    def test_delete(self):
+        task = Task.objects.create(project=self.project, title="Новая", task_type="qa", story_points=5)
+        task.delete()
+        row = self.row()
+        self.assertNotIn("qa", row.by_type)
+        self.assertEqual(row.tasks_total, len(self.tasks))
+        self.assertMatchesRebuild()
+
+    def test_checkpoints(self):
+        cp = TaskCheckpoint.objects.create(task=self.tasks[0], title="Шаг", order=1024)
+        cp.is_done = True
+        cp.save()
+        self.assertEqual((self.row().checkpoints_total, self.row().checkpoints_done), (1, 1))
+        cp.delete()
+        self.assertEqual((self.row().checkpoints_total, self.row().checkpoints_done), (0, 0))
+
+    def test_create_task_with_due_date_from_project_page(self):
+        self.login(self.manager)
+        url = reverse("crm:manager_project_detail", args=[self.project.pk])
+        response = self.client.post(url, {"title": "Новая", "task_type": "backend", "due_date": "2026-11-01"})
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(Task.objects.get(title="Новая").due_date, date(2026, 11, 1))
+        self.assertEqual(self.row().open_due, {"2026-11-01": 1})
+
+    def test_backfill_migration(self):
+        Task.objects.create(
+            project=self.project, title="Новая", task_type="backend", story_points=3, due_date=date(2026, 11, 1)
+        )
+        TaskCheckpoint.objects.create(task=self.tasks[0], title="Шаг", order=1024, is_done=True)
+        expected = {k: getattr(self.row(), k) for k in (*stats.SCALARS, *stats.BUCKETS)}
+        other = ClientRequest.objects.create(project_type="bot", title="Бот", contact_email="x@example.com")
+        empty = Project.objects.create(client_request=other, name="Пустой")
+        ProjectStats.objects.all().delete()
+
+        backfill(apps, None)
+        self.assertEqual({k: getattr(self.row(), k) for k in expected}, expected)
+        self.assertEqual(ProjectStats.objects.get(pk=empty.pk).tasks_total, 0)
@@ -0,0 +1,52 @@
+from django.urls import reverse
+
+from crm.models import Comment
+
+from .base import CrmTestCase
+
+
+class TaskChatPaginationTests(CrmTestCase):
+    def setUp(self):
+        super().setUp()
+        self.task = self.tasks[0]
+        self.comments = [Comment.objects.create(task=self.task, author=self.manager, text=f"#{i}") for i in range(5)]
+        self.ids = [c.pk for c in self.comments]
+        self.login(self.manager)
+        self.url = reverse("crm:task_chat_api", args=[self.task.pk])
+
+    def page(self, **params):
+        response = self.client.get(self.url, {"limit": 2, **params})
+        self.assertEqual(response.status_code, 200)
+        self.assertWithinBudget(response)
+        data = response.json()
+        return [m["id"] for m in data["messages"]], data["has_more"]
+
+    def test_latest_page(self):
+        self.assertEqual(self.page(), (self.ids[3:], True))
+
+    def test_scroll_back_to_the_first_message(self):
+        self.assertEqual(self.page(before_id=self.ids[3]), (self.ids[1:3], True))
+        self.assertEqual(self.page(before_id=self.ids[1]), (self.ids[:1], False))
+        self.assertEqual(self.page(before_id=self.ids[0]), ([], False))
+
+    def test_newer_than_anchor(self):
+        self.assertEqual(self.page(after_id=self.ids[1]), (self.ids[2:4], True))
+        self.assertEqual(self.page(after_id=self.ids[3]), (self.ids[4:], False))
+        self.assertEqual(self.page(after_id=self.ids[4]), ([], False))
+
+    def test_foreign_anchor(self):
+        foreign = Comment.objects.create(task=self.tasks[1], author=self.manager, text="чужой")
+        response = self.client.get(self.url, {"before_id": foreign.pk})
+        self.assertEqual(response.status_code, 404)
+
+    def test_invalid_limit(self):
+        for limit in ("0", "abc"):
+            with self.subTest(limit):
+                self.assertEqual(self.client.get(self.url, {"limit": limit}).status_code, 400)
+
+    def test_panel_detail_has_latest_page(self):
+        response = self.post_json(reverse("crm:task_panel_api", args=[self.task.pk]), {"action": "detail"})
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual([m["id"] for m in data["chat"]], self.ids)
+        self.assertFalse(data["chat_has_more"])
@@ -0,0 +1,45 @@
+from django.urls import reverse
+
+from crm.models import Comment, TaskCheckpoint
+
+from .base import CrmTestCase
+
+
+class TaskSubResourceETagTests(CrmTestCase):
+    def setUp(self):
+        super().setUp()
+        self.task = self.tasks[0]
+        self.login(self.manager)
+
+    def get(self, name, etag=None):
+        extra = {"HTTP_IF_NONE_MATCH": etag} if etag else {}
+        response = self.client.get(reverse(name, args=[self.task.pk]), **extra)
+        self.assertWithinBudget(response)
+        return response
+
+    def test_repeat_request_is_not_modified(self):
+        for name in ("crm:task_meta_api", "crm:task_checkpoints_api", "crm:task_chat_api"):
+            with self.subTest(name):
+                first = self.get(name)
+                self.assertEqual(first.status_code, 200)
+                again = self.get(name, first["ETag"])
+                self.assertEqual(again.status_code, 304)
+                self.assertEqual(again.content, b"")
+                self.assertEqual(again["ETag"], first["ETag"])
+
+    def test_task_update_changes_meta_etag(self):
+        etag = self.get("crm:task_meta_api")["ETag"]
+        self.task.title = "Новое название"
+        self.task.save()
+        response = self.get("crm:task_meta_api", etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+        self.assertEqual(response.json()["task"]["title"], "Новое название")
+
+    def test_new_checkpoint_and_message_change_etags(self):
+        checkpoints = self.get("crm:task_checkpoints_api")["ETag"]
+        chat = self.get("crm:task_chat_api")["ETag"]
+        TaskCheckpoint.objects.create(task=self.task, title="Шаг", order=1024)
+        Comment.objects.create(task=self.task, author=self.manager, text="Привет")
+        self.assertEqual(self.get("crm:task_checkpoints_api", checkpoints).status_code, 200)
+        self.assertEqual(self.get("crm:task_chat_api", chat).status_code, 200)
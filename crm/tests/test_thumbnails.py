@@ -0,0 +1,98 @@
+import shutil
+import tempfile
+from io import BytesIO, StringIO
+from pathlib import Path
+
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import override_settings
+from django.urls import reverse
+from PIL import Image
+
+from crm import thumbnails
+
+from .base import CrmTestCase
+
+
+def png(width=1200, height=800, color="red") -> bytes:
+    out = BytesIO()
+    Image.new("RGBA", (width, height), color).save(out, "PNG")
+    return out.getvalue()
+
+
+class ThumbnailTests(CrmTestCase):
+    def setUp(self):
+        super().setUp()
+        root = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, root, ignore_errors=True)
+        settings = override_settings(
+            MEDIA_ROOT=root / "media", CRM_THUMBNAIL_SPOOL=root / "spool", CRM_ATTACHMENT_SENDFILE=None
+        )
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.task = self.tasks[0]
+        self.login(self.manager)
+
+    def upload(self, content, name="photo.png"):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                reverse("crm:task_attachments_api", args=[self.task.pk]),
+                {"file": SimpleUploadedFile(name, content, content_type="image/png")},
+            )
+        self.assertEqual(response.status_code, 201)
+        return response.json()["attachment"]
+
+    def listed(self):
+        response = self.client.get(reverse("crm:task_attachments_api", args=[self.task.pk]))
+        self.assertWithinBudget(response)
+        return response.json()["attachments"]
+
+    def build_queued(self) -> str:
+        out = StringIO()
+        call_command("build_thumbnails", stdout=out)
+        return out.getvalue()
+
+    def test_generated_from_queue_and_served(self):
+        data = self.upload(png())
+        sha256 = self.task.attachments.get().sha256
+        # до построения отдаётся оригинал
+        self.assertEqual(data["thumbnail"], default_storage.url(self.task.attachments.get().file.name))
+        self.assertIn(f"Построено превью: {len(thumbnails.SIZES)}", self.build_queued())
+        for size, (width, height, mode) in thumbnails.SIZES.items():
+            with self.subTest(size):
+                with default_storage.open(thumbnails.variant_name(sha256, size), "rb") as fh:
+                    image = Image.open(fh)
+                    self.assertEqual(image.format, "JPEG")
+                    if mode == "crop":
+                        self.assertEqual(image.size, (width, height))
+                    else:
+                        self.assertEqual(image.size, (width, width * 2 // 3))
+        self.assertEqual(self.listed()[0]["thumbnail"], default_storage.url(thumbnails.variant_name(sha256, "card")))
+        # очередь разобрана: повторный запуск ничего не строит
+        self.assertEqual(self.build_queued(), "")
+
+    def test_same_image_built_once(self):
+        content = png()
+        self.upload(content, "a.png")
+        self.upload(content, "b.png")
+        self.assertEqual(thumbnails.drain(), len(thumbnails.SIZES))
+        self.assertEqual(len({row["thumbnail"] for row in self.listed()}), 1)
+
+    def test_broken_image_is_skipped(self):
+        data = self.upload(b"not an image", "broken.png")
+        self.assertEqual(thumbnails.drain(), 0)
+        self.assertEqual(self.listed()[0]["thumbnail"], data["thumbnail"])
+
+    def test_build_all_covers_existing_images(self):
+        with override_settings(CRM_THUMBNAIL_SPOOL=None):
+            self.client.post(
+                reverse("crm:task_attachments_api", args=[self.task.pk]),
+                {"file": SimpleUploadedFile("old.png", png(), content_type="image/png")},
+            )
+        # без очереди превью строится после коммита, а его в тесте не было
+        sha256 = self.task.attachments.get().sha256
+        self.assertFalse(thumbnails.is_ready(sha256, "card"))
+        out = StringIO()
+        call_command("build_thumbnails", "--all", stdout=out)
+        self.assertTrue(thumbnails.is_ready(sha256, "card"))
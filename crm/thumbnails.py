@@ -0,0 +1,141 @@
+"""
+Превью картинок: фото пользователей (User.photo) и вложения-изображения.
+
+Превью строятся не в запросе: после загрузки в очередь (crm.spool,
+settings.CRM_THUMBNAIL_SPOOL) ставится задание, команда ``build_thumbnails``
+делает все размеры из SIZES. Имя превью — от sha256 содержимого
+(thumbs/ab/<хеш>/<размер>.jpg), поэтому одинаковые картинки обрабатываются
+один раз, а сменившееся фото получает новые превью.
+
+Шаблоны берут адрес через url() (тег {% thumbnail_url %}): пока превью нет,
+отдаётся оригинал. Наличие превью запоминается в кеше, чтобы страница со
+списком аватаров не проверяла хранилище на каждом показе.
+"""
+
+import hashlib
+from io import BytesIO
+from pathlib import Path
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import transaction
+from PIL import Image, ImageOps
+
+from . import spool
+
+# имя -> (ширина, высота, режим): crop — обрезка по центру до точного размера, fit — вписать
+SIZES = {
+    "avatar": (160, 160, "crop"),
+    "card": (480, 480, "fit"),
+}
+MISSING_TTL = 30  # отсутствие превью перепроверяется не чаще раза в 30 с
+
+
+def spool_dir() -> Path | None:
+    path = getattr(settings, "CRM_THUMBNAIL_SPOOL", None)
+    return Path(path) if path else None
+
+
+def variant_name(sha256: str, size: str) -> str:
+    return f"thumbs/{sha256[:2]}/{sha256}/{size}.jpg"
+
+
+def _ready_key(sha256: str, size: str) -> str:
+    return f"crm:thumb:{sha256}:{size}"
+
+
+def is_ready(sha256: str, size: str) -> bool:
+    key = _ready_key(sha256, size)
+    ready = cache.get(key)
+    if ready is None:
+        ready = default_storage.exists(variant_name(sha256, size))
+        cache.set(key, ready, None if ready else MISSING_TTL)
+    return ready
+
+
+def url(file, sha256: str, size: str = "avatar") -> str:
+    """Адрес превью, а пока его нет — оригинала; пустая строка, если файла нет."""
+    if not file:
+        return ""
+    if sha256 and size in SIZES and is_ready(sha256, size):
+        return default_storage.url(variant_name(sha256, size))
+    return file.url
+
+
+def file_sha256(name: str) -> str:
+    digest = hashlib.sha256()
+    with default_storage.open(name, "rb") as fh:
+        for chunk in iter(lambda: fh.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+# ---- Очередь и построение ----
+
+
+def enqueue(name: str, sha256: str) -> None:
+    """Ставит построение превью файла name после коммита (без очереди — сразу после коммита)."""
+    if not name or not sha256 or all(is_ready(sha256, size) for size in SIZES):
+        return
+    directory = spool_dir()
+    if directory is None:
+        transaction.on_commit(lambda: build(name, sha256))
+    else:
+        transaction.on_commit(lambda: spool.append(directory, {"name": name, "sha256": sha256}))
+
+
+def _render(image: Image.Image, width: int, height: int, mode: str) -> bytes:
+    if mode == "crop":
+        image = ImageOps.fit(image, (width, height), Image.Resampling.LANCZOS)
+    else:
+        image = image.copy()
+        image.thumbnail((width, height), Image.Resampling.LANCZOS)
+    out = BytesIO()
+    image.save(out, "JPEG", quality=85, optimize=True, progressive=True)
+    return out.getvalue()
+
+
+def build(name: str, sha256: str) -> int:
+    """Строит недостающие превью; возвращает число созданных. Битый файл пропускается."""
+    missing = [size for size in SIZES if not default_storage.exists(variant_name(sha256, size))]
+    if not missing:
+        return 0
+    try:
+        with default_storage.open(name, "rb") as fh, Image.open(fh) as source:
+            source = ImageOps.exif_transpose(source)
+            if source.mode != "RGB":
+                # прозрачность кладём на белый фон: JPEG её не хранит
+                rgba = source.convert("RGBA")
+                source = Image.new("RGB", rgba.size, "white")
+                source.paste(rgba, mask=rgba.getchannel("A"))
+            for size in missing:
+                width, height, mode = SIZES[size]
+                target = variant_name(sha256, size)
+                saved = default_storage.save(target, ContentFile(_render(source, width, height, mode)))
+                if saved != target:
+                    # превью параллельно построил другой воркер
+                    default_storage.delete(saved)
+                cache.delete(_ready_key(sha256, size))
+    except (OSError, ValueError, Image.DecompressionBombError):
+        return 0
+    return len(missing)
+
+
+def drain() -> int:
+    """Разбирает очередь; возвращает число созданных превью."""
+    directory = spool_dir()
+    if directory is None:
+        return 0
+
+    def handle(rows: list[dict]) -> int:
+        done = set()
+        total = 0
+        for row in rows:
+            if row.get("sha256") and row["sha256"] not in done:
+                done.add(row["sha256"])
+                total += build(row["name"], row["sha256"])
+        return total
+
+    return spool.drain(directory, handle)
@@ -9,12 +9,28 @@ from .views import (
     DeveloperTakeTaskView,
     DashboardRedirectView,
     KanbanBoardView,
+    KanbanBoardDataApiView,
     KanbanMoveApiView,
+    KanbanBatchMoveApiView,
+    KanbanChangesApiView,
     TaskPanelApiView,
+    TaskChatApiView,
+    RequestMessagesApiView,
+    TaskMetaApiView,
+    TaskCheckpointsApiView,
     LandingView,
     ClientRequestListView,
     ClientRequestDetailView,
     RequestCheckpointApiView,
+    ProjectEventStreamView,
+    RequestEventStreamView,
+    SearchApiView,
+    SprintBurndownApiView,
+    ProjectVelocityApiView,
+    ProjectFlowReportApiView,
+    ProjectEventExportView,
+    TaskAttachmentsApiView,
+    AttachmentDownloadView,
 )
 
 
@@ -37,8 +53,25 @@ urlpatterns = [
     ),
     path("manager/projects/<int:pk>/", ManagerProjectDetailView.as_view(), name="manager_project_detail"),
     path("manager/projects/<int:pk>/board/", KanbanBoardView.as_view(), name="kanban_board"),
+    path("manager/projects/<int:pk>/board/data/", KanbanBoardDataApiView.as_view(), name="kanban_board_data"),
+    path("manager/projects/<int:pk>/flow/", ProjectFlowReportApiView.as_view(), name="project_flow_api"),
+    path("manager/projects/<int:pk>/events.csv", ProjectEventExportView.as_view(), name="project_events_export"),
+    path("manager/projects/<int:pk>/velocity/", ProjectVelocityApiView.as_view(), name="project_velocity_api"),
+    path("manager/sprints/<int:pk>/burndown/", SprintBurndownApiView.as_view(), name="sprint_burndown_api"),
+    path("requests/<int:pk>/messages/", RequestMessagesApiView.as_view(), name="request_messages_api"),
     path("manager/tasks/<int:pk>/panel/", TaskPanelApiView.as_view(), name="task_panel_api"),
+    path("manager/tasks/<int:pk>/meta/", TaskMetaApiView.as_view(), name="task_meta_api"),
+    path("manager/tasks/<int:pk>/checkpoints/", TaskCheckpointsApiView.as_view(), name="task_checkpoints_api"),
+    path("manager/tasks/<int:pk>/chat/", TaskChatApiView.as_view(), name="task_chat_api"),
+    path("tasks/<int:pk>/attachments/", TaskAttachmentsApiView.as_view(), name="task_attachments_api"),
+    path("attachments/<int:pk>/download/", AttachmentDownloadView.as_view(), name="attachment_download"),
     path("kanban/move/", KanbanMoveApiView.as_view(), name="kanban_move"),
+    path("kanban/move/batch/", KanbanBatchMoveApiView.as_view(), name="kanban_move_batch"),
+    path("kanban/changes/", KanbanChangesApiView.as_view(), name="kanban_changes"),
+    # Push (SSE, только под ASGI)
+    path("search/", SearchApiView.as_view(), name="search_api"),
+    path("stream/projects/<int:pk>/", ProjectEventStreamView.as_view(), name="project_stream"),
+    path("stream/requests/<int:pk>/", RequestEventStreamView.as_view(), name="request_stream"),
     # Developer area
     path("dev/open/", DeveloperOpenTasksView.as_view(), name="dev_open_tasks"),
     path("dev/take/<int:pk>/", DeveloperTakeTaskView.as_view(), name="dev_take_task"),
@@ -1,44 +1,118 @@
 from django.shortcuts import render, get_object_or_404, redirect
 from django.views import View
 from django.views.generic import ListView, DetailView
-from django.http import HttpRequest, HttpResponse, JsonResponse
+from django.db import transaction
+from django.db.models import Count, Max
+from django.core.handlers.asgi import ASGIRequest
+from django.http import HttpRequest, HttpResponse, JsonResponse, StreamingHttpResponse
 from django.urls import reverse
-from django.views.decorators.http import require_POST
+from django.views.decorators.http import require_GET, require_POST
+from django.utils import timezone
+from django.utils.dateparse import parse_date
 from django.utils.decorators import method_decorator
 # Импорты login, validate_password, ValidationError удалены - больше не используются после удаления SignupView
 
 from accounts.mixins import ManagerRequiredMixin, DeveloperRequiredMixin, LoginRequiredMixin, ClientRequiredMixin
+from accounts.mixins import RoleAllowedMixin
 from accounts.models import User
-from .models import ClientRequest, Project, Task, RequestCheckpoint, TaskCheckpoint
-from .models import Message
+from .models import ClientRequest, Project, Sprint, Task, TaskEvent, RequestCheckpoint, TaskCheckpoint
+from .models import Attachment, Comment, Message
+from . import attachments, burndown, fragments, intake, ordering, pool, realtime, reports, search, stats
+from .forms import PublicRequestForm
+from .conditional import conditional_json, make_etag
+from .pagination import keyset_window
+from .kanban import apply_moves, board_changes, board_cursor, board_payload, decode_cursor, load_board
 
 
 class PublicRequestView(View):
+    """Публичная форма заявки: ограничение частоты по IP и запись через очередь (crm.intake)."""
+
+    query_budget = 3
+
     def get(self, request: HttpRequest) -> HttpResponse:
-        return render(request, "crm/public_request.html")
+        return render(request, "crm/public_request.html", {"form": PublicRequestForm()})
 
     def post(self, request: HttpRequest) -> HttpResponse:
-        data = request.POST
-        ClientRequest.objects.create(
-            project_type=data.get("project_type"),
-            title=data.get("title", ""),
-            description=data.get("description", ""),
-            contact_email=data.get("contact_email", ""),
-            contact_telegram=data.get("contact_telegram", ""),
-        )
+        form = PublicRequestForm(request.POST)
+        if not intake.allow(request.META.get("REMOTE_ADDR", "")):
+            return render(request, "crm/public_request.html", {"form": form, "throttled": True}, status=429)
+        if not form.is_valid():
+            return render(request, "crm/public_request.html", {"form": form}, status=400)
+        intake.submit(form.cleaned_data)
         return render(request, "crm/public_request_success.html")
 
 
 class ManagerRequestListView(ManagerRequiredMixin, ListView):
+    """
+    Входящие заявки: фильтры status / project_type / manager (id, me, none) и
+    keyset-пагинация вместо OFFSET — ?before_id=<id> (старее), ?after_id=<id> (новее).
+    Каждый фильтр покрыт составным индексом (поле, created_at, id), поэтому
+    глубокая страница стоит столько же, сколько первая; COUNT не считается.
+    """
+
     model = ClientRequest
     template_name = "crm/manager/request_list.html"
-    paginate_by = 20
-    ordering = ["-created_at"]
+    page_size = 20
+    query_budget = 5
+    read_replica = True
+
+    def get_filters(self) -> dict:
+        params = self.request.GET
+        filters = {}
+        if params.get("status") in ClientRequest.Status.values:
+            filters["status"] = params["status"]
+        if params.get("project_type") in ClientRequest.ProjectType.values:
+            filters["project_type"] = params["project_type"]
+        manager = params.get("manager", "")
+        if manager == "me":
+            filters["manager_id"] = self.request.user.pk
+        elif manager == "none":
+            filters["manager__isnull"] = True
+        elif manager.isdigit():
+            filters["manager_id"] = int(manager)
+        return filters
+
+    def get_queryset(self):
+        return ClientRequest.objects.filter(**self.get_filters()).select_related("manager")
+
+    def get_context_data(self, **kwargs):
+        params = self.request.GET
+        before_id = int(params["before_id"]) if params.get("before_id", "").isdigit() else None
+        after_id = int(params["after_id"]) if params.get("after_id", "").isdigit() else None
+        try:
+            rows, has_more = keyset_window(
+                self.object_list, before_id=before_id, after_id=after_id, limit=self.page_size
+            )
+        except ClientRequest.DoesNotExist:
+            # якорь исчез или больше не подходит под фильтр — показываем первую страницу
+            before_id = after_id = None
+            rows, has_more = keyset_window(self.object_list, limit=self.page_size)
+        rows.reverse()  # новые сверху
+
+        params = params.copy()
+        for key in ("before_id", "after_id"):
+            params.pop(key, None)
+        ctx = super().get_context_data(object_list=rows, **kwargs)
+        ctx.update(
+            {
+                "filter_query": params.urlencode(),
+                "has_newer": has_more if after_id is not None else before_id is not None,
+                "has_older": has_more if after_id is None else True,
+                "newest_id": rows[0].pk if rows else None,
+                "oldest_id": rows[-1].pk if rows else None,
+                "statuses": ClientRequest.Status.choices,
+                "project_types": ClientRequest.ProjectType.choices,
+                "managers": User.objects.filter(role=User.Role.MANAGER).only("id", "username").order_by("username"),
+                "current": self.request.GET,
+            }
+        )
+        return ctx
 
 
 class ManagerRequestDetailView(ManagerRequiredMixin, DetailView):
     model = ClientRequest
     template_name = "crm/manager/request_detail.html"
+    query_budget = 7
 
     def get_context_data(self, **kwargs):
         ctx = super().get_context_data(**kwargs)
@@ -48,6 +122,9 @@ class ManagerRequestDetailView(ManagerRequiredMixin, DetailView):
                 "id", "title", "comment", "is_done", "order", "created_at", "updated_at"
             )
         )
+        ctx["thread_messages"], ctx["thread_has_more"] = keyset_window(
+            request_messages_queryset(self.object), limit=RequestMessagesApiView.default_limit
+        )
         return ctx
 
     def post(self, request: HttpRequest, pk: int) -> HttpResponse:
@@ -65,15 +142,27 @@ class ManagerRequestDetailView(ManagerRequiredMixin, DetailView):
                 client_request=client_request,
                 defaults={"name": client_request.title, "description": client_request.description},
             )
+        elif action == "message":
+            # отправка без JS; со страницы сообщения уходят через RequestMessagesApiView
+            text = request.POST.get("text", "").strip()
+            if text:
+                Message.objects.create(request=client_request, author=request.user, text=text)
         return redirect("crm:manager_request_detail", pk=client_request.pk)
 
 
 class ManagerProjectDetailView(ManagerRequiredMixin, DetailView):
     model = Project
     template_name = "crm/manager/project_detail.html"
+    # создание задачи дороже чтения: статистика, журнал и индекс поиска пишутся в той же транзакции
+    query_budget = {"GET": 6, "POST": 10}
 
     def get_context_data(self, **kwargs):
         ctx = super().get_context_data(**kwargs)
+        # Сводка читается одной строкой ProjectStats, без агрегации по задачам
+        ctx["stats"] = stats.get_stats(self.object)
+        ctx["tasks"] = self.object.tasks.select_related("created_by", "assignee").order_by("status", "order", "id")
+        # Строки неизменённых задач берутся из кеша фрагментов (crm.fragments)
+        ctx.update(fragments.context(self.object.pk))
         # Список разработчиков для назначения исполнителя прямо при создании задачи
         ctx["developers"] = (
             User.objects.filter(role=User.Role.DEVELOPER, is_active=True)
@@ -88,7 +177,11 @@ class ManagerProjectDetailView(ManagerRequiredMixin, DetailView):
         description = request.POST.get("description", "").strip()
         task_type = request.POST.get("task_type")
         assignee_id = request.POST.get("assignee") or ""
-        due_date = request.POST.get("due_date") or None
+        try:
+            # строка из формы в date: в снимок состояния и статистику должна попасть дата, а не текст
+            due_date = parse_date(request.POST.get("due_date") or "")
+        except ValueError:
+            due_date = None
         story_points_raw = request.POST.get("story_points") or "0"
 
         assignee = None
@@ -104,6 +197,8 @@ class ManagerProjectDetailView(ManagerRequiredMixin, DetailView):
         if title and task_type in dict(Task.TaskType.choices):
             Task.objects.create(
                 project=project,
+                # в конец колонки «К выполнению»: при общем order=0 любая вставка выше перенумеровывала колонку
+                order=ordering.last_key(project.tasks.filter(status=Task.Status.TODO)),
                 title=title,
                 description=description,
                 task_type=task_type,
@@ -116,36 +211,59 @@ class ManagerProjectDetailView(ManagerRequiredMixin, DetailView):
 
 
 class DeveloperOpenTasksView(DeveloperRequiredMixin, ListView):
+    """Пул свободных задач по типу разработчика (crm.pool), страницы по ?after=<id задачи>."""
+
     model = Task
     template_name = "crm/dev/open_tasks.html"
+    page_size = 50
+    query_budget = 5
+    read_replica = True
 
     def get_queryset(self):
         user: User = self.request.user
-        dev_types = []
-        if user.developer_type == User.DeveloperType.FULLSTACK:
-            dev_types = [User.DeveloperType.FRONTEND, User.DeveloperType.BACKEND, User.DeveloperType.FULLSTACK]
-        else:
-            dev_types = [user.developer_type]
-        return (
-            Task.objects.filter(status=Task.Status.TODO, assignee__isnull=True, task_type__in=dev_types)
-            .select_related("project")
-            .order_by("project__created_at")
+        after = self.request.GET.get("after", "")
+        rows, self.has_more = pool.open_tasks(
+            pool.task_types_for(user.developer_type),
+            after_id=int(after) if after.isdigit() else None,
+            limit=self.page_size,
         )
+        return rows
 
+    def get_context_data(self, **kwargs):
+        ctx = super().get_context_data(**kwargs)
+        ctx["has_more"] = self.has_more
+        ctx["next_after"] = self.object_list[-1].pk if self.object_list else None
+        ctx["is_first_page"] = not self.request.GET.get("after")
+        return ctx
 
+
+@method_decorator(require_POST, name="dispatch")
 class DeveloperTakeTaskView(DeveloperRequiredMixin, View):
+    """
+    Взять задачу из пула. Ограничение «один исполнитель — одна активная задача»
+    и свободность задачи проверяются атомарно (crm.pool.claim).
+    Отвечает JSON для fetch (Accept: application/json), иначе — редирект на пул.
+    """
+
+    query_budget = 11
+
     def post(self, request: HttpRequest, pk: int) -> HttpResponse:
-        task = get_object_or_404(Task, pk=pk, assignee__isnull=True, status=Task.Status.TODO)
-        # Ограничение: один исполнитель — одна активная задача
-        has_active = Task.objects.filter(assignee=request.user).exclude(status=Task.Status.DONE).exists()
-        if not has_active:
-            task.assignee = request.user
-            task.status = Task.Status.IN_PROGRESS
-            task.save()
+        wants_json = not request.accepts("text/html")
+        try:
+            task = pool.claim(pk, request.user)
+        except pool.ClaimError as exc:
+            if wants_json:
+                status = 404 if exc.code == "not_found" else 409
+                return JsonResponse({"ok": False, "error": exc.code}, status=status)
+            return redirect("crm:dev_open_tasks")
+        if wants_json:
+            return JsonResponse({"ok": True, "task": {"id": task.pk, "status": task.status, "version": task.version}})
         return redirect("crm:dev_open_tasks")
 
 
 class DashboardRedirectView(LoginRequiredMixin, View):
+    query_budget = 2
+
     def get(self, request: HttpRequest) -> HttpResponse:
         user: User = request.user
         if user.is_manager():
@@ -156,6 +274,8 @@ class DashboardRedirectView(LoginRequiredMixin, View):
 
 
 class LandingView(View):
+    query_budget = 2
+
     def get(self, request: HttpRequest) -> HttpResponse:
         return render(request, "crm/landing.html")
 
@@ -163,6 +283,7 @@ class LandingView(View):
 class ClientRequestListView(ClientRequiredMixin, ListView):
     model = ClientRequest
     template_name = "crm/client/requests.html"
+    query_budget = 4
 
     def get_queryset(self):
         return ClientRequest.objects.filter(client=self.request.user).order_by("-created_at")
@@ -171,10 +292,19 @@ class ClientRequestListView(ClientRequiredMixin, ListView):
 class ClientRequestDetailView(ClientRequiredMixin, DetailView):
     model = ClientRequest
     template_name = "crm/client/request_detail.html"
+    query_budget = 5
 
     def get_queryset(self):
         return ClientRequest.objects.filter(client=self.request.user)
 
+    def get_context_data(self, **kwargs):
+        ctx = super().get_context_data(**kwargs)
+        # последнее окно переписки, остальное — через RequestMessagesApiView
+        ctx["thread_messages"], ctx["thread_has_more"] = keyset_window(
+            request_messages_queryset(self.object), limit=RequestMessagesApiView.default_limit
+        )
+        return ctx
+
     def post(self, request: HttpRequest, pk: int) -> HttpResponse:
         obj = self.get_object()
         text = request.POST.get("text", "").strip()
@@ -189,44 +319,134 @@ class ClientRequestDetailView(ClientRequiredMixin, DetailView):
 class KanbanBoardView(ManagerRequiredMixin, DetailView):
     model = Project
     template_name = "crm/kanban.html"
+    query_budget = 5
+    read_replica = True
 
     def get_context_data(self, **kwargs):
         ctx = super().get_context_data(**kwargs)
         project: Project = self.object
-        ctx["todo"] = project.tasks.filter(status=Task.Status.TODO).order_by("order", "created_at")
-        ctx["in_progress"] = project.tasks.filter(status=Task.Status.IN_PROGRESS).order_by("order", "created_at")
-        ctx["review"] = project.tasks.filter(status=Task.Status.REVIEW).order_by("order", "created_at")
-        ctx["done"] = project.tasks.filter(status=Task.Status.DONE).order_by("order", "created_at")
+        # Одна выборка на всю доску вместо отдельного запроса на колонку и на исполнителя
+        columns = load_board(project)
+        ctx["todo"] = columns[Task.Status.TODO]
+        ctx["in_progress"] = columns[Task.Status.IN_PROGRESS]
+        ctx["review"] = columns[Task.Status.REVIEW]
+        ctx["done"] = columns[Task.Status.DONE]
+        ctx["sync_cursor"] = board_cursor(columns) or ""
+        # Карточки неизменённых задач берутся из кеша фрагментов (crm.fragments)
+        ctx.update(fragments.context(project.pk))
         return ctx
 
 
+@method_decorator(require_GET, name="dispatch")
+class KanbanBoardDataApiView(ManagerRequiredMixin, View):
+    """
+    JSON с содержимым всей доски (колонки + карточки) для JS.
+    """
+
+    query_budget = 5
+    read_replica = True
+
+    def get(self, request: HttpRequest, pk: int) -> JsonResponse:
+        project = get_object_or_404(Project, pk=pk)
+        return JsonResponse({"ok": True, **board_payload(project)})
+
+
+@method_decorator(require_GET, name="dispatch")
+class KanbanChangesApiView(ManagerRequiredMixin, View):
+    """
+    Дельта доски для опроса: ?project=<id>&cursor=<курсор из прошлого ответа>.
+    Возвращает только изменённые/новые карточки и id удалённых задач.
+    """
+
+    query_budget = 5
+    read_replica = True
+
+    def get(self, request: HttpRequest) -> JsonResponse:
+        try:
+            project_id = int(request.GET.get("project", ""))
+            cursor = request.GET.get("cursor") or None
+            if cursor:
+                decode_cursor(cursor)
+        except (TypeError, ValueError):
+            return JsonResponse({"ok": False, "error": "invalid_params"}, status=400)
+
+        project = get_object_or_404(Project, pk=project_id)
+        return JsonResponse({"ok": True, **board_changes(project, cursor)})
+
+
 @method_decorator(require_POST, name='dispatch')
 class KanbanMoveApiView(ManagerRequiredMixin, View):
+    query_budget = 10
+
     def post(self, request: HttpRequest) -> JsonResponse:
         try:
             import json
             payload = json.loads(request.body.decode("utf-8"))
             task_id = int(payload.get("id"))
             new_status = payload.get("status")
+            position = payload.get("position")
+            position = None if position is None else int(position)
         except Exception:
             return JsonResponse({"ok": False, "error": "invalid_payload"}, status=400)
 
         if new_status not in dict(Task.Status.choices):
             return JsonResponse({"ok": False, "error": "bad_status"}, status=400)
 
-        task = get_object_or_404(Task, pk=task_id)
-        task.status = new_status
-        # Простое переупорядочивание: помещаем в конец колонки
-        last_order = (
-            Task.objects.filter(project=task.project, status=new_status)
-            .exclude(pk=task.pk)
-            .order_by("-order")
-            .values_list("order", flat=True)
-            .first()
-        ) or 0
-        task.order = last_order + 1
-        task.save(update_fields=["status", "order", "updated_at"])
-        return JsonResponse({"ok": True})
+        # Ключ, перенумерация и запись — одной транзакцией, как в apply_moves:
+        # параллельный перенос не перенумерует колонку по устаревшему списку соседей
+        with transaction.atomic():
+            task = get_object_or_404(Task.objects.select_for_update(), pk=task_id)
+            task.status = new_status
+            # Ключ между соседями на позиции position (по умолчанию — в конец колонки): пишется одна строка
+            siblings = Task.objects.filter(project_id=task.project_id, status=new_status).exclude(pk=task.pk)
+            order = ordering.position_key(siblings, position)
+            if order is None:
+                order = ordering.respace(siblings, insert=(task.pk, position))[task.pk]
+            task.order = order
+            task.save(update_fields=["status", "order", "updated_at"])
+        return JsonResponse({"ok": True, "order": task.order})
+
+
+@method_decorator(require_POST, name="dispatch")
+class KanbanBatchMoveApiView(ManagerRequiredMixin, View):
+    """
+    Пакетное перемещение карточек одной транзакцией:
+    {"moves": [{"id": 1, "status": "done", "position": 0}, ...]}
+    position — индекс в целевой колонке (необязателен, по умолчанию в конец).
+    """
+
+    max_moves = 1000
+    query_budget = 10
+
+    def post(self, request: HttpRequest) -> JsonResponse:
+        import json
+
+        try:
+            payload = json.loads(request.body.decode("utf-8"))
+            moves = []
+            for item in payload.get("moves"):
+                position = item.get("position")
+                moves.append(
+                    {
+                        "id": int(item["id"]),
+                        "status": item["status"],
+                        "position": None if position is None else int(position),
+                    }
+                )
+        except Exception:
+            return JsonResponse({"ok": False, "error": "invalid_payload"}, status=400)
+
+        if not moves or len(moves) > self.max_moves:
+            return JsonResponse({"ok": False, "error": "bad_moves_count"}, status=400)
+        statuses = dict(Task.Status.choices)
+        if any(m["status"] not in statuses for m in moves):
+            return JsonResponse({"ok": False, "error": "bad_status"}, status=400)
+
+        try:
+            result = apply_moves(moves)
+        except Task.DoesNotExist as exc:
+            return JsonResponse({"ok": False, "error": "not_found", "ids": exc.args[0]}, status=404)
+        return JsonResponse({"ok": True, **result})
 
 
 @method_decorator(require_POST, name="dispatch")
@@ -236,9 +456,12 @@ class RequestCheckpointApiView(ManagerRequiredMixin, View):
     - action=create  (title, comment, is_done?)
     - action=update  (id, title?, comment?, is_done?)
     - action=delete  (id)
+    - action=move    (id, position) — перенос одного чекпоинта, пишет одну строку
     - action=reorder (ids: [id1, id2, ...] в новом порядке)
     """
 
+    query_budget = 6
+
     def post(self, request: HttpRequest, pk: int) -> JsonResponse:
         import json
 
@@ -255,17 +478,11 @@ class RequestCheckpointApiView(ManagerRequiredMixin, View):
             comment = (payload.get("comment") or "").strip()
             if not title:
                 return JsonResponse({"ok": False, "error": "title_required"}, status=400)
-            last_order = (
-                client_request.checkpoints.order_by("-order")
-                .values_list("order", flat=True)
-                .first()
-                or 0
-            )
             cp = RequestCheckpoint.objects.create(
                 request=client_request,
                 title=title,
                 comment=comment,
-                order=last_order + 1,
+                order=ordering.last_key(client_request.checkpoints.all()),
             )
             return JsonResponse(
                 {
@@ -306,29 +523,224 @@ class RequestCheckpointApiView(ManagerRequiredMixin, View):
             cp.delete()
             return JsonResponse({"ok": True})
 
+        if action == "move":
+            cp = get_object_or_404(RequestCheckpoint, pk=payload.get("id"), request=client_request)
+            try:
+                position = int(payload.get("position"))
+            except (TypeError, ValueError):
+                return JsonResponse({"ok": False, "error": "position_required"}, status=400)
+            orders = ordering.move_to(cp, client_request.checkpoints.all(), position)
+            realtime.publish(realtime.request_channel(client_request.pk), "checkpoint", {"id": cp.pk})
+            return JsonResponse({"ok": True, "orders": orders})
+
         if action == "reorder":
             ids = payload.get("ids") or []
             if not isinstance(ids, list):
+                # строку "123" иначе разобрали бы по символам в [1, 2, 3]
                 return JsonResponse({"ok": False, "error": "ids_list_required"}, status=400)
-            order_map = {cp_id: idx for idx, cp_id in enumerate(ids, start=1)}
-            for cp in client_request.checkpoints.all():
-                if cp.id in order_map:
-                    cp.order = order_map[cp.id]
-                    cp.save(update_fields=["order"])
-            return JsonResponse({"ok": True})
+            try:
+                ids = [int(cp_id) for cp_id in ids]
+            except (TypeError, ValueError):
+                return JsonResponse({"ok": False, "error": "ids_list_required"}, status=400)
+            # Один UPDATE с CASE; чужие id обнаруживаются по числу обновлённых строк
+            try:
+                orders = ordering.bulk_reorder(client_request.checkpoints.all(), ids)
+            except RequestCheckpoint.DoesNotExist:
+                return JsonResponse({"ok": False, "error": "not_found"}, status=404)
+            realtime.publish(realtime.request_channel(client_request.pk), "checkpoint", {"ids": ids})
+            return JsonResponse({"ok": True, "orders": orders})
 
         return JsonResponse({"ok": False, "error": "bad_action"}, status=400)
 
 
+def task_meta(task: Task) -> dict:
+    return {
+        "id": task.id,
+        "title": task.title,
+        "description": task.description,
+        "status": task.status,
+        "status_label": task.get_status_display(),
+        "task_type": task.task_type,
+        "task_type_label": task.get_task_type_display(),
+        "story_points": task.story_points,
+        "assignee": getattr(task.assignee, "username", None),
+        "created_by": getattr(task.created_by, "username", None),
+        "due_date": task.due_date.isoformat() if task.due_date else None,
+        "project_id": task.project_id,
+    }
+
+
+def task_checkpoints_queryset(task: Task):
+    return task.checkpoints.all().values("id", "title", "comment", "is_done", "order")
+
+
+def task_chat_queryset(task: Task):
+    return task.comments.values("id", "text", "created_at", "author__username")
+
+
+# ---- GET-подресурсы панели задачи: кешируются браузером, повторное открытие карточки даёт 304 ----
+
+
+@method_decorator(require_GET, name="dispatch")
+class TaskMetaApiView(ManagerRequiredMixin, View):
+    query_budget = 5
+    read_replica = True
+
+    def get(self, request: HttpRequest, pk: int) -> HttpResponse:
+        stamp = Task.objects.filter(pk=pk).values_list("version", "updated_at").first()
+        if stamp is None:
+            return JsonResponse({"ok": False, "error": "not_found"}, status=404)
+        version, updated_at = stamp
+
+        def build():
+            task = Task.objects.select_related("assignee", "created_by").get(pk=pk)
+            return {"task": task_meta(task)}
+
+        return conditional_json(request, make_etag("task", pk, version, updated_at), updated_at, build)
+
+
+@method_decorator(require_GET, name="dispatch")
+class TaskCheckpointsApiView(ManagerRequiredMixin, View):
+    query_budget = 5
+    read_replica = True
+
+    def get(self, request: HttpRequest, pk: int) -> HttpResponse:
+        task = get_object_or_404(Task.objects.only("id"), pk=pk)
+        # удаление меняет count, любое изменение (в т.ч. порядка) — max(updated_at)
+        stamp = task.checkpoints.aggregate(count=Count("id"), updated_at=Max("updated_at"))
+        etag = make_etag("checkpoints", pk, stamp["count"], stamp["updated_at"])
+        return conditional_json(
+            request, etag, stamp["updated_at"], lambda: {"checkpoints": list(task_checkpoints_queryset(task))}
+        )
+
+
+@method_decorator(require_GET, name="dispatch")
+class TaskChatApiView(ManagerRequiredMixin, View):
+    """
+    Страницы чата задачи (keyset по (created_at, id)):
+    - без параметров — последние сообщения;
+    - ?before_id=<id> — более старые, для подгрузки при прокрутке вверх;
+    - ?after_id=<id> — только новые.
+    """
+
+    default_limit = 50
+    max_limit = 200
+    query_budget = 6
+    read_replica = True
+
+    def get(self, request: HttpRequest, pk: int) -> HttpResponse:
+        task = get_object_or_404(Task.objects.only("id"), pk=pk)
+        try:
+            before_id = int(request.GET["before_id"]) if request.GET.get("before_id") else None
+            after_id = int(request.GET["after_id"]) if request.GET.get("after_id") else None
+            limit = min(int(request.GET.get("limit") or self.default_limit), self.max_limit)
+        except ValueError:
+            return JsonResponse({"ok": False, "error": "invalid_params"}, status=400)
+        if limit < 1:
+            return JsonResponse({"ok": False, "error": "invalid_params"}, status=400)
+
+        # Сообщения не редактируются: новое сообщение меняет count и max(created_at)
+        stamp = task.comments.aggregate(count=Count("id"), created_at=Max("created_at"))
+        etag = make_etag("chat", pk, stamp["count"], stamp["created_at"], before_id, after_id, limit)
+
+        def build():
+            messages, has_more = keyset_window(
+                task_chat_queryset(task), before_id=before_id, after_id=after_id, limit=limit
+            )
+            return {"messages": messages, "has_more": has_more}
+
+        try:
+            return conditional_json(request, etag, stamp["created_at"], build)
+        except Comment.DoesNotExist:
+            return JsonResponse({"ok": False, "error": "not_found"}, status=404)
+
+
+def request_messages_queryset(client_request: ClientRequest):
+    return client_request.messages.values("id", "text", "created_at", "author__username", "author__role")
+
+
+class RequestMessagesApiView(RoleAllowedMixin, View):
+    """
+    Переписка по заявке для менеджера и клиента-владельца (keyset по (created_at, id)):
+    - GET без параметров — последние сообщения, ?before_id=<id> — старше, ?after_id=<id> — только новые;
+    - POST {"text": ...} — новое сообщение.
+    """
+
+    allowed_roles = (User.Role.MANAGER, User.Role.CLIENT)
+    default_limit = 50
+    max_limit = 200
+    query_budget = 6
+    read_replica = True
+
+    def get_request(self, pk: int) -> ClientRequest:
+        visible = ClientRequest.objects.only("id")
+        if not self.request.user.is_manager():
+            visible = visible.filter(client=self.request.user)
+        return get_object_or_404(visible, pk=pk)
+
+    def get(self, request: HttpRequest, pk: int) -> HttpResponse:
+        client_request = self.get_request(pk)
+        try:
+            before_id = int(request.GET["before_id"]) if request.GET.get("before_id") else None
+            after_id = int(request.GET["after_id"]) if request.GET.get("after_id") else None
+            limit = min(int(request.GET.get("limit") or self.default_limit), self.max_limit)
+        except ValueError:
+            return JsonResponse({"ok": False, "error": "invalid_params"}, status=400)
+        if limit < 1:
+            return JsonResponse({"ok": False, "error": "invalid_params"}, status=400)
+
+        # Сообщения не редактируются: новое сообщение меняет count и max(created_at)
+        stamp = client_request.messages.aggregate(count=Count("id"), created_at=Max("created_at"))
+        etag = make_etag("messages", pk, stamp["count"], stamp["created_at"], before_id, after_id, limit)
+
+        def build():
+            messages, has_more = keyset_window(
+                request_messages_queryset(client_request), before_id=before_id, after_id=after_id, limit=limit
+            )
+            return {"messages": messages, "has_more": has_more}
+
+        try:
+            return conditional_json(request, etag, stamp["created_at"], build)
+        except Message.DoesNotExist:
+            return JsonResponse({"ok": False, "error": "not_found"}, status=404)
+
+    def post(self, request: HttpRequest, pk: int) -> JsonResponse:
+        import json
+
+        client_request = self.get_request(pk)
+        try:
+            payload = json.loads(request.body.decode("utf-8"))
+        except Exception:
+            return JsonResponse({"ok": False, "error": "invalid_json"}, status=400)
+        text = (payload.get("text") or "").strip()
+        if not text:
+            return JsonResponse({"ok": False, "error": "text_required"}, status=400)
+        message = Message.objects.create(request=client_request, author=request.user, text=text)
+        return JsonResponse(
+            {
+                "ok": True,
+                "message": {
+                    "id": message.id,
+                    "text": message.text,
+                    "created_at": message.created_at,
+                    "author__username": request.user.username,
+                    "author__role": request.user.role,
+                },
+            }
+        )
+
+
 @method_decorator(require_POST, name="dispatch")
 class TaskPanelApiView(ManagerRequiredMixin, View):
     """
     JSON‑API для боковой панели задачи на канбане.
-    - action=detail: данные задачи + чекпоинты + чат (последние 50)
-    - action=checkpoint_create/update/delete/reorder
+    - action=detail: данные задачи + чекпоинты + чат (последние 50, старые — через TaskChatApiView)
+    - action=checkpoint_create/update/delete/move/reorder
     - action=chat_add
     """
 
+    query_budget = 10
+
     def post(self, request: HttpRequest, pk: int) -> JsonResponse:
         import json
 
@@ -341,31 +753,15 @@ class TaskPanelApiView(ManagerRequiredMixin, View):
         action = payload.get("action") or "detail"
 
         if action == "detail":
-            checkpoints = list(task.checkpoints.all().values("id", "title", "comment", "is_done", "order"))
-            chat = list(
-                task.comments.select_related("author")
-                .order_by("-created_at")[:50]
-                .values("id", "text", "created_at", "author__username")
-            )[::-1]
+            checkpoints = list(task_checkpoints_queryset(task))
+            chat, chat_has_more = keyset_window(task_chat_queryset(task), limit=TaskChatApiView.default_limit)
             return JsonResponse(
                 {
                     "ok": True,
-                    "task": {
-                        "id": task.id,
-                        "title": task.title,
-                        "description": task.description,
-                        "status": task.status,
-                        "status_label": task.get_status_display(),
-                        "task_type": task.task_type,
-                        "task_type_label": task.get_task_type_display(),
-                        "story_points": task.story_points,
-                        "assignee": getattr(task.assignee, "username", None),
-                        "created_by": getattr(task.created_by, "username", None),
-                        "due_date": task.due_date.isoformat() if task.due_date else None,
-                        "project_id": task.project_id,
-                    },
+                    "task": task_meta(task),
                     "checkpoints": checkpoints,
                     "chat": chat,
+                    "chat_has_more": chat_has_more,
                 }
             )
 
@@ -375,8 +771,8 @@ class TaskPanelApiView(ManagerRequiredMixin, View):
             comment = (payload.get("comment") or "").strip()
             if not title:
                 return JsonResponse({"ok": False, "error": "title_required"}, status=400)
-            last_order = task.checkpoints.order_by("-order").values_list("order", flat=True).first() or 0
-            cp = TaskCheckpoint.objects.create(task=task, title=title, comment=comment, order=last_order + 1)
+            order = ordering.last_key(task.checkpoints.all())
+            cp = TaskCheckpoint.objects.create(task=task, title=title, comment=comment, order=order)
             return JsonResponse(
                 {
                     "ok": True,
@@ -416,16 +812,32 @@ class TaskPanelApiView(ManagerRequiredMixin, View):
             cp.delete()
             return JsonResponse({"ok": True})
 
+        if action == "checkpoint_move":
+            cp = get_object_or_404(TaskCheckpoint, pk=payload.get("id"), task=task)
+            try:
+                position = int(payload.get("position"))
+            except (TypeError, ValueError):
+                return JsonResponse({"ok": False, "error": "position_required"}, status=400)
+            orders = ordering.move_to(cp, task.checkpoints.all(), position)
+            realtime.publish(realtime.project_channel(task.project_id), "checkpoint", {"task_id": task.pk})
+            return JsonResponse({"ok": True, "orders": orders})
+
         if action == "checkpoint_reorder":
             ids = payload.get("ids") or []
             if not isinstance(ids, list):
+                # строку "123" иначе разобрали бы по символам в [1, 2, 3]
                 return JsonResponse({"ok": False, "error": "ids_list_required"}, status=400)
-            order_map = {cp_id: idx for idx, cp_id in enumerate(ids, start=1)}
-            for cp in task.checkpoints.all():
-                if cp.id in order_map:
-                    cp.order = order_map[cp.id]
-                    cp.save(update_fields=["order"])
-            return JsonResponse({"ok": True})
+            try:
+                ids = [int(cp_id) for cp_id in ids]
+            except (TypeError, ValueError):
+                return JsonResponse({"ok": False, "error": "ids_list_required"}, status=400)
+            # Один UPDATE с CASE; чужие id обнаруживаются по числу обновлённых строк
+            try:
+                orders = ordering.bulk_reorder(task.checkpoints.all(), ids)
+            except TaskCheckpoint.DoesNotExist:
+                return JsonResponse({"ok": False, "error": "not_found"}, status=404)
+            realtime.publish(realtime.project_channel(task.project_id), "checkpoint", {"task_id": task.pk})
+            return JsonResponse({"ok": True, "orders": orders})
 
         # ---- Chat ----
         if action == "chat_add":
@@ -448,4 +860,176 @@ class TaskPanelApiView(ManagerRequiredMixin, View):
         return JsonResponse({"ok": False, "error": "bad_action"}, status=400)
 
 
+# ---- Вложения задач (crm.attachments): менеджеры и исполнитель задачи ----
+
+
+def visible_tasks(user: User):
+    tasks = Task.objects.all()
+    return tasks if user.is_manager() else tasks.filter(assignee=user)
+
+
+class TaskAttachmentsApiView(RoleAllowedMixin, View):
+    """GET — список вложений задачи, POST (multipart, поле file) — загрузка."""
+
+    allowed_roles = (User.Role.MANAGER, User.Role.DEVELOPER)
+    query_budget = 6
+    read_replica = True
+
+    def get(self, request: HttpRequest, pk: int) -> JsonResponse:
+        task = get_object_or_404(visible_tasks(request.user).only("id"), pk=pk)
+        rows = task.attachments.select_related("uploaded_by").order_by("-created_at", "-id")
+        return JsonResponse({"ok": True, "attachments": [attachments.serialize(a) for a in rows]})
+
+    def post(self, request: HttpRequest, pk: int) -> JsonResponse:
+        task = get_object_or_404(visible_tasks(request.user).only("id"), pk=pk)
+        uploaded = request.FILES.get("file")
+        if uploaded is None:
+            return JsonResponse({"ok": False, "error": "file_required"}, status=400)
+        try:
+            attachment = attachments.store(task, uploaded, request.user)
+        except attachments.AttachmentError as exc:
+            return JsonResponse({"ok": False, "error": exc.code}, status=413 if exc.code == "too_large" else 400)
+        return JsonResponse({"ok": True, "attachment": attachments.serialize(attachment)}, status=201)
+
+
+@method_decorator(require_GET, name="dispatch")
+class AttachmentDownloadView(RoleAllowedMixin, View):
+    """Скачивание вложения: Range, ETag / If-Modified-Since, sendfile при настройке."""
+
+    allowed_roles = (User.Role.MANAGER, User.Role.DEVELOPER)
+    query_budget = 3
+    read_replica = True
+
+    def get(self, request: HttpRequest, pk: int) -> HttpResponse:
+        qs = Attachment.objects.filter(task__in=visible_tasks(request.user))
+        return attachments.serve(request, get_object_or_404(qs, pk=pk))
+
+
+# ---- Push-каналы (SSE). Работают только под ASGI: под WSGI бесконечный поток занял бы воркер ----
+
+
+class ProjectEventStreamView(View):
+    """События доски и чатов задач проекта для менеджеров."""
+
+    query_budget = 3
+
+    async def get(self, request: HttpRequest, pk: int) -> HttpResponse:
+        user = await request.auser()
+        if not user.is_authenticated or not user.is_manager():
+            return HttpResponse(status=403)
+        if not isinstance(request, ASGIRequest):
+            # 204 — сигнал EventSource не переподключаться; клиент остаётся на опросе
+            return HttpResponse(status=204)
+        if not await Project.objects.filter(pk=pk).aexists():
+            return HttpResponse(status=404)
+        return realtime.event_stream_response(realtime.project_channel(pk))
+
+
+class RequestEventStreamView(View):
+    """События переписки и этапов заявки: менеджерам и клиенту-владельцу."""
+
+    query_budget = 3
+
+    async def get(self, request: HttpRequest, pk: int) -> HttpResponse:
+        user = await request.auser()
+        if not user.is_authenticated:
+            return HttpResponse(status=403)
+        visible = ClientRequest.objects.filter(pk=pk)
+        if not user.is_manager():
+            visible = visible.filter(client=user)
+        if not isinstance(request, ASGIRequest):
+            return HttpResponse(status=204)
+        if not await visible.aexists():
+            return HttpResponse(status=404)
+        return realtime.event_stream_response(realtime.request_channel(pk))
+
+
+@method_decorator(require_GET, name="dispatch")
+class SearchApiView(LoginRequiredMixin, View):
+    """
+    Поиск по заявкам, задачам, комментариям и сообщениям: ?q=<текст>&kind=task&kind=comment&limit=20.
+    Хиты ранжированы (bm25) и отфильтрованы по правам пользователя, см. crm.search.
+    """
+
+    default_limit = 20
+    max_limit = 100
+    query_budget = 7
+    read_replica = True
+
+    def get(self, request: HttpRequest) -> HttpResponse:
+        text = (request.GET.get("q") or "").strip()
+        kinds = tuple(k for k in request.GET.getlist("kind") if k in search.KINDS) or None
+        try:
+            limit = min(int(request.GET.get("limit") or self.default_limit), self.max_limit)
+        except ValueError:
+            return JsonResponse({"ok": False, "error": "invalid_params"}, status=400)
+        if len(text) < 2 or limit < 1:
+            return JsonResponse({"ok": True, "results": []})
+        return JsonResponse({"ok": True, "results": search.search(request.user, text, kinds, limit)})
+
+
+@method_decorator(require_GET, name="dispatch")
+class SprintBurndownApiView(ManagerRequiredMixin, View):
+    """Burndown спринта: дни, остаток SP по дням, идеальная линия, взятое в спринт и сделанное."""
+
+    query_budget = 4
+    read_replica = True
+
+    def get(self, request: HttpRequest, pk: int) -> HttpResponse:
+        sprint = get_object_or_404(Sprint, pk=pk)
+        data = burndown.sprint_burndown(sprint)
+        if data is None:
+            return JsonResponse({"ok": False, "error": "sprint_dates_required"}, status=400)
+        return JsonResponse({"ok": True, "today": timezone.localdate().isoformat(), **data})
+
+
+@method_decorator(require_GET, name="dispatch")
+class ProjectVelocityApiView(ManagerRequiredMixin, View):
+    """Скорость команды по спринтам проекта: сделанные SP и скользящее среднее (?window=3)."""
+
+    query_budget = 5
+    read_replica = True
+
+    def get(self, request: HttpRequest, pk: int) -> HttpResponse:
+        project = get_object_or_404(Project, pk=pk)
+        try:
+            window = max(1, min(int(request.GET.get("window") or burndown.VELOCITY_WINDOW), 12))
+        except ValueError:
+            return JsonResponse({"ok": False, "error": "invalid_params"}, status=400)
+        return JsonResponse({"ok": True, "sprints": burndown.project_velocity(project, window)})
+
+
+@method_decorator(require_GET, name="dispatch")
+class ProjectFlowReportApiView(ManagerRequiredMixin, View):
+    """Lead time и cycle time задач проекта, завершённых за последние ?days=30 дней (по журналу событий)."""
+
+    query_budget = 4
+    read_replica = True
+
+    def get(self, request: HttpRequest, pk: int) -> HttpResponse:
+        project = get_object_or_404(Project.objects.only("id"), pk=pk)
+        try:
+            days = max(1, min(int(request.GET.get("days") or 30), 3650))
+        except ValueError:
+            return JsonResponse({"ok": False, "error": "invalid_params"}, status=400)
+        return JsonResponse({"ok": True, **reports.flow_report(project.pk, reports.default_since(days))})
+
+
+@method_decorator(require_GET, name="dispatch")
+class ProjectEventExportView(ManagerRequiredMixin, View):
+    """Потоковая CSV-выгрузка журнала событий проекта (?days=N — только за последние N дней)."""
+
+    query_budget = 3
+
+    def get(self, request: HttpRequest, pk: int) -> HttpResponse:
+        project = get_object_or_404(Project.objects.only("id"), pk=pk)
+        events = TaskEvent.objects.filter(project_id=project.pk)
+        days = request.GET.get("days") or ""
+        if days.isdigit():
+            events = events.filter(created_at__gte=reports.default_since(int(days)))
+        response = StreamingHttpResponse(reports.export_rows(events), content_type="text/csv; charset=utf-8")
+        response["Content-Disposition"] = f'attachment; filename="project-{project.pk}-events.csv"'
+        return response
+
+
 # Create your views here.